@@ -0,0 +1 @@
+"""Benchmarks du pipeline CBC to Excel (hors package distribué)."""
@@ -0,0 +1,128 @@
+# generate.py
+
+import numpy as np
+import pandas as pd
+
+from core.config import DEFAULT_ENCODING, DELIMITER, operation_types
+
+# Colonnes d'un export CBC, dans l'ordre du fichier téléchargé
+CBC_COLUMNS = [
+    "Numéro de compte",
+    "Nom de la rubrique",
+    "Nom",
+    "Devise",
+    "Numéro de l'extrait",
+    "Date",
+    "Description",
+    "Valeur",
+    "Montant",
+    "Solde",
+    "crédit",
+    "débit",
+    "numéro de compte contrepartie",
+    "BIC contrepartie",
+    "Nom contrepartie",
+    "Adresse contrepartie",
+    "communication structurée",
+    "Communication libre",
+]
+
+ACCOUNT = "BE50732047041718"
+EXPORT_FILE_NAME = f"export_{ACCOUNT}_20250118_1200.csv"
+
+MERCHANTS = [
+    "COLRUYT",
+    "DELHAIZE",
+    "CARREFOUR EXPRESS",
+    "PROXIMUS",
+    "LUMINUS",
+    "VIVIUM",
+    "BOULANGERIE PAUL",
+    "STARBUCKS",
+    "SHOP & GO",
+    "TOTALENERGIES",
+]
+CITIES = ["BRUXELLES", "LIEGE", "NAMUR", "MONS", "IXELLES", "WAVRE"]
+PEOPLE = ["DUPONT JEAN", "MARTIN MARIE", "PEETERS LUC", "JANSSENS ANNE"]
+
+
+def _description(op_type: str, merchant: str, city: str, person: str, n: int) -> str:
+    """
+    Construit une description réaliste pour un type d'opération.
+    """
+    if op_type.startswith("DOMICILIATION"):
+        return (
+            f"{op_type}     CREANCIER       : {merchant} SA   "
+            f"REF. CREANCIER : BE{n:06d}ZZZ  MANDAT : {n:08d}  "
+            f"COMMUNICATION   : FACTURE {n} {merchant}"
+        )
+    if op_type.startswith("PAIEMENT"):
+        return (
+            f"{op_type}   {n % 28 + 1:02d}-{n % 12 + 1:02d}-2024 A "
+            f"{n % 24:02d}.{n % 60:02d} HEURES {merchant} {city} {n % 9999:04d} "
+            f"AVEC LA CARTE 6703 XXXX XXXX {n % 10000:04d}"
+        )
+    if op_type.startswith("VIREMENT"):
+        return f"{op_type} {person} BE{n:014d} COMMUNICATION : LOYER {n % 12 + 1}"
+    return f"{op_type} {merchant} {city} {n}"
+
+
+def generate_export(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Génère un export CBC synthétique et déterministe de `n_rows` lignes,
+    avec les colonnes réelles et les types d'opération de `config`.
+    """
+    rng = np.random.default_rng(seed)
+    op_types = rng.choice(operation_types, size=n_rows)
+    merchants = rng.choice(MERCHANTS, size=n_rows)
+    cities = rng.choice(CITIES, size=n_rows)
+    people = rng.choice(PEOPLE, size=n_rows)
+    numbers = rng.integers(0, 20_000, size=n_rows)
+    amounts = rng.normal(-40, 300, size=n_rows).round(2)
+    dates = pd.Timestamp("2015-01-01") + pd.to_timedelta(
+        np.sort(rng.integers(0, 3650, size=n_rows)), unit="D"
+    )
+
+    descriptions = [
+        _description(op_type, merchant, city, person, int(n))
+        for op_type, merchant, city, person, n in zip(
+            op_types, merchants, cities, people, numbers
+        )
+    ]
+    is_transfer = pd.Series(op_types).str.startswith("VIREMENT")
+    date_strings = dates.strftime("%d/%m/%Y")
+    amount_strings = pd.Series(amounts).map("{:.2f}".format).str.replace(".", ",")
+
+    return pd.DataFrame(
+        {
+            "Numéro de compte": ACCOUNT,
+            "Nom de la rubrique": "Compte à vue",
+            "Nom": "FDD ASBL",
+            "Devise": "EUR",
+            "Numéro de l'extrait": np.arange(n_rows) // 40 + 1,
+            "Date": date_strings,
+            "Description": descriptions,
+            "Valeur": date_strings,
+            "Montant": amount_strings,
+            "Solde": "1000,00",
+            "crédit": "",
+            "débit": "",
+            "numéro de compte contrepartie": "",
+            "BIC contrepartie": "",
+            "Nom contrepartie": pd.Series(people).where(is_transfer, ""),
+            "Adresse contrepartie": "",
+            "communication structurée": "",
+            "Communication libre": "",
+        },
+        columns=CBC_COLUMNS,
+    )
+
+
+def write_export(path: str, n_rows: int, seed: int = 0) -> str:
+    """
+    Écrit l'export synthétique au format CBC (latin-1, `;`).
+    """
+    generate_export(n_rows, seed).to_csv(
+        path, sep=DELIMITER, encoding=DEFAULT_ENCODING, index=False
+    )
+    return path
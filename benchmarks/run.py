@@ -0,0 +1,228 @@
+# run.py
+"""
+Mesure chaque étape du pipeline et la conversion complète (la commande
+cbc-to-excel, via core.main.main) sur des exports synthétiques, puis
+enregistre ou compare les résultats.
+
+    python -m benchmarks.run --sizes 1000 100000 --save benchmarks/baseline.json
+    python -m benchmarks.run --sizes 1000 100000 --compare benchmarks/baseline.json
+"""
+
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from core import steps
+from core.config import DEFAULT_ENCODING, DELIMITER
+from core.convert import read_input_csv
+from core.main import main as cli_main
+
+from .generate import EXPORT_FILE_NAME, write_export
+
+DEFAULT_SIZES = [1_000, 100_000]
+DEFAULT_THRESHOLD = 0.25
+# En dessous de ce temps (s), les écarts sont considérés comme du bruit
+NOISE_FLOOR = 0.005
+
+# Catégories de référence pour l'étape 8
+BENCH_CATEGORY_INDEX = {
+    "CONSOMMATION": "D-Frais bancaires",
+    "FORFAIT": "D-Frais bancaires",
+    "DECOMPTE": "D-Frais bancaires",
+    "DOMICILIATION EUROPEENNE": "D-Domiciliations",
+    "VIREMENT EUROPEEN DE": "R-Virements",
+    "RETRAIT D'ESPECES": "D-Retraits",
+}
+
+
+def _pipeline(input_file: str, output_file: str):
+    """
+    Étapes mesurées, dans l'ordre du pipeline.
+    """
+    return [
+        ("validate_schema", steps.validate_schema),
+        ("step1_clean_columns", steps.step1_clean_columns),
+        ("step2_create_new_columns", steps.step2_create_new_columns),
+        ("step3_rename_columns", steps.step3_rename_columns),
+        ("step4_reorder_columns", steps.step4_reorder_columns),
+        ("step4b_normalize_description", steps.step4b_normalize_description),
+        ("step5_find_operation_type", steps.step5_find_operation_type),
+        (
+            "step6_fill_contrepartie_ET_objFact",
+            steps.step6_fill_contrepartie_ET_objFact,
+        ),
+        ("step7_drop_description", steps.step7_drop_description),
+        (
+            "step8_fill_categorie",
+            lambda df: steps.step8_fill_categorie(
+                df, category_index=BENCH_CATEGORY_INDEX
+            ),
+        ),
+        (
+            "step9_export_excel",
+            lambda df: steps.step9_export_excel(df, input_file, output_file),
+        ),
+    ]
+
+
+def write_categories(path: str) -> None:
+    """
+    Écrit BENCH_CATEGORY_INDEX au format du fichier --categories.
+    """
+    operations: dict[str, list[str]] = {}
+    for operation, category in BENCH_CATEGORY_INDEX.items():
+        operations.setdefault(category, []).append(operation)
+    with open(path, mode="w", encoding="utf-8") as file:
+        file.write("Catégorie;Opérations\n")
+        for category, names in operations.items():
+            file.write(f"{category};{','.join(names)}\n")
+
+
+def _clear_caches() -> None:
+    # Chaque répétition part d'un cache de normalisation vide
+    steps._NORMALIZED_CACHE.clear()
+
+
+def bench_size(n_rows: int, repeat: int, workdir: str) -> dict[str, float]:
+    """
+    Retourne {nom d'étape: meilleur temps (s)} pour un export de `n_rows` lignes.
+    """
+    input_file = os.path.join(workdir, EXPORT_FILE_NAME)
+    output_file = os.path.join(workdir, "bench.xlsx")
+    category_file = os.path.join(workdir, "categories.csv")
+    write_export(input_file, n_rows)
+    write_categories(category_file)
+    cli_args = [
+        "--input",
+        input_file,
+        "--categories",
+        category_file,
+        "--output",
+        output_file,
+    ]
+
+    timings: dict[str, float] = {}
+    for _ in range(repeat):
+        _clear_caches()
+        start = time.perf_counter()
+        df = read_input_csv(input_file, DEFAULT_ENCODING, DELIMITER)
+        timings["read_input_csv"] = min(
+            timings.get("read_input_csv", float("inf")), time.perf_counter() - start
+        )
+        for name, step in _pipeline(input_file, output_file):
+            start = time.perf_counter()
+            df = step(df)
+            elapsed = time.perf_counter() - start
+            timings[name] = min(timings.get(name, float("inf")), elapsed)
+
+        _clear_caches()
+        start = time.perf_counter()
+        # Les messages de la commande ne doivent pas se mêler au rapport
+        with contextlib.redirect_stdout(sys.stderr):
+            cli_main(cli_args)
+        elapsed = time.perf_counter() - start
+        timings["end_to_end"] = min(timings.get("end_to_end", float("inf")), elapsed)
+    return timings
+
+
+def run_benchmarks(sizes: list[int], repeat: int) -> dict:
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_rows in sizes:
+            print(f"--- {n_rows} lignes ---", file=sys.stderr)
+            results[str(n_rows)] = bench_size(n_rows, repeat, workdir)
+    return {
+        "meta": {
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare_results(
+    current: dict, baseline: dict, threshold: float
+) -> tuple[list[str], list[str]]:
+    """
+    Compare deux rapports. Retourne (lignes du tableau, régressions) ;
+    une étape régresse si elle est plus lente de plus de `threshold` (ratio)
+    et de plus de NOISE_FLOOR secondes.
+    """
+    lines = [f"{'lignes':>9}  {'étape':<36} {'base':>9} {'actuel':>9} {'ratio':>7}"]
+    regressions = []
+    for size, timings in current["results"].items():
+        base_timings = baseline["results"].get(size, {})
+        for name, elapsed in timings.items():
+            base = base_timings.get(name)
+            if base is None:
+                continue
+            ratio = elapsed / base if base else float("inf")
+            line = f"{size:>9}  {name:<36} {base:>9.4f} {elapsed:>9.4f} {ratio:>7.2f}"
+            if ratio > 1 + threshold and elapsed - base > NOISE_FLOOR:
+                line += "  RÉGRESSION"
+                regressions.append(f"{size} lignes / {name} : x{ratio:.2f}")
+            lines.append(line)
+    return lines, regressions
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline CBC.")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=DEFAULT_SIZES,
+        help="Tailles d'export à mesurer (défaut: 1000 100000 ; 1000000 pour 1M).",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Nombre de répétitions, le meilleur temps est gardé (défaut: 3).",
+    )
+    parser.add_argument("--save", help="Enregistre les résultats dans ce JSON.")
+    parser.add_argument("--compare", help="JSON de référence à comparer.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Ralentissement toléré avant échec (défaut: 0.25 = +25 %%).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    report = run_benchmarks(args.sizes, args.repeat)
+
+    if args.save:
+        with open(args.save, mode="w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        print(f"Résultats enregistrés : {args.save}")
+
+    if args.compare:
+        with open(args.compare, mode="r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        lines, regressions = compare_results(report, baseline, args.threshold)
+        print("\n".join(lines))
+        if regressions:
+            print("Régressions détectées :\n- " + "\n- ".join(regressions))
+            return 1
+    else:
+        print(json.dumps(report["results"], indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# batch.py
+
+import glob
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, NamedTuple
+
+from .categories import init_worker_categories, worker_categories
+from .convert import convert_file
+from .rules import CategoryRules
+
+
+class BatchResult(NamedTuple):
+    input_file: str
+    output_file: str | None
+    error: str | None
+    details: str | None
+    seconds: float
+
+
+def _convert_one(input_file: str, options: dict[str, Any]) -> BatchResult:
+    """
+    Convertit un fichier sans jamais lever d'exception : l'erreur éventuelle
+    est renvoyée dans le résultat pour ne pas interrompre le lot.
+    """
+    start = time.perf_counter()
+    category_index, category_rules = worker_categories()
+    try:
+        output_file = convert_file(
+            input_file,
+            category_index=category_index,
+            category_rules=category_rules,
+            **options,
+        )
+    except Exception as exc:
+        return BatchResult(
+            input_file,
+            None,
+            f"{type(exc).__name__}: {exc}",
+            traceback.format_exc(),
+            time.perf_counter() - start,
+        )
+    return BatchResult(input_file, output_file, None, None, time.perf_counter() - start)
+
+
+def collect_input_files(input_dir: str, pattern: str = "*.csv") -> list[str]:
+    """
+    Liste (triée) des fichiers de `input_dir` correspondant au motif glob.
+    """
+    if not os.path.isdir(input_dir):
+        raise FileNotFoundError(f"Dossier d'entrée introuvable: {input_dir}")
+    return sorted(
+        path
+        for path in glob.glob(os.path.join(input_dir, pattern))
+        if os.path.isfile(path)
+    )
+
+
+def write_error_report(result: BatchResult, report_dir: str) -> str:
+    """
+    Écrit le rapport d'erreur d'un fichier en échec et retourne son chemin.
+    """
+    base_name = os.path.splitext(os.path.basename(result.input_file))[0]
+    report_path = os.path.join(report_dir, f"{base_name}.error.log")
+    with open(report_path, mode="w", encoding="utf-8") as file:
+        file.write(f"Fichier : {result.input_file}\n")
+        file.write(f"Erreur : {result.error}\n\n")
+        file.write(result.details or "")
+    return report_path
+
+
+def format_summary(results: list[BatchResult]) -> str:
+    """
+    Tableau récapitulatif du lot (une ligne par fichier).
+    """
+    rows = [("Fichier", "Statut", "Durée", "Sortie / erreur")]
+    for result in results:
+        rows.append(
+            (
+                os.path.basename(result.input_file),
+                "OK" if result.error is None else "ERREUR",
+                f"{result.seconds:.2f}s",
+                result.output_file if result.error is None else result.error,
+            )
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(3)]
+    lines = [
+        "  ".join(cell.ljust(width) for cell, width in zip(row[:3], widths))
+        + "  "
+        + row[3]
+        for row in rows
+    ]
+    failed = sum(result.error is not None for result in results)
+    lines.append(f"{len(results) - failed} converti(s), {failed} en erreur.")
+    return "\n".join(lines)
+
+
+def run_batch(
+    input_files: list[str],
+    jobs: int,
+    category_index: dict[str, str] | None,
+    category_rules: CategoryRules | None = None,
+    **options: Any,
+) -> list[BatchResult]:
+    """
+    Convertit plusieurs fichiers en parallèle sur `jobs` processus.
+    L'index des catégories est construit une fois par l'appelant et partagé ;
+    les résultats sont renvoyés dans l'ordre de `input_files`.
+    La canonicalisation des contreparties (`counterparty_file`) n'est pas
+    possible en parallèle : chaque processus compléterait sa propre table,
+    et un même nom pourrait recevoir un nom canonique différent selon le
+    fichier.
+    """
+    if options.get("counterparty_file") and jobs > 1 and len(input_files) > 1:
+        raise ValueError(
+            "La canonicalisation des contreparties se fait avec jobs=1 "
+            "(une seule table de correspondance)."
+        )
+    if jobs <= 1 or len(input_files) <= 1:
+        init_worker_categories(category_index, category_rules)
+        return [_convert_one(input_file, options) for input_file in input_files]
+
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(input_files)),
+        initializer=init_worker_categories,
+        initargs=(category_index, category_rules),
+    ) as executor:
+        futures = [
+            executor.submit(_convert_one, input_file, options)
+            for input_file in input_files
+        ]
+        return [future.result() for future in futures]
@@ -0,0 +1,72 @@
+# cache.py
+
+import hashlib
+import importlib.util
+import os
+
+import pandas as pd
+
+# À incrémenter dès qu'une étape 1 à 7 change de résultat : les caches écrits
+# par une version précédente du pipeline sont alors ignorés.
+# 2 : colonnes de texte en `category` (étapes 4 à 7), types déclarés à la
+# lecture (N°extrait en Int64).
+PIPELINE_VERSION = "2"
+
+
+def file_digest(path: str) -> str:
+    """
+    Empreinte du contenu du fichier (lu par blocs).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, mode="rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_stem(cache_dir: str, input_file: str, encoding: str, delimiter: str) -> str:
+    """
+    Nom du cache : contenu de l'export, options de lecture (les mêmes octets
+    lus avec un autre encodage ou séparateur donnent un autre résultat) et
+    version du pipeline.
+    """
+    options = hashlib.blake2b(
+        f"{encoding.lower()}\n{delimiter}".encode(), digest_size=4
+    ).hexdigest()
+    return os.path.join(
+        cache_dir,
+        f"{file_digest(input_file)}-{options}-v{PIPELINE_VERSION}.enriched",
+    )
+
+
+def save_enriched(
+    df: pd.DataFrame, cache_dir: str, input_file: str, encoding: str, delimiter: str
+) -> str:
+    """
+    Enregistre le résultat de l'étape 7 : en Parquet si pyarrow est
+    installé, sinon en pickle. Retourne le chemin du cache.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = _cache_stem(cache_dir, input_file, encoding, delimiter)
+    if importlib.util.find_spec("pyarrow") is not None:
+        path = stem + ".parquet"
+        df.to_parquet(path, index=False)
+    else:
+        path = stem + ".pkl"
+        df.to_pickle(path)
+    return path
+
+
+def load_enriched(
+    cache_dir: str, input_file: str, encoding: str, delimiter: str
+) -> pd.DataFrame | None:
+    """
+    Recharge le résultat de l'étape 7 pour ce contenu d'export, ces options
+    de lecture et cette version du pipeline (None si absent).
+    """
+    stem = _cache_stem(cache_dir, input_file, encoding, delimiter)
+    if os.path.exists(stem + ".parquet") and importlib.util.find_spec("pyarrow"):
+        return pd.read_parquet(stem + ".parquet")
+    if os.path.exists(stem + ".pkl"):
+        return pd.read_pickle(stem + ".pkl")
+    return None
@@ -1,3 +1,34 @@
+import os
+
+from .config import DEFAULT_RULES_FILE
+from .rules import CategoryRules, load_category_rules
+
+# Index et règles des catégories d'un processus worker, transmis une seule
+# fois à chaque worker via l'initializer du pool (core.batch, core.parallel).
+_worker_category_index: dict[str, str] | None = None
+_worker_category_rules: CategoryRules | None = None
+
+
+def init_worker_categories(
+    category_index: dict[str, str] | None,
+    category_rules: CategoryRules | None = None,
+) -> None:
+    """
+    Initializer des pools de processus : garde l'index et les règles des
+    catégories pour les tâches du processus.
+    """
+    global _worker_category_index, _worker_category_rules
+    _worker_category_index = category_index
+    _worker_category_rules = category_rules
+
+
+def worker_categories() -> tuple[dict[str, str] | None, CategoryRules | None]:
+    """
+    Index et règles donnés à init_worker_categories dans ce processus.
+    """
+    return _worker_category_index, _worker_category_rules
+
+
 class CategoryNode:
     def __init__(self, category_name):
         self.name = category_name
@@ -9,12 +40,15 @@ class CategoryNode:
         self.operations.add(operation)
 
     def search_category(self, operation):
+        # L'arbre est trié par nom de catégorie, pas par opération :
+        # on doit donc explorer les deux sous-arbres.
         if operation in self.operations:
             return self.name
-        elif self.left and operation < self.name:
-            return self.left.search_category(operation)
-        elif self.right and operation > self.name:
-            return self.right.search_category(operation)
+        for child in (self.left, self.right):
+            if child:
+                found = child.search_category(operation)
+                if found:
+                    return found
         return None
 
 
@@ -60,6 +94,69 @@ class CategoryTree:
         return None
 
 
+def read_category_rows(file_path):
+    """
+    Lit le fichier CSV des catégories et retourne une liste de tuples
+    (catégorie, [opérations]).
+    """
+    import csv
+
+    rows = []
+    with open(file_path, mode="r", encoding="utf-8") as file:
+        reader = csv.DictReader(file, delimiter=";")
+        for row in reader:
+            rows.append((row["Catégorie"], row["Opérations"].split(",")))
+    return rows
+
+
+def build_category_index(rows):
+    """
+    Construit un index plat {opération: catégorie} à partir des lignes
+    retournées par `read_category_rows`.
+    Les opérations vides sont ignorées, les espaces autour sont supprimés et
+    les doublons dans une même catégorie sont tolérés.
+    Lève une ValueError si une opération est associée à plusieurs catégories.
+    """
+    index = {}
+    conflicts = {}
+    for category, operations in rows:
+        for operation in operations:
+            operation = operation.strip()
+            if not operation:
+                continue
+            existing = index.setdefault(operation, category)
+            if existing != category:
+                conflicts.setdefault(operation, {existing}).add(category)
+
+    if conflicts:
+        details = "; ".join(
+            f"{operation} -> {', '.join(sorted(categories))}"
+            for operation, categories in sorted(conflicts.items())
+        )
+        raise ValueError(f"Opérations associées à plusieurs catégories : {details}")
+    return index
+
+
+def build_category_index_from_csv(file_path):
+    """
+    Charge l'index {opération: catégorie} depuis le fichier CSV des catégories.
+    """
+    return build_category_index(read_category_rows(file_path))
+
+
+def load_category_index(
+    category_file: str, no_categories: bool = False
+) -> dict[str, str] | None:
+    """
+    Charge l'index des catégories (None si les catégories sont désactivées).
+    """
+    if no_categories:
+        return None
+    if not os.path.exists(category_file):
+        raise FileNotFoundError(f"Fichier de catégories introuvable: {category_file}")
+    return build_category_index_from_csv(category_file)
+
+
 def build_category_tree_from_csv(file_path):
     """
     Charge un arbre binaire à partir d'un fichier CSV contenant les catégories et leurs opérations associées.
@@ -70,14 +167,66 @@ def build_category_tree_from_csv(file_path):
 
     categories.csv
     """
-    import csv
-
     tree = CategoryTree()
 
-    with open(file_path, mode="r", encoding="utf-8") as file:
-        reader = csv.DictReader(file, delimiter=";")
-        for row in reader:
-            category = row["Catégorie"]
-            operations = row["Opérations"].split(",")
-            tree.insert(category, operations)
+    for category, operations in read_category_rows(file_path):
+        tree.insert(category, operations)
     return tree
+
+
+class CategoryCache:
+    """
+    Garde l'index et les règles des catégories en mémoire et ne les recharge
+    que si la date de modification d'un des fichiers change.
+    """
+
+    def __init__(
+        self,
+        category_file: str,
+        rules_file: str | None = None,
+        no_categories: bool = False,
+        explain: bool = False,
+    ):
+        self.category_file = category_file
+        self.rules_file = rules_file
+        self.no_categories = no_categories
+        self.explain = explain
+        self._mtimes = None
+        self.category_index = None
+        self.category_rules = None
+
+    def _current_mtimes(self) -> tuple:
+        paths = (self.category_file, self.rules_file or DEFAULT_RULES_FILE)
+        return tuple(
+            os.stat(path).st_mtime_ns if os.path.exists(path) else None
+            for path in paths
+        )
+
+    def get(self) -> tuple:
+        """
+        Retourne (index des catégories, règles), rechargés si nécessaire.
+        Si un fichier modifié est invalide, les catégories précédentes sont
+        conservées (sauf au premier chargement, où l'erreur est levée).
+        """
+        mtimes = self._current_mtimes()
+        if mtimes == self._mtimes:
+            return self.category_index, self.category_rules
+        try:
+            category_index = load_category_index(self.category_file, self.no_categories)
+            category_rules = load_category_rules(
+                self.rules_file,
+                DEFAULT_RULES_FILE,
+                explain=self.explain,
+                no_categories=self.no_categories,
+            )
+        except (ValueError, FileNotFoundError) as exc:
+            if self._mtimes is None:
+                raise
+            print(f"Catégories non rechargées ({exc}) : version précédente conservée.")
+        else:
+            if self._mtimes is not None:
+                print("Catégories rechargées.")
+            self.category_index = category_index
+            self.category_rules = category_rules
+        self._mtimes = mtimes
+        return self.category_index, self.category_rules
@@ -6,6 +6,21 @@ from typing import Any
 DEFAULT_ENCODING = "latin-1"
 DELIMITER = ";"
 DEFAULT_CATEGORY_FILE = "data/categories.csv"
+DEFAULT_RULES_FILE = "data/category_rules.csv"
+DEFAULT_LEDGER_FILE = "data/ledger.sqlite"
+DEFAULT_STORE_FILE = "data/historique.sqlite"
+DEFAULT_COUNTERPARTY_FILE = "data/contreparties.sqlite"
+DEFAULT_CACHE_DIR = "data/cache"
+# Fichiers de catégories et de règles envoyés au service HTTP (serve)
+DEFAULT_SERVICE_CATEGORIES_DIR = "data/service_categories"
+# Taille minimale d'un morceau d'export traité par un worker (--workers) : en
+# dessous, le coût des processus et de la sérialisation dépasse le gain
+SHARD_MIN_ROWS = 20_000
+# Formats de sortie (l'extension du fichier est le nom du format)
+OUTPUT_FORMATS = ("xlsx", "parquet", "csv", "sqlite")
+# Traitement des transactions en double entre exports (--duplicates) :
+# suppression, marquage dans 'Remarque' ou simple décompte
+DUPLICATE_POLICIES = ("drop", "flag", "report")
 
 # Liste des types d'opérations
 operation_types = [
@@ -0,0 +1,175 @@
+# consolidate.py
+
+import os
+
+import pandas as pd
+
+from .convert import enrich_export, enrich_export_with_keys
+from .counterparties import CounterpartyIndex, canonicalize_counterparties
+from .dedup import apply_duplicate_policy
+from .excel_writer import StreamingExcelWriter
+from .metrics import PipelineMetrics, run_step
+from .naming import (
+    ACCOUNT_COLUMN,
+    build_sheet_name,
+    get_consolidated_filename,
+    get_nom_compte,
+    parse_filename,
+)
+from .rules import CategoryRules
+from .steps import prepare_export, step8_fill_categorie
+
+COMBINED_SHEET = "Tous les comptes"
+# Message affiché pour chaque politique de doublons (config.DUPLICATE_POLICIES)
+_DUPLICATE_ACTIONS = {"drop": "supprimé(s)", "flag": "marqué(s)", "report": "trouvé(s)"}
+
+
+def enrich_accounts(
+    input_files: list[str],
+    encoding: str,
+    delimiter: str,
+    category_index: dict[str, str] | None = None,
+    engine: str = "c",
+    metrics: PipelineMetrics | None = None,
+    category_rules: CategoryRules | None = None,
+    counterparty_file: str | None = None,
+    duplicates: str | None = None,
+) -> dict[str, pd.DataFrame]:
+    """
+    Étapes 1 à 8 pour chaque export, regroupées par nom de compte
+    (config.cptsCBC). Plusieurs exports d'un même compte sont mis bout à
+    bout et triés par date. Avec `counterparty_file`, les contreparties de
+    tous les comptes sont canonicalisées avec la même table
+    (core.counterparties). Avec `duplicates` (config.DUPLICATE_POLICIES),
+    les transactions présentes dans plusieurs exports qui se chevauchent
+    sont traitées selon cette politique (core.dedup) ; la première vue est
+    gardée. Retourne {nom de compte: DataFrame}.
+    """
+    frames: dict[str, list[pd.DataFrame]] = {}
+    keys: dict[str, list[pd.Series]] = {}
+    counterparties = CounterpartyIndex(counterparty_file) if counterparty_file else None
+    for input_file in input_files:
+        account = get_nom_compte(parse_filename(input_file)[0])
+        if duplicates:
+            df, export_keys = enrich_export_with_keys(
+                input_file, encoding, delimiter, engine, metrics
+            )
+            keys.setdefault(account, []).append(export_keys)
+        else:
+            df = enrich_export(input_file, encoding, delimiter, engine, metrics)
+        if counterparties is not None:
+            df = run_step(metrics, canonicalize_counterparties, df, counterparties)
+        if category_index is not None:
+            df = run_step(
+                metrics,
+                step8_fill_categorie,
+                df,
+                category_index=category_index,
+                category_rules=category_rules,
+            )
+        frames.setdefault(account, []).append(prepare_export(df))
+
+    accounts = {}
+    for account, account_frames in frames.items():
+        df = pd.concat(account_frames, ignore_index=True)
+        if duplicates:
+            df, count = run_step(
+                metrics,
+                apply_duplicate_policy,
+                df,
+                pd.concat(keys[account], ignore_index=True),
+                duplicates,
+            )
+            if count:
+                print(
+                    f"{count} doublon(s) {_DUPLICATE_ACTIONS[duplicates]} : {account}"
+                )
+        if "Date" in df.columns:
+            df = df.sort_values("Date", kind="stable", ignore_index=True)
+        accounts[account] = df
+    return accounts
+
+
+def combine_accounts(accounts: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Feuille commune : toutes les transactions, avec leur compte en première
+    colonne, triées par date.
+    """
+    combined = pd.concat(
+        [df.assign(**{ACCOUNT_COLUMN: account}) for account, df in accounts.items()],
+        ignore_index=True,
+    )
+    columns = [ACCOUNT_COLUMN] + [
+        column for column in combined.columns if column != ACCOUNT_COLUMN
+    ]
+    combined = combined[columns]
+    if "Date" in combined.columns:
+        combined = combined.sort_values("Date", kind="stable", ignore_index=True)
+    return combined
+
+
+def write_consolidated_workbook(
+    accounts: dict[str, pd.DataFrame],
+    output_file: str,
+    combined: pd.DataFrame | None = None,
+) -> str:
+    """
+    Écrit une feuille par compte puis la feuille commune, dans un seul
+    classeur en mémoire constante (core.excel_writer) : les formats sont
+    créés une fois et partagés, aucun fichier n'est relu ni restylé.
+    """
+    if combined is None:
+        combined = combine_accounts(accounts)
+    sheets = [(build_sheet_name(account), df) for account, df in accounts.items()]
+    sheets.append((COMBINED_SHEET, combined))
+    with StreamingExcelWriter(output_file) as writer:
+        for sheet_name, df in sheets:
+            writer.add_sheet(sheet_name, df.columns)
+            writer.write_frame(df)
+    return output_file
+
+
+def convert_consolidated(
+    input_files: list[str],
+    encoding: str,
+    delimiter: str,
+    category_index: dict[str, str] | None = None,
+    output_file: str | None = None,
+    output_dir: str | None = None,
+    engine: str = "c",
+    metrics: PipelineMetrics | None = None,
+    category_rules: CategoryRules | None = None,
+    counterparty_file: str | None = None,
+    duplicates: str | None = None,
+) -> str:
+    """
+    Convertit plusieurs exports (un ou plusieurs comptes) en un seul
+    classeur : une feuille par compte et une feuille « Tous les comptes ».
+    `duplicates` : traitement des transactions en double entre exports
+    (voir enrich_accounts).
+    Retourne le chemin du fichier généré.
+    """
+    if not input_files:
+        raise ValueError("Aucun export à consolider.")
+    accounts = enrich_accounts(
+        input_files,
+        encoding,
+        delimiter,
+        category_index,
+        engine,
+        metrics,
+        category_rules,
+        counterparty_file,
+        duplicates,
+    )
+    combined = combine_accounts(accounts)
+    if not output_file:
+        output_file = get_consolidated_filename(input_files, combined)
+        if output_dir:
+            output_file = os.path.join(output_dir, output_file)
+    run_step(metrics, write_consolidated_workbook, accounts, output_file, combined)
+    print(
+        f"Classeur consolidé généré : {output_file} "
+        f"({len(accounts)} compte(s) : {', '.join(accounts)})"
+    )
+    return output_file
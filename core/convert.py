@@ -0,0 +1,317 @@
+# convert.py
+
+import os
+
+import pandas as pd
+
+from .cache import load_enriched, save_enriched
+from .counterparties import CounterpartyIndex, canonicalize_counterparties
+from .ingest import read_input_csv
+from .ledger import TransactionLedger, compute_fingerprints
+from .metrics import PipelineMetrics, run_step
+from .naming import get_nom_compte, get_output_filename_and_period, parse_filename
+from .parallel import enrich_in_parallel
+from .pipeline import (
+    ENRICH_PIPELINE,
+    ENRICH_STEPS,
+    OUTPUT_COLUMNS,
+    PREPARE_STEPS,
+    Pipeline,
+)
+from .rules import CategoryRules
+from .sinks import CsvChunkSink, infer_output_format, output_path
+from .steps import (
+    prepare_export,
+    step8_fill_categorie,
+    step9_export_excel,
+    step9_export_output,
+)
+from .store import store_transactions
+from .streaming import convert_in_chunks
+
+# Préparation de tout l'export (empreintes, découpage en morceaux), puis
+# enrichissement (des seules nouvelles transactions en mode incrémental)
+PREPARE_PIPELINE = Pipeline(PREPARE_STEPS)
+NEW_ROWS_PIPELINE = Pipeline(ENRICH_STEPS, columns=OUTPUT_COLUMNS)
+
+
+def enrich_export(
+    input_file: str,
+    encoding: str,
+    delimiter: str,
+    engine: str = "c",
+    metrics: PipelineMetrics | None = None,
+) -> pd.DataFrame:
+    """
+    Lecture et étapes 1 à 7 : DataFrame enrichi, prêt pour les catégories.
+    """
+    df = run_step(metrics, read_input_csv, input_file, encoding, delimiter, engine)
+    # Étapes 1 à 6 en place, puis réorganisation et suppression de la
+    # description (étapes 4 et 7) en une seule projection (voir core.pipeline)
+    return ENRICH_PIPELINE.run(df, metrics)
+
+
+def enrich_export_with_keys(
+    input_file: str,
+    encoding: str,
+    delimiter: str,
+    engine: str = "c",
+    metrics: PipelineMetrics | None = None,
+) -> tuple[pd.DataFrame, pd.Series]:
+    """
+    Comme enrich_export, avec la clé de doublon de chaque ligne (l'empreinte
+    de ledger.compute_fingerprints, voir core.dedup), calculée avant que
+    l'enrichissement ne supprime la description. Retourne (DataFrame enrichi, clés alignées sur son index).
+    """
+    df = run_step(metrics, read_input_csv, input_file, encoding, delimiter, engine)
+    df = PREPARE_PIPELINE.run(df, metrics)
+    account_part = parse_filename(input_file)[0]
+    keys = run_step(metrics, compute_fingerprints, df, account_part)
+    return NEW_ROWS_PIPELINE.run(df, metrics), keys
+
+
+def convert_file(
+    input_file: str,
+    encoding: str,
+    delimiter: str,
+    category_index: dict[str, str] | None = None,
+    output_file: str | None = None,
+    output_dir: str | None = None,
+    chunksize: int | None = None,
+    metrics: PipelineMetrics | None = None,
+    cache_dir: str | None = None,
+    engine: str = "c",
+    category_rules: CategoryRules | None = None,
+    output_formats: list[str] | None = None,
+    store_path: str | None = None,
+    workers: int = 1,
+    counterparty_file: str | None = None,
+) -> str:
+    """
+    Convertit un export CBC complet (étapes 1 à 9).
+    Sans `output_file`, le nom est généré depuis le CSV et placé dans
+    `output_dir` (dossier courant par défaut).
+    Avec `metrics`, chaque étape est mesurée (voir core.metrics).
+    Avec `cache_dir`, le résultat de l'étape 7 est mis en cache pour
+    `recategorize_file` (ignoré en mode par blocs).
+    `engine` choisit le lecteur CSV ("c" ou "pyarrow", voir core.ingest).
+    `category_rules` ajoute les règles par mot-clé à l'étape 8 (core.rules).
+    `output_formats` liste les formats de sortie (core.sinks.OUTPUT_FORMATS ;
+    par défaut celui de l'extension de `output_file`, sinon xlsx).
+    Avec `store_path`, les transactions catégorisées sont ajoutées à
+    l'historique (core.store), sans doublons (ignoré en mode par blocs).
+    Avec `workers` > 1, les étapes 4b à 8 d'un gros export sont réparties
+    par morceaux de lignes sur autant de processus (core.parallel).
+    Avec `counterparty_file`, les contreparties sont remplacées par leur nom
+    canonique avant l'étape 8 (core.counterparties).
+    Retourne le chemin du fichier généré (celui du premier format).
+    """
+    if chunksize:
+        return convert_in_chunks(
+            input_file,
+            encoding,
+            delimiter,
+            chunksize,
+            category_index=category_index,
+            output_file=output_file,
+            output_dir=output_dir,
+            metrics=metrics,
+            category_rules=category_rules,
+            output_formats=output_formats,
+            counterparty_file=counterparty_file,
+        )
+
+    df = run_step(metrics, read_input_csv, input_file, encoding, delimiter, engine)
+    df = PREPARE_PIPELINE.run(df, metrics)
+    fingerprints = None
+    if store_path:
+        # L'empreinte utilise la description, supprimée par l'enrichissement
+        account_part = parse_filename(input_file)[0]
+        fingerprints = run_step(metrics, compute_fingerprints, df, account_part)
+    if workers > 1:
+        # L'étape 8 est faite dans les workers, sauf s'il faut mettre en
+        # cache le résultat de l'étape 7 ou canonicaliser les contreparties
+        shard_index = None if cache_dir or counterparty_file else category_index
+        df = run_step(
+            metrics, enrich_in_parallel, df, workers, shard_index, category_rules
+        )
+        if shard_index is not None:
+            category_index = None
+    else:
+        df = NEW_ROWS_PIPELINE.run(df, metrics)
+    if cache_dir:
+        run_step(metrics, save_enriched, df, cache_dir, input_file, encoding, delimiter)
+
+    return _categorize_and_export(
+        df,
+        input_file,
+        category_index,
+        output_file,
+        output_dir,
+        metrics,
+        category_rules,
+        output_formats,
+        store_path,
+        fingerprints,
+        counterparty_file,
+    )
+
+
+def recategorize_file(
+    input_file: str,
+    encoding: str,
+    delimiter: str,
+    cache_dir: str,
+    category_index: dict[str, str] | None = None,
+    output_file: str | None = None,
+    output_dir: str | None = None,
+    metrics: PipelineMetrics | None = None,
+    engine: str = "c",
+    category_rules: CategoryRules | None = None,
+    output_formats: list[str] | None = None,
+    counterparty_file: str | None = None,
+) -> str:
+    """
+    Réapplique uniquement l'étape 8 (puis l'export) à partir du cache de
+    l'étape 7. Sans cache pour ce contenu d'export et cette version du
+    pipeline, une conversion complète est lancée et remplit le cache.
+    Retourne le chemin du fichier généré.
+    """
+    df = run_step(metrics, load_enriched, cache_dir, input_file, encoding, delimiter)
+    if df is None:
+        print(f"Pas de cache pour {input_file} : conversion complète.")
+        return convert_file(
+            input_file,
+            encoding,
+            delimiter,
+            category_index=category_index,
+            output_file=output_file,
+            output_dir=output_dir,
+            metrics=metrics,
+            cache_dir=cache_dir,
+            engine=engine,
+            category_rules=category_rules,
+            output_formats=output_formats,
+            counterparty_file=counterparty_file,
+        )
+    return _categorize_and_export(
+        df,
+        input_file,
+        category_index,
+        output_file,
+        output_dir,
+        metrics,
+        category_rules,
+        output_formats,
+        counterparty_file=counterparty_file,
+    )
+
+
+def _categorize_and_export(
+    df: pd.DataFrame,
+    input_file: str,
+    category_index: dict[str, str] | None,
+    output_file: str | None,
+    output_dir: str | None,
+    metrics: PipelineMetrics | None,
+    category_rules: CategoryRules | None = None,
+    output_formats: list[str] | None = None,
+    store_path: str | None = None,
+    fingerprints: pd.Series | None = None,
+    counterparty_file: str | None = None,
+) -> str:
+    """
+    Étapes 6b, 8 et 9 (communes à la conversion complète et au
+    recatégorisage).
+    Avec `store_path` et les empreintes de `df`, les transactions sont
+    ajoutées à l'historique après l'étape 8.
+    Retourne le chemin de la sortie du premier format.
+    """
+    if counterparty_file:
+        counterparties = CounterpartyIndex(counterparty_file)
+        df = run_step(metrics, canonicalize_counterparties, df, counterparties)
+    if category_index is not None:
+        df = run_step(
+            metrics,
+            step8_fill_categorie,
+            df,
+            category_index=category_index,
+            category_rules=category_rules,
+        )
+    if store_path and fingerprints is not None:
+        run_step(metrics, store_transactions, df, fingerprints, input_file, store_path)
+
+    # *****     FINAL STEP     *****
+    #
+    if not output_formats:
+        output_formats = [infer_output_format(output_file)]
+    if not output_file:
+        output_file, _ = get_output_filename_and_period(input_file, df)
+        if output_dir:
+            output_file = os.path.join(output_dir, output_file)
+    output_files = [
+        output_path(output_file, output_format) for output_format in output_formats
+    ]
+    for output_format, path in zip(output_formats, output_files):
+        if output_format == "xlsx":
+            run_step(metrics, step9_export_excel, df, input_file, path)
+        else:
+            run_step(metrics, step9_export_output, df, input_file, path, output_format)
+    return output_files[0]
+
+
+def convert_file_incremental(
+    input_file: str,
+    encoding: str,
+    delimiter: str,
+    ledger_path: str,
+    category_index: dict[str, str] | None = None,
+    output_file: str | None = None,
+    output_dir: str | None = None,
+    metrics: PipelineMetrics | None = None,
+    engine: str = "c",
+    category_rules: CategoryRules | None = None,
+    counterparty_file: str | None = None,
+) -> tuple[str, int]:
+    """
+    Conversion incrémentale : seules les transactions absentes du registre
+    (`ledger_path`) passent par les étapes 5 à 8, puis sont ajoutées au CSV
+    courant du compte (`<compte>_historique.csv` par défaut).
+    Retourne (chemin de la sortie, nombre de nouvelles lignes).
+    """
+    account_part, _, _, _ = parse_filename(input_file)
+    account = get_nom_compte(account_part)
+    if not output_file:
+        output_file = os.path.join(output_dir or "", f"{account}_historique.csv")
+
+    df = run_step(metrics, read_input_csv, input_file, encoding, delimiter, engine)
+    df = PREPARE_PIPELINE.run(df, metrics)
+
+    with TransactionLedger(ledger_path) as ledger:
+        fingerprints = compute_fingerprints(df, account_part)
+        unseen = ledger.unseen_mask(fingerprints)
+        df = df[unseen.to_numpy()]
+        if df.empty:
+            print(f"Aucune nouvelle transaction pour {account} ({input_file}).")
+            return output_file, 0
+
+        df = NEW_ROWS_PIPELINE.run(df, metrics)
+        if counterparty_file:
+            counterparties = CounterpartyIndex(counterparty_file)
+            df = run_step(metrics, canonicalize_counterparties, df, counterparties)
+        if category_index is not None:
+            df = run_step(
+                metrics,
+                step8_fill_categorie,
+                df,
+                category_index=category_index,
+                category_rules=category_rules,
+            )
+
+        sink = CsvChunkSink(output_file, append=True)
+        sink.write(prepare_export(df))
+        # Enregistré seulement une fois les lignes écrites
+        ledger.record(fingerprints[unseen], account_part)
+
+    print(f"{len(df)} nouvelle(s) transaction(s) ajoutée(s) à {output_file}")
+    return output_file, len(df)
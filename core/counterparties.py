@@ -0,0 +1,284 @@
+# counterparties.py
+
+import os
+import re
+import sqlite3
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from difflib import SequenceMatcher
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from .config import DEFAULT_COUNTERPARTY_FILE
+from .text import normalize_text
+
+# Formes juridiques ignorées pour comparer les noms (DELHAIZE SA = DELHAIZE)
+LEGAL_FORMS = frozenset(
+    {
+        "ASBL",
+        "BV",
+        "BVBA",
+        "CV",
+        "CVBA",
+        "GMBH",
+        "LTD",
+        "NV",
+        "SA",
+        "SAS",
+        "SC",
+        "SCRL",
+        "SCS",
+        "SNC",
+        "SPRL",
+        "SRL",
+        "VZW",
+    }
+)
+# Un mot qui termine des noms de terminaux d'au moins autant de commerçants
+# différents est un lieu (DELHAIZE MONS 1234, COLRUYT MONS 5678…)
+LOCATION_MIN_MERCHANTS = 3
+# Ressemblance minimale (difflib) de deux noms pour les regrouper
+SIMILARITY_THRESHOLD = 0.9
+# Un trigramme partagé par plus de noms canoniques ne sert pas au blocage :
+# trop peu discriminant, il rendrait la recherche quadratique
+MAX_BLOCK_SIZE = 200
+# Nombre de candidats vérifiés par nom dans l'index des trigrammes
+MAX_CANDIDATES = 5
+
+_WORD = re.compile(r"[A-Z0-9&']+")
+# Point après une lettre isolée : S.A. -> SA, N.V. -> NV
+_INITIAL_DOT = re.compile(r"\b([A-Z])\.")
+
+
+class CounterpartyKey(NamedTuple):
+    """
+    Forme comparable d'un nom de contrepartie : mots normalisés, sans
+    identifiants (terminal, fin de numéro de carte : mots avec chiffres) ni
+    forme juridique. `has_id` : le nom contenait un identifiant (nom de
+    terminal de paiement).
+    """
+
+    words: tuple[str, ...]
+    has_id: bool
+
+
+def counterparty_key(name: str) -> CounterpartyKey:
+    words, has_id = [], False
+    text = _INITIAL_DOT.sub(r"\1", normalize_text(name))
+    for token in _WORD.findall(text):
+        if any(character.isdigit() for character in token):
+            has_id = True
+        elif token not in LEGAL_FORMS:
+            words.append(token)
+    return CounterpartyKey(tuple(words), has_id)
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _is_placeholder(name: str) -> bool:
+    # Valeurs fixes de l'étape 6, ex. '(Non géré)', et noms vides
+    return not name.strip() or name.startswith("(")
+
+
+class CounterpartyIndex:
+    """
+    Table de correspondance {contrepartie: nom canonique}, persistée dans
+    une base SQLite et complétée à chaque conversion : seuls les noms jamais
+    vus sont résolus.
+
+    Un nouveau nom est rapproché d'un nom canonique existant, dans l'ordre :
+    1. mêmes mots (sans identifiants, forme juridique, ni lieu pour un nom
+       de terminal) : 'DELHAIZE BRUXELLES 3279' -> 'DELHAIZE SA' ;
+    2. pour un nom de terminal, nom canonique formé de ses premiers mots ;
+    3. pour un nom de terminal, orthographe proche (noms tronqués…) :
+       candidats trouvés par un index de trigrammes (blocage, sans comparer
+       toutes les paires), vérifiés avec difflib.
+    Les autres noms (virements) ne sont regroupés que s'ils ont les mêmes
+    mots : DUPONT JEAN et DUPONT JEANNE restent distincts.
+    Un nom sans correspondance devient lui-même un nom canonique. Le coût
+    est proportionnel au nombre de nouveaux noms.
+    """
+
+    def __init__(self, path: str | None = DEFAULT_COUNTERPARTY_FILE):
+        self.path = path
+        self.mapping: dict[str, str] = {}
+        # Mots d'un nom canonique -> nom canonique
+        self.canonical: dict[tuple[str, ...], str] = {}
+        self._by_trigram: dict[str, set[tuple[str, ...]]] = defaultdict(set)
+        # Mot final d'un nom de terminal -> premiers mots des noms qu'il termine
+        self._location_merchants: dict[str, set[str]] = defaultdict(set)
+        self._new: dict[str, tuple[str, CounterpartyKey]] = {}
+        if path and os.path.exists(path):
+            # Les mots de chaque nom sont enregistrés avec lui : le chargement
+            # ne renormalise pas toute la table
+            with sqlite3.connect(path) as connection:
+                rows = connection.execute(
+                    "SELECT name, canonical, words, has_id FROM counterparties"
+                ).fetchall()
+            connection.close()
+            for name, canonical, words, has_id in rows:
+                self.mapping[name] = canonical
+                self._learn_location(CounterpartyKey(tuple(words.split()), has_id))
+            for canonical in set(self.mapping.values()):
+                self._add_canonical(canonical)
+
+    def __len__(self) -> int:
+        return len(self.mapping)
+
+    def _learn_location(self, key: CounterpartyKey) -> None:
+        if key.has_id and len(key.words) > 1:
+            self._location_merchants[key.words[-1]].add(key.words[0])
+
+    def _add_canonical(self, canonical: str) -> None:
+        words = counterparty_key(canonical).words
+        if words and words not in self.canonical:
+            self.canonical[words] = canonical
+            for trigram in _trigrams(" ".join(words)):
+                self._by_trigram[trigram].add(words)
+
+    def _words(self, key: CounterpartyKey) -> tuple[str, ...]:
+        """
+        Mots comparés : pour un nom de terminal, sans les lieux en fin de nom.
+        """
+        words = key.words
+        while (
+            key.has_id
+            and len(words) > 1
+            and len(self._location_merchants.get(words[-1], ()))
+            >= LOCATION_MIN_MERCHANTS
+        ):
+            words = words[:-1]
+        return words
+
+    def _find(self, key: CounterpartyKey) -> str | None:
+        words = self._words(key)
+        canonical = self.canonical.get(words)
+        if canonical is not None:
+            return canonical
+        if not key.has_id:
+            return None
+        for end in range(len(words) - 1, 0, -1):
+            canonical = self.canonical.get(words[:end])
+            if canonical is not None:
+                return canonical
+        return self._find_similar(words)
+
+    def _find_similar(self, words: tuple[str, ...]) -> str | None:
+        text = " ".join(words)
+        trigrams = _trigrams(text)
+        shared: Counter = Counter()
+        for trigram in trigrams:
+            block = self._by_trigram.get(trigram)
+            if block and len(block) <= MAX_BLOCK_SIZE:
+                shared.update(block)
+        for candidate, count in shared.most_common(MAX_CANDIDATES):
+            if 2 * count < len(trigrams):
+                break
+            ratio = SequenceMatcher(None, text, " ".join(candidate)).ratio()
+            if ratio >= SIMILARITY_THRESHOLD:
+                return self.canonical[candidate]
+        return None
+
+    def resolve(self, names: Iterable) -> dict[str, str]:
+        """
+        Ajoute les noms jamais vus à la table. Retourne {nouveau nom: nom
+        canonique}. Les valeurs fixes de l'étape 6 ('(Non géré)'…) sont
+        laissées telles quelles.
+        """
+        keys = {}
+        for name in names:
+            if (
+                isinstance(name, str)
+                and name not in self.mapping
+                and not _is_placeholder(name)
+            ):
+                keys[name] = counterparty_key(name)
+        # Lieux appris sur tous les noms avant de comparer : le résultat ne
+        # dépend pas de l'ordre des lignes
+        for key in keys.values():
+            self._learn_location(key)
+        # Les noms courts d'abord (ils deviennent les noms canoniques), et
+        # à longueur égale, les noms qui ne sont pas des terminaux
+        pending = sorted(
+            keys.items(),
+            key=lambda item: (len(self._words(item[1])), item[1].has_id, item[0]),
+        )
+
+        resolved = {}
+        for name, key in pending:
+            canonical = self._find(key)
+            if canonical is None:
+                words = self._words(key)
+                if not words:
+                    continue
+                canonical = " ".join(words) if key.has_id else name
+                self._add_canonical(canonical)
+            resolved[name] = canonical
+            self.mapping[name] = canonical
+            self._new[name] = (canonical, key)
+        return resolved
+
+    def canonicalize(self, values: pd.Series) -> pd.Series:
+        """
+        Remplace chaque contrepartie par son nom canonique (résolu une fois
+        par valeur distincte). Retourne une colonne `category`.
+        """
+        codes, uniques = pd.factorize(values.astype(object))
+        uniques = uniques.tolist()
+        self.resolve(uniques)
+        canonical = np.array(
+            [self.mapping.get(name, name) for name in uniques] + [None], dtype=object
+        )
+        return pd.Series(canonical[codes], index=values.index).astype("category")
+
+    def save(self) -> int:
+        """
+        Enregistre les correspondances ajoutées depuis le chargement.
+        Retourne leur nombre.
+        """
+        if not self.path or not self._new:
+            return 0
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Attente du verrou : plusieurs conversions d'un lot écrivent ici
+        with sqlite3.connect(self.path, timeout=30) as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS counterparties ("
+                " name TEXT PRIMARY KEY,"
+                " canonical TEXT NOT NULL,"
+                " words TEXT NOT NULL,"
+                " has_id INTEGER NOT NULL)"
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO counterparties"
+                " (name, canonical, words, has_id) VALUES (?, ?, ?, ?)",
+                (
+                    (name, canonical, " ".join(key.words), key.has_id)
+                    for name, (canonical, key) in self._new.items()
+                ),
+            )
+        connection.close()
+        saved = len(self._new)
+        self._new = {}
+        return saved
+
+
+def canonicalize_counterparties(
+    df: pd.DataFrame, counterparties: CounterpartyIndex
+) -> pd.DataFrame:
+    """
+    Étape 6b : remplace 'Contrepartie' par le nom canonique (voir
+    CounterpartyIndex) et enregistre les nouvelles correspondances. À faire
+    avant l'étape 8, pour que les règles de catégories voient un seul nom
+    par commerçant.
+    """
+    if "Contrepartie" in df.columns:
+        df["Contrepartie"] = counterparties.canonicalize(df["Contrepartie"])
+        counterparties.save()
+    return df
@@ -0,0 +1,44 @@
+# dedup.py
+
+import numpy as np
+import pandas as pd
+
+from .config import DUPLICATE_POLICIES
+from .steps import _as_text
+
+# Valeur de 'Remarque' des doublons avec la politique "flag"
+DUPLICATE_REMARK = "Doublon"
+
+
+def apply_duplicate_policy(
+    df: pd.DataFrame, keys: pd.Series, policy: str
+) -> tuple[pd.DataFrame, int]:
+    """
+    Repère les lignes dont la clé (ledger.compute_fingerprints, alignée sur
+    `df`) a déjà été vue plus haut ; la première occurrence est gardée. Deux
+    transactions identiques d'un même export gardent des clés différentes
+    (rang de l'occurrence) : seule la même transaction vue dans deux exports
+    qui se chevauchent est un doublon. Selon
+    `policy` (config.DUPLICATE_POLICIES) : "drop" les supprime, "flag" les
+    garde avec 'Doublon' dans 'Remarque', "report" ne fait que les compter.
+    Retourne (DataFrame, nombre de doublons).
+    """
+    if policy not in DUPLICATE_POLICIES:
+        raise ValueError(
+            f"Politique de doublons inconnue: {policy} "
+            f"(attendu: {', '.join(DUPLICATE_POLICIES)})"
+        )
+    duplicated = keys.duplicated().to_numpy()
+    count = int(duplicated.sum())
+    if not count or policy == "report":
+        return df, count
+    if policy == "drop":
+        return df[~duplicated], count
+
+    if "Remarque" in df.columns:
+        remarks = _as_text(df["Remarque"]).to_numpy(copy=True)
+    else:
+        remarks = np.full(len(df), "", dtype=object)
+    remarks[duplicated] = DUPLICATE_REMARK
+    df["Remarque"] = pd.Categorical(remarks)
+    return df, count
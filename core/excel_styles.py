@@ -1,5 +1,62 @@
-from openpyxl import load_workbook
-from openpyxl.styles import NamedStyle
+# openpyxl n'est importé que par apply_styles (restylage de fichiers existants)
+
+DATE_FORMAT = "DD-MM-YY"
+MONTANT_FORMAT = "#,##0.00 €;[RED]- #,##0.00 €"
+
+# Largeur (en caractères) des colonnes de la feuille exportée
+COLUMN_WIDTHS = {
+    "Compte": 18,
+    "N°extrait": 10,
+    "Date": 10,
+    "Type d’opération": 30,
+    "Contrepartie": 35,
+    "Objet de l’opération": 40,
+    "Catégorie": 25,
+    "Projet": 15,
+    "Montant": 14,
+    "Couvert par le subside": 12,
+    "Pièce n°": 10,
+    "Lien document": 25,
+    "Remarque": 30,
+    "Règle catégorie": 60,
+}
+
+
+def build_column_formats(workbook) -> dict:
+    """
+    Crée une fois les formats date et montant d'un classeur xlsxwriter, à
+    partager entre ses feuilles.
+    """
+    return {
+        "Date": workbook.add_format({"num_format": DATE_FORMAT}),
+        "Montant": workbook.add_format({"num_format": MONTANT_FORMAT}),
+    }
+
+
+def apply_column_formats(workbook, worksheet, columns, formats=None) -> None:
+    """
+    Applique largeurs et formats de colonnes sur une feuille xlsxwriter
+    pendant l'écriture (aucune relecture du fichier n'est nécessaire).
+
+    Args:
+        workbook: Le classeur xlsxwriter en cours d'écriture.
+        worksheet: La feuille xlsxwriter à formater.
+        columns: Les noms de colonnes dans l'ordre de la feuille.
+        formats: Formats de `build_column_formats` (créés si absents).
+    """
+    if formats is None:
+        formats = build_column_formats(workbook)
+    date_format = formats["Date"]
+    montant_format = formats["Montant"]
+
+    for position, column in enumerate(columns):
+        width = COLUMN_WIDTHS.get(column)
+        if column == "Date":
+            worksheet.set_column(position, position, width, date_format)
+        elif column == "Montant":
+            worksheet.set_column(position, position, width, montant_format)
+        elif width:
+            worksheet.set_column(position, position, width)
 
 
 def _has_named_style(workbook, style_name: str) -> bool:
@@ -9,29 +66,34 @@ def _has_named_style(workbook, style_name: str) -> bool:
     return False
 
 
-def _ensure_named_style(workbook, style: NamedStyle) -> None:
+def _ensure_named_style(workbook, style) -> None:
     if not _has_named_style(workbook, style.name):
         workbook.add_named_style(style)
 
 
 def apply_styles(file_name: str, date_column: int, montant_column: int):
     """
-    Applique les styles aux colonnes spécifiées dans un fichier Excel.
+    Applique les styles aux colonnes spécifiées dans un fichier Excel existant.
+    Les exports de `step9_export_excel` sont déjà formatés à l'écriture ; cette
+    fonction sert à restyler un fichier produit autrement.
 
     Args:
         file_name (str): Le chemin du fichier Excel à modifier.
         date_column (int): Index (1-based) de la colonne contenant les dates.
         montant_column (int): Index (1-based) de la colonne contenant les montants.
     """
+    from openpyxl import load_workbook
+    from openpyxl.styles import NamedStyle
+
     # Charger le fichier Excel existant
     wb = load_workbook(file_name)
     ws = wb.active
 
     # Définir les styles
-    date_style = NamedStyle(name="date_style", number_format="DD-MM-YY")
+    date_style = NamedStyle(name="date_style", number_format=DATE_FORMAT)
     montant_style = NamedStyle(
         name="montant_style",
-        number_format="#,##0.00 €;[RED]- #,##0.00 €",
+        number_format=MONTANT_FORMAT,
     )
     _ensure_named_style(wb, date_style)
     _ensure_named_style(wb, montant_style)
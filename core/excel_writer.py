@@ -0,0 +1,131 @@
+# excel_writer.py
+
+import pandas as pd
+
+from .excel_styles import apply_column_formats, build_column_formats
+
+# Origine des numéros de série des dates Excel (système 1900)
+EXCEL_EPOCH = pd.Timestamp("1899-12-30")
+
+# Nombre maximal de lignes d'une feuille Excel (en-tête compris)
+EXCEL_MAX_ROWS = 1_048_576
+
+# Nature des colonnes converties par `excel_column`
+NUMBER, TEXT, BOOLEAN = "number", "text", "boolean"
+
+
+def excel_column(values: pd.Series) -> tuple[str, list]:
+    """
+    Convertit une colonne en une liste de valeurs natives pour xlsxwriter,
+    en une opération vectorisée (pas de formatage cellule par cellule) :
+    - dates : numéro de série Excel (float), le format vient de la colonne ;
+    - nombres : float / int ;
+    - booléens ;
+    - le reste : texte.
+    Les valeurs manquantes et les textes vides deviennent None (cellule vide).
+    Retourne (nature, valeurs).
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        serials = (values - EXCEL_EPOCH) / pd.Timedelta(days=1)
+        return NUMBER, serials.astype(object).where(serials.notna(), None).tolist()
+    if pd.api.types.is_bool_dtype(values):
+        return BOOLEAN, values.astype(object).where(values.notna(), None).tolist()
+    if pd.api.types.is_numeric_dtype(values):
+        return NUMBER, values.astype(object).where(values.notna(), None).tolist()
+    texts = values.astype(object)
+    texts = texts.where(texts.notna() & (texts != ""), None)
+    return TEXT, [None if text is None else str(text) for text in texts.tolist()]
+
+
+class StreamingExcelWriter:
+    """
+    Écrit un classeur xlsx en mode `constant_memory` de xlsxwriter : chaque
+    ligne est vidée sur disque dès qu'elle est écrite, la mémoire ne dépend
+    donc pas du nombre de lignes. Les largeurs et formats (date, montant)
+    sont posés sur les colonnes au départ ; les cellules reçoivent des
+    valeurs natives (voir `excel_column`).
+    Les lignes d'une feuille doivent être écrites dans l'ordre, feuille
+    après feuille.
+    """
+
+    def __init__(self, path: str):
+        import xlsxwriter
+
+        self.path = path
+        self.workbook = xlsxwriter.Workbook(
+            path, {"constant_memory": True, "nan_inf_to_errors": True}
+        )
+        self.formats = build_column_formats(self.workbook)
+        self.worksheet = None
+        self.next_row = 0
+
+    def __enter__(self) -> "StreamingExcelWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def add_sheet(self, sheet_name: str, columns) -> None:
+        """
+        Commence une feuille : formats des colonnes et ligne d'en-tête.
+        """
+        columns = [str(column) for column in columns]
+        self.worksheet = self.workbook.add_worksheet(sheet_name)
+        apply_column_formats(self.workbook, self.worksheet, columns, self.formats)
+        self.worksheet.write_row(0, 0, columns)
+        self.next_row = 1
+
+    def rename_sheet(self, sheet_name: str) -> None:
+        """
+        Renomme la feuille courante avant `close` : xlsxwriter n'écrit le nom
+        des feuilles (workbook.xml) qu'à la fermeture. Les filtres et zones
+        d'impression retiennent le nom au moment où ils sont posés : ce
+        classeur n'en pose pas.
+        """
+        self.worksheet.name = sheet_name
+
+    def write_columns(self, columns: list[tuple[str, list]]) -> None:
+        """
+        Ajoute des lignes à la feuille courante à partir de colonnes déjà
+        converties par `excel_column` (listes de même longueur). Lève
+        ValueError, sans rien écrire, si la feuille dépasserait
+        EXCEL_MAX_ROWS lignes.
+        """
+        worksheet = self.worksheet
+        writers = {
+            NUMBER: worksheet.write_number,
+            TEXT: worksheet.write_string,
+            BOOLEAN: worksheet.write_boolean,
+        }
+        length = len(columns[0][1]) if columns else 0
+        if self.next_row + length > EXCEL_MAX_ROWS:
+            # xlsxwriter ignorerait les lignes en trop sans erreur
+            rows = self.next_row - 1 + length
+            raise ValueError(
+                f"Trop de lignes pour une feuille Excel : {rows} (maximum "
+                f"{EXCEL_MAX_ROWS - 1}). Utilisez --format csv, parquet ou sqlite."
+            )
+        # Une écriture typée par cellule : write_row passerait chaque valeur
+        # par write(), qui redevine le type déjà fixé par `excel_column` (et
+        # testerait formules et URL sur chaque texte). Mesuré sur 100 000
+        # lignes de 14 colonnes : write_row est ~12 % plus lent ; l'essentiel
+        # du temps est la sérialisation XML des cellules par xlsxwriter.
+        writes = [writers[kind] for kind, _ in columns]
+        positions = range(len(columns))
+        row = self.next_row
+        for values in zip(*(values for _, values in columns)):
+            for position, write, value in zip(positions, writes, values):
+                if value is not None:
+                    write(row, position, value)
+            row += 1
+        self.next_row = row
+
+    def write_frame(self, df: pd.DataFrame) -> None:
+        """
+        Ajoute les lignes de `df` (un bloc ou tout l'export) à la feuille
+        courante.
+        """
+        self.write_columns([excel_column(df[column]) for column in df.columns])
+
+    def close(self) -> None:
+        self.workbook.close()
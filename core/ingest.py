@@ -0,0 +1,130 @@
+# ingest.py
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import pandas as pd
+
+from .schema import (
+    INPUT_DATE_FORMAT,
+    INPUT_DTYPES,
+    check_csv_header,
+    input_read_plan,
+)
+
+CSV_ENGINES = ("c", "pyarrow")
+
+
+def _read_options(
+    input_file: str, encoding: str, delimiter: str
+) -> tuple[dict, str, str]:
+    """
+    Options de pd.read_csv dérivées de l'en-tête et du schéma CBC : seules
+    les colonnes utilisées sont lues, avec les types de INPUT_DTYPES ; la
+    date et le montant sont convertis par le lecteur.
+    Retourne (options, colonne date, colonne montant).
+    """
+    header = check_csv_header(input_file, encoding, delimiter)
+    usecols, date_column, amount_column = input_read_plan(header)
+    options = {
+        "sep": delimiter,
+        "encoding": encoding,
+        "usecols": usecols,
+        "dtype": {
+            column: INPUT_DTYPES[column] for column in usecols if column in INPUT_DTYPES
+        },
+        "decimal": ",",
+        "parse_dates": [date_column],
+        "date_format": INPUT_DATE_FORMAT,
+    }
+    return options, date_column, amount_column
+
+
+def coerce_input_types(
+    df: pd.DataFrame, date_column: str = "Valeur", amount_column: str = "Montant"
+) -> pd.DataFrame:
+    """
+    Repli pour les exports inattendus : si le lecteur n'a pas pu typer la
+    date ou le montant (autre format, espaces insécables…), conversion
+    tolérante comme avant (valeurs invalides -> NaT / NaN).
+    """
+    if date_column in df.columns and not pd.api.types.is_datetime64_any_dtype(
+        df[date_column]
+    ):
+        df[date_column] = pd.to_datetime(
+            df[date_column], dayfirst=True, errors="coerce"
+        )
+    if amount_column in df.columns and not pd.api.types.is_numeric_dtype(
+        df[amount_column]
+    ):
+        amounts = (
+            df[amount_column]
+            .astype(str)  # au cas où ce serait déjà un float
+            .str.replace(",", ".", regex=False)  # remplacer virgule par un point
+            .str.replace("\u00a0", "", regex=True)  # enlever espaces insécables
+        )
+        df[amount_column] = pd.to_numeric(amounts, errors="coerce")
+    return df
+
+
+@contextmanager
+def _read_errors(input_file: str, encoding: str):
+    """
+    Messages d'erreur homogènes pour la lecture complète et par blocs.
+    """
+    try:
+        yield
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Le fichier '{input_file}' est introuvable.")
+    except UnicodeDecodeError as exc:
+        raise UnicodeDecodeError(
+            exc.encoding,
+            exc.object,
+            exc.start,
+            exc.end,
+            f"Impossible de lire '{input_file}' avec l'encodage '{encoding}'.",
+        ) from exc
+
+
+def read_input_csv(
+    input_file: str, encoding: str, delimiter: str, engine: str = "c"
+) -> pd.DataFrame:
+    """
+    Lit l'export CBC avec les types déclarés. Avec `engine="pyarrow"`, le
+    lecteur pyarrow est essayé d'abord ; s'il est absent ou échoue, quelle
+    que soit l'erreur (import, analyse, conversion de type), la lecture
+    repasse par le moteur C, dont l'erreur éventuelle est celle signalée.
+    """
+    if engine not in CSV_ENGINES:
+        raise ValueError(
+            f"Moteur CSV inconnu: {engine} (attendu: {', '.join(CSV_ENGINES)})"
+        )
+    with _read_errors(input_file, encoding):
+        options, date_column, amount_column = _read_options(
+            input_file, encoding, delimiter
+        )
+        df = None
+        if engine == "pyarrow":
+            try:
+                df = pd.read_csv(input_file, engine="pyarrow", **options)
+            except Exception:
+                df = None
+        if df is None:
+            df = pd.read_csv(input_file, **options)
+    return coerce_input_types(df, date_column, amount_column)
+
+
+def iter_input_chunks(
+    input_file: str, encoding: str, delimiter: str, chunksize: int
+) -> Iterator[pd.DataFrame]:
+    """
+    Lit le CSV d'entrée par blocs de `chunksize` lignes (moteur C, mêmes
+    types que `read_input_csv`).
+    """
+    with _read_errors(input_file, encoding):
+        options, date_column, amount_column = _read_options(
+            input_file, encoding, delimiter
+        )
+        with pd.read_csv(input_file, chunksize=chunksize, **options) as reader:
+            for df in reader:
+                yield coerce_input_types(df, date_column, amount_column)
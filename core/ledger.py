@@ -0,0 +1,135 @@
+# ledger.py
+
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from .config import DEFAULT_LEDGER_FILE
+from .steps import _normalized_descriptions
+
+# Deux clés de hachage : deux empreintes 64 bits indépendantes forment une
+# empreinte de 128 bits (32 caractères hexadécimaux)
+_HASH_KEYS = ("cbc_to_excel_fp1", "cbc_to_excel_fp2")
+_HEX_BYTES = np.array([f"{value:02x}" for value in range(256)])
+
+
+def _hex_digests(hashes: list[np.ndarray], index: pd.Index) -> pd.Series:
+    """
+    Empreintes uint64 mises bout à bout, en hexadécimal, sans boucle Python
+    par ligne.
+    """
+    digest = np.column_stack([values.astype(">u8") for values in hashes])
+    digits = _HEX_BYTES[digest.view(np.uint8).reshape(len(index), -1)]
+    width = 2 * digest.shape[1] * digest.itemsize
+    return pd.Series(
+        np.ascontiguousarray(digits).view(f"<U{width}").ravel().astype(object),
+        index=index,
+    )
+
+
+def compute_fingerprints(df: pd.DataFrame, account: str) -> pd.Series:
+    """
+    Empreinte stable de chaque transaction (après l'étape 3) :
+    compte, N°extrait, date valeur, montant et description normalisée
+    (steps.normalize_descriptions), plus le rang de l'occurrence pour garder
+    deux transactions identiques d'un même export. C'est la seule clé de
+    transaction : registre (--incremental), historique (--store) et
+    doublons (--duplicates) l'utilisent tous.
+    Les colonnes sont hachées telles quelles (pd.util.hash_pandas_object),
+    sans construire de chaîne par ligne ; un N°extrait vide ou lu en
+    flottant (12.0) est traité comme un entier manquant ou 12.
+    """
+    parts = {
+        # Une seule catégorie : le compte n'est haché qu'une fois
+        "account": pd.Series(account, index=df.index, dtype="category"),
+        "description": _normalized_descriptions(df),
+        "montant": pd.to_numeric(df["Montant"], errors="coerce")
+        .mul(100)
+        .round()
+        .astype("Int64"),
+    }
+    if "N°extrait" in df.columns:
+        parts["extrait"] = pd.to_numeric(df["N°extrait"], errors="coerce").astype(
+            "Int64"
+        )
+    if "Date" in df.columns:
+        parts["date"] = df["Date"]
+    parts = pd.DataFrame(parts)
+
+    hashes = []
+    for hash_key in _HASH_KEYS:
+        key = pd.util.hash_pandas_object(parts, index=False, hash_key=hash_key)
+        if not hashes:
+            occurrence = key.groupby(key, sort=False).cumcount()
+        keyed = pd.DataFrame({"key": key, "occurrence": occurrence})
+        hashes.append(
+            pd.util.hash_pandas_object(keyed, index=False, hash_key=hash_key).to_numpy()
+        )
+    return _hex_digests(hashes, df.index)
+
+
+class TransactionLedger:
+    """
+    Registre local (SQLite) des transactions déjà converties, par compte.
+    """
+
+    def __init__(self, path: str = DEFAULT_LEDGER_FILE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS transactions ("
+            " fingerprint TEXT PRIMARY KEY,"
+            " account TEXT NOT NULL,"
+            " recorded_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def unseen_mask(self, fingerprints: pd.Series) -> pd.Series:
+        """
+        Masque des transactions absentes du registre. Le coût dépend du
+        nombre de lignes de l'export, pas de la taille de l'historique.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS candidates (fingerprint TEXT)")
+        cursor.execute("DELETE FROM candidates")
+        cursor.executemany(
+            "INSERT INTO candidates VALUES (?)",
+            ((fingerprint,) for fingerprint in fingerprints),
+        )
+        seen = {
+            row[0]
+            for row in cursor.execute(
+                "SELECT c.fingerprint FROM candidates c"
+                " JOIN transactions t ON t.fingerprint = c.fingerprint"
+            )
+        }
+        cursor.execute("DELETE FROM candidates")
+        return ~fingerprints.isin(seen)
+
+    def record(self, fingerprints: pd.Series, account: str) -> None:
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO transactions (fingerprint, account) VALUES (?, ?)",
+                ((fingerprint, account) for fingerprint in fingerprints),
+            )
+
+    def count(self, account: str | None = None) -> int:
+        if account is None:
+            query, params = "SELECT COUNT(*) FROM transactions", ()
+        else:
+            query = "SELECT COUNT(*) FROM transactions WHERE account = ?"
+            params = (account,)
+        return self.connection.execute(query, params).fetchone()[0]
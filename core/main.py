@@ -1,49 +1,80 @@
 import argparse
-from pathlib import Path
-
-import pandas as pd
-
-from .config import DEFAULT_CATEGORY_FILE, DEFAULT_ENCODING, DELIMITER
-from .steps import (
-    step1_clean_columns,
-    step2_create_new_columns,
-    step3_rename_columns,
-    step4_reorder_columns,
-    step5_find_operation_type,
-    step6_fill_contrepartie_ET_objFact,
-    step7_drop_description,
-    step8_fill_categorie,
-    step9_export_excel,
-    validate_schema,
+import os
+import sys
+
+from .categories import load_category_index
+from .config import (
+    DEFAULT_CACHE_DIR,
+    DEFAULT_CATEGORY_FILE,
+    DEFAULT_COUNTERPARTY_FILE,
+    DEFAULT_ENCODING,
+    DEFAULT_LEDGER_FILE,
+    DEFAULT_RULES_FILE,
+    DEFAULT_STORE_FILE,
+    DELIMITER,
+    DUPLICATE_POLICIES,
+    OUTPUT_FORMATS,
+    SHARD_MIN_ROWS,
 )
+from .rules import load_category_rules
+from .schema import check_csv_header
+
+# pandas, openpyxl et xlsxwriter ne sont importés qu'au moment de convertir :
+# --help, les erreurs d'arguments et de schéma restent instantanés.
 
 
-def read_input_csv(input_file: str, encoding: str, delimiter: str) -> pd.DataFrame:
-    try:
-        df = pd.read_csv(input_file, sep=delimiter, encoding=encoding)
-    except FileNotFoundError:
-        raise FileNotFoundError(f"Le fichier '{input_file}' est introuvable.")
-    except UnicodeDecodeError as exc:
-        raise UnicodeDecodeError(
-            exc.encoding,
-            exc.object,
-            exc.start,
-            exc.end,
-            f"Impossible de lire '{input_file}' avec l'encodage '{encoding}'.",
-        ) from exc
+def __getattr__(name):
+    # Rétrocompatibilité : read_input_csv est désormais dans core.ingest
+    if name == "read_input_csv":
+        from .ingest import read_input_csv
 
-    return df
+        return read_input_csv
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
-        description="Convertit un relevé CBC en fichier Excel."
+        description="Convertit un relevé CBC en fichier Excel.",
+        epilog=(
+            "Sous-commandes : cbc-to-excel watch --help (surveillance d'un "
+            "dossier), cbc-to-excel serve --help (service HTTP local), "
+            "cbc-to-excel query --help (recherche dans l'historique)."
+        ),
     )
-    parser.add_argument(
+    inputs = parser.add_mutually_exclusive_group(required=True)
+    inputs.add_argument(
         "--input",
-        required=True,
         help="Chemin vers le fichier CSV d'entrée.",
     )
+    inputs.add_argument(
+        "--input-dir",
+        help="Dossier d'exports CSV à convertir en lot.",
+    )
+    parser.add_argument(
+        "--glob",
+        default="*.csv",
+        help="Motif des fichiers à convertir avec --input-dir (défaut: *.csv).",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Nombre de conversions en parallèle avec --input-dir (défaut: nb CPU).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help=(
+            "Répartit les étapes 4b à 8 d'un gros export (--input) sur N "
+            f"processus, par morceaux d'au moins {SHARD_MIN_ROWS} lignes "
+            "(défaut: 1)."
+        ),
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="Dossier de sortie des fichiers générés (défaut: dossier courant).",
+    )
     parser.add_argument(
         "--encoding",
         default=DEFAULT_ENCODING,
@@ -54,6 +85,15 @@ def parse_args() -> argparse.Namespace:
         default=DELIMITER,
         help=f"Délimiteur du CSV (défaut: {DELIMITER}).",
     )
+    parser.add_argument(
+        "--csv-engine",
+        choices=("c", "pyarrow"),
+        default="c",
+        help=(
+            "Lecteur CSV de pandas ; pyarrow est plus rapide sur les gros "
+            "exports (repli sur c si indisponible). Défaut: c."
+        ),
+    )
     parser.add_argument(
         "--categories",
         default=DEFAULT_CATEGORY_FILE,
@@ -62,11 +102,51 @@ def parse_args() -> argparse.Namespace:
             f"(défaut: {DEFAULT_CATEGORY_FILE})."
         ),
     )
+    parser.add_argument(
+        "--category-rules",
+        help=(
+            "Règles de catégorie par mot-clé/regex sur la contrepartie et l'objet "
+            f"(défaut: {DEFAULT_RULES_FILE} s'il existe)."
+        ),
+    )
+    parser.add_argument(
+        "--counterparties",
+        nargs="?",
+        const=DEFAULT_COUNTERPARTY_FILE,
+        help=(
+            "Remplace chaque contrepartie par un nom canonique (sans terminal, "
+            "lieu ni fin de carte), avec une table enregistrée et complétée à "
+            f"chaque conversion (défaut: {DEFAULT_COUNTERPARTY_FILE})."
+        ),
+    )
+    parser.add_argument(
+        "--explain-categories",
+        action="store_true",
+        help="Ajoute la colonne 'Règle catégorie' (origine de chaque catégorie).",
+    )
     parser.add_argument(
         "--no-categories",
         action="store_true",
         help="Désactive l'association automatique des catégories.",
     )
+    parser.add_argument(
+        "--consolidate",
+        action="store_true",
+        help=(
+            "Avec --input-dir : un seul classeur, une feuille par compte et une "
+            "feuille « Tous les comptes »."
+        ),
+    )
+    parser.add_argument(
+        "--duplicates",
+        choices=DUPLICATE_POLICIES,
+        help=(
+            "Avec --consolidate : transactions présentes dans plusieurs exports "
+            "d'un même compte (N°extrait, date, montant, description) ; drop "
+            "les supprime, flag les marque 'Doublon' dans Remarque, report ne "
+            "fait que les compter."
+        ),
+    )
     parser.add_argument(
         "--output",
         help=(
@@ -74,38 +154,333 @@ def parse_args() -> argparse.Namespace:
             "(par défaut: généré depuis le nom du CSV)."
         ),
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        help=(
+            "Traite le CSV par blocs de N lignes avec une mémoire constante "
+            "(une sortie en .csv est écrite en CSV, sinon en Excel)."
+        ),
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=(
+            "Ne convertit que les transactions absentes du registre et les "
+            "ajoute au CSV courant du compte (<compte>_historique.csv)."
+        ),
+    )
+    parser.add_argument(
+        "--ledger",
+        default=DEFAULT_LEDGER_FILE,
+        help=f"Registre des transactions déjà converties (défaut: {DEFAULT_LEDGER_FILE}).",
+    )
+    parser.add_argument(
+        "--store",
+        nargs="?",
+        const=DEFAULT_STORE_FILE,
+        help=(
+            "Ajoute les transactions converties à l'historique SQLite, sans "
+            f"doublons (défaut: {DEFAULT_STORE_FILE}) ; à interroger avec "
+            "cbc-to-excel query."
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help=(
+            "Met en cache le résultat de l'étape 7 dans ce dossier "
+            f"(défaut avec --recategorize: {DEFAULT_CACHE_DIR})."
+        ),
+    )
+    parser.add_argument(
+        "--recategorize",
+        action="store_true",
+        help=(
+            "Réapplique seulement les catégories (étape 8) et l'export à partir "
+            "du cache ; sans cache, conversion complète qui le remplit."
+        ),
+    )
+    parser.add_argument(
+        "--format",
+        dest="output_formats",
+        nargs="+",
+        choices=OUTPUT_FORMATS,
+        metavar="FORMAT",
+        help=(
+            f"Format(s) de sortie parmi {', '.join(OUTPUT_FORMATS)}, plusieurs "
+            "possibles (défaut: xlsx, ou l'extension de --output). parquet "
+            "nécessite pyarrow ; sqlite crée une table 'transactions' indexée "
+            "sur Date, Catégorie et Compte."
+        ),
+    )
+    parser.add_argument(
+        "--metrics-json",
+        help="Écrit les métriques de chaque étape (temps, lignes, mémoire) en JSON.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=(
+            "Affiche les métriques par étape et enregistre le profil cProfile "
+            "de l'étape la plus lente (<metrics-json>.prof ou cbc-to-excel.prof)."
+        ),
+    )
+    parser.add_argument(
+        "--memory-report",
+        action="store_true",
+        help=(
+            "Affiche le type et la mémoire (memory_usage deep) de chaque colonne "
+            "du DataFrame final."
+        ),
+    )
+    args = parser.parse_args(argv)
+    if args.consolidate and not args.input_dir:
+        parser.error("--consolidate s'utilise avec --input-dir.")
+    if args.duplicates and not args.consolidate:
+        parser.error("--duplicates s'utilise avec --consolidate.")
+    if args.consolidate and (args.chunksize or args.incremental):
+        parser.error(
+            "--consolidate ne peut pas être combiné avec --chunksize ni --incremental."
+        )
+    if args.input_dir and args.output and not args.consolidate:
+        parser.error("--output ne peut pas être utilisé avec --input-dir.")
+    if args.incremental and args.chunksize:
+        parser.error("--incremental ne peut pas être combiné avec --chunksize.")
+    if args.recategorize and (args.input_dir or args.chunksize or args.incremental):
+        parser.error(
+            "--recategorize s'utilise avec --input, sans --chunksize ni --incremental."
+        )
+    if args.output_formats and (args.consolidate or args.incremental):
+        parser.error(
+            "--format ne peut pas être combiné avec --consolidate ni --incremental."
+        )
+    if args.workers < 1:
+        parser.error("--workers doit être supérieur ou égal à 1.")
+    if args.workers > 1 and (
+        args.input_dir or args.chunksize or args.incremental or args.recategorize
+    ):
+        parser.error(
+            "--workers s'utilise avec --input, sans --chunksize, --incremental "
+            "ni --recategorize (voir --jobs pour un dossier)."
+        )
+    if args.counterparties and args.input_dir and not args.consolidate:
+        if args.jobs > 1:
+            parser.error(
+                "--counterparties avec --input-dir nécessite --jobs 1 : les "
+                "conversions en parallèle compléteraient chacune leur table."
+            )
+    if args.store and (
+        args.chunksize or args.incremental or args.recategorize or args.consolidate
+    ):
+        parser.error(
+            "--store ne peut pas être combiné avec --chunksize, --incremental, "
+            "--recategorize ni --consolidate."
+        )
+    if args.output_formats and "parquet" in args.output_formats:
+        import importlib.util
+
+        if importlib.util.find_spec("pyarrow") is None:
+            parser.error("--format parquet nécessite pyarrow (pip install pyarrow).")
+    if (
+        args.input_dir
+        and not args.consolidate
+        and (args.metrics_json or args.profile or args.memory_report)
+    ):
+        parser.error(
+            "--metrics-json, --profile et --memory-report s'utilisent avec --input."
+        )
+    return args
+
+
+def run_batch_from_args(
+    args: argparse.Namespace, category_index, category_rules
+) -> None:
+    from .batch import (
+        collect_input_files,
+        format_summary,
+        run_batch,
+        write_error_report,
+    )
+
+    input_files = collect_input_files(args.input_dir, args.glob)
+    if not input_files:
+        print(f"Aucun fichier '{args.glob}' dans {args.input_dir}.")
+        return
+    results = run_batch(
+        input_files,
+        args.jobs,
+        category_index,
+        category_rules=category_rules,
+        encoding=args.encoding,
+        delimiter=args.delimiter,
+        output_dir=args.output_dir,
+        chunksize=args.chunksize,
+        cache_dir=args.cache_dir,
+        engine=args.csv_engine,
+        output_formats=args.output_formats,
+        store_path=args.store,
+        counterparty_file=args.counterparties,
+    )
+    for result in results:
+        if result.error is not None:
+            write_error_report(result, args.output_dir or args.input_dir)
+    print(format_summary(results))
+    if any(result.error is not None for result in results):
+        raise SystemExit(1)
+
+
+def run_consolidated_from_args(
+    args: argparse.Namespace, category_index, category_rules, metrics
+) -> str | None:
+    from .batch import collect_input_files
+    from .consolidate import convert_consolidated
+
+    input_files = collect_input_files(args.input_dir, args.glob)
+    if not input_files:
+        print(f"Aucun fichier '{args.glob}' dans {args.input_dir}.")
+        return None
+    for input_file in input_files:
+        check_csv_header(input_file, args.encoding, args.delimiter)
+    return convert_consolidated(
+        input_files,
+        args.encoding,
+        args.delimiter,
+        category_index=category_index,
+        output_file=args.output,
+        output_dir=args.output_dir,
+        engine=args.csv_engine,
+        metrics=metrics,
+        category_rules=category_rules,
+        counterparty_file=args.counterparties,
+        duplicates=args.duplicates,
+    )
 
 
 # --- MAIN ---
-def main():
-    args = parse_args()
-    df = read_input_csv(args.input, args.encoding, args.delimiter)
-    df = validate_schema(df)
-    # *****     VISUAL STEPS     *****
-    df = step1_clean_columns(df)
-    df = step2_create_new_columns(df)
-    df = step3_rename_columns(df)
-    df = step4_reorder_columns(df)
-    # *****     FONCTIONNAL STEPS     *****
-    # Find and exctract operation type from "Description" colomn
-    df = step5_find_operation_type(df)
-    # Find "Contrepartie" and "Objet de lopération" from "Description" colomn
-    df = step6_fill_contrepartie_ET_objFact(df)
-    # --- Delete Description column ---
-    df = step7_drop_description(df)
-
-    if not args.no_categories:
-        category_path = Path(args.categories)
-        if not category_path.exists():
-            raise FileNotFoundError(
-                f"Fichier de catégories introuvable: {category_path}"
-            )
-        df = step8_fill_categorie(df, str(category_path))
+def main(argv: list[str] | None = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["watch"]:
+        from .watch import main as watch_main
+
+        watch_main(argv[1:])
+        return
+    if argv[:1] == ["serve"]:
+        from .service import main as serve_main
+
+        serve_main(argv[1:])
+        return
+    if argv[:1] == ["query"]:
+        from .store import main as query_main
+
+        query_main(argv[1:])
+        return
+
+    args = parse_args(argv)
+    if args.input:
+        check_csv_header(args.input, args.encoding, args.delimiter)
+    category_index = load_category_index(args.categories, args.no_categories)
+    category_rules = load_category_rules(
+        args.category_rules,
+        DEFAULT_RULES_FILE,
+        explain=args.explain_categories,
+        no_categories=args.no_categories,
+    )
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    if args.input_dir and not args.consolidate:
+        run_batch_from_args(args, category_index, category_rules)
+        return
+
+    from .convert import convert_file, convert_file_incremental, recategorize_file
+    from .metrics import PipelineMetrics
+
+    metrics = None
+    if args.metrics_json or args.profile or args.memory_report:
+        metrics = PipelineMetrics(profile=args.profile)
+
+    if args.consolidate:
+        output_file = run_consolidated_from_args(
+            args, category_index, category_rules, metrics
+        )
+        if output_file is None:
+            return
+    elif args.incremental:
+        output_file, _ = convert_file_incremental(
+            args.input,
+            args.encoding,
+            args.delimiter,
+            args.ledger,
+            category_index=category_index,
+            output_file=args.output,
+            output_dir=args.output_dir,
+            metrics=metrics,
+            engine=args.csv_engine,
+            category_rules=category_rules,
+            counterparty_file=args.counterparties,
+        )
+    elif args.recategorize:
+        output_file = recategorize_file(
+            args.input,
+            args.encoding,
+            args.delimiter,
+            args.cache_dir or DEFAULT_CACHE_DIR,
+            category_index=category_index,
+            output_file=args.output,
+            output_dir=args.output_dir,
+            metrics=metrics,
+            engine=args.csv_engine,
+            category_rules=category_rules,
+            output_formats=args.output_formats,
+            counterparty_file=args.counterparties,
+        )
+    else:
+        output_file = convert_file(
+            args.input,
+            args.encoding,
+            args.delimiter,
+            category_index=category_index,
+            output_file=args.output,
+            output_dir=args.output_dir,
+            chunksize=args.chunksize,
+            metrics=metrics,
+            cache_dir=args.cache_dir,
+            engine=args.csv_engine,
+            category_rules=category_rules,
+            output_formats=args.output_formats,
+            store_path=args.store,
+            workers=args.workers,
+            counterparty_file=args.counterparties,
+        )
+
+    if metrics is not None:
+        report_metrics(metrics, args, output_file)
+
+
+def report_metrics(metrics, args: argparse.Namespace, output_file: str) -> None:
+    from .metrics import format_memory_usage
 
-    # *****     FINAL STEP     *****
-    #
-    df = step9_export_excel(df, args.input, args.output)
+    metrics.close()
+    profile_dump = None
+    if args.profile:
+        profile_path = (
+            os.path.splitext(args.metrics_json)[0] + ".prof"
+            if args.metrics_json
+            else "cbc-to-excel.prof"
+        )
+        profile_dump = metrics.dump_slowest_profile(profile_path)
+        print(metrics.format_table())
+        print(f"Profil de l'étape la plus lente : {profile_dump}")
+    if args.memory_report:
+        print(format_memory_usage(metrics.columns_memory))
+    if args.metrics_json:
+        metrics.write_json(
+            args.metrics_json,
+            input_file=args.input,
+            output_file=output_file,
+            chunksize=args.chunksize,
+            profile_dump=profile_dump,
+        )
+        print(f"Métriques enregistrées : {args.metrics_json}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,188 @@
+# metrics.py
+
+import cProfile
+import json
+import time
+import tracemalloc
+
+import pandas as pd
+
+try:  # Indisponible sous Windows
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore[assignment]
+
+
+def _max_rss_bytes() -> int | None:
+    """
+    Pic de mémoire résidente du processus (None si non mesurable).
+    """
+    if resource is None:
+        return None
+    # ru_maxrss est en kilo-octets sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class PipelineMetrics:
+    """
+    Mesure chaque étape du pipeline : temps réel et CPU, lignes en entrée et en
+    sortie, débit, pic mémoire (tracemalloc et RSS) et mémoire du DataFrame.
+    Une étape appelée plusieurs fois (traitement par blocs) est cumulée.
+    Avec `profile=True`, chaque étape passe sous cProfile et les statistiques
+    de la plus lente peuvent être enregistrées via `dump_slowest_profile`.
+    """
+
+    def __init__(self, profile: bool = False):
+        self.profile = profile
+        self.steps: dict[str, dict] = {}
+        self._profiles: dict[str, cProfile.Profile] = {}
+        # Mémoire par colonne du dernier DataFrame produit par une étape
+        self.columns_memory: dict[str, dict] = {}
+        self._started = time.perf_counter()
+        self._owns_tracing = not tracemalloc.is_tracing()
+        if self._owns_tracing:
+            tracemalloc.start()
+
+    def close(self) -> None:
+        """
+        Arrête tracemalloc s'il a été démarré par cet objet.
+        """
+        if self._owns_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def run(self, name, func, *args, **kwargs):
+        """
+        Exécute `func(*args, **kwargs)` en enregistrant ses métriques.
+        Le premier argument, s'il s'agit d'un DataFrame, sert au comptage des
+        lignes en entrée.
+        """
+        rows_in = len(args[0]) if args and isinstance(args[0], pd.DataFrame) else 0
+
+        tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if self.profile:
+            profiler = self._profiles.setdefault(name, cProfile.Profile())
+            result = profiler.runcall(func, *args, **kwargs)
+        else:
+            result = func(*args, **kwargs)
+        cpu_time = time.process_time() - cpu_start
+        wall_time = time.perf_counter() - wall_start
+        _, peak = tracemalloc.get_traced_memory()
+
+        is_frame = isinstance(result, pd.DataFrame)
+        step = self.steps.setdefault(
+            name,
+            {
+                "name": name,
+                "calls": 0,
+                "wall_time": 0.0,
+                "cpu_time": 0.0,
+                "rows_in": 0,
+                "rows_out": 0,
+                "peak_traced_memory": 0,
+                "max_rss": None,
+                "dataframe_memory": None,
+            },
+        )
+        step["calls"] += 1
+        step["wall_time"] += wall_time
+        step["cpu_time"] += cpu_time
+        step["rows_in"] += rows_in
+        step["rows_out"] += len(result) if is_frame else 0
+        step["peak_traced_memory"] = max(step["peak_traced_memory"], peak)
+        step["max_rss"] = _max_rss_bytes()
+        if is_frame:
+            usage = result.memory_usage(deep=True)
+            step["dataframe_memory"] = max(
+                step["dataframe_memory"] or 0, int(usage.sum())
+            )
+            self.columns_memory = frame_memory_usage(result, usage)
+        return result
+
+    def slowest_step(self) -> str | None:
+        if not self.steps:
+            return None
+        return max(self.steps.values(), key=lambda step: step["wall_time"])["name"]
+
+    def dump_slowest_profile(self, path: str) -> str | None:
+        """
+        Écrit les statistiques cProfile de l'étape la plus lente (format
+        `pstats`, lisible avec `python -m pstats` ou snakeviz).
+        """
+        slowest = self.slowest_step()
+        if not self.profile or slowest is None:
+            return None
+        self._profiles[slowest].dump_stats(path)
+        return path
+
+    def to_dict(self) -> dict:
+        steps = []
+        for step in self.steps.values():
+            rows = max(step["rows_in"], step["rows_out"])
+            rows_per_second = rows / step["wall_time"] if step["wall_time"] else None
+            steps.append({**step, "rows_per_second": rows_per_second})
+        return {
+            "total_wall_time": time.perf_counter() - self._started,
+            "slowest_step": self.slowest_step(),
+            "steps": steps,
+            "columns_memory": self.columns_memory,
+        }
+
+    def write_json(self, path: str, **extra) -> None:
+        with open(path, mode="w", encoding="utf-8") as file:
+            json.dump({**extra, **self.to_dict()}, file, indent=2, ensure_ascii=False)
+
+    def format_table(self) -> str:
+        """
+        Tableau lisible des métriques (une ligne par étape).
+        """
+        lines = [
+            f"{'étape':<36} {'réel (s)':>9} {'CPU (s)':>9} {'lignes':>9} "
+            f"{'lignes/s':>11} {'pic (Mo)':>9}"
+        ]
+        for step in self.to_dict()["steps"]:
+            rows_per_second = step["rows_per_second"] or 0
+            lines.append(
+                f"{step['name']:<36} {step['wall_time']:>9.3f} "
+                f"{step['cpu_time']:>9.3f} {step['rows_out']:>9} "
+                f"{rows_per_second:>11.0f} "
+                f"{step['peak_traced_memory'] / 1_048_576:>9.1f}"
+            )
+        return "\n".join(lines)
+
+
+def frame_memory_usage(df: pd.DataFrame, usage: pd.Series | None = None) -> dict:
+    """
+    Type et mémoire (`memory_usage(deep=True)`, en octets) de chaque colonne.
+    """
+    if usage is None:
+        usage = df.memory_usage(deep=True)
+    return {
+        str(column): {"dtype": str(df[column].dtype), "bytes": int(usage[column])}
+        for column in df.columns
+    }
+
+
+def format_memory_usage(columns_memory: dict) -> str:
+    """
+    Tableau lisible de la mémoire par colonne (voir `frame_memory_usage`).
+    """
+    lines = [f"{'colonne':<28} {'type':<16} {'mémoire (Ko)':>13}"]
+    total = 0
+    for column, usage in columns_memory.items():
+        total += usage["bytes"]
+        lines.append(
+            f"{column:<28} {usage['dtype']:<16} {usage['bytes'] / 1024:>13.1f}"
+        )
+    lines.append(f"{'total':<28} {'':<16} {total / 1024:>13.1f}")
+    return "\n".join(lines)
+
+
+def run_step(metrics: PipelineMetrics | None, func, *args, **kwargs):
+    """
+    Appelle une étape, mesurée sous son nom de fonction si `metrics` est fourni.
+    """
+    if metrics is None:
+        return func(*args, **kwargs)
+    return metrics.run(func.__name__, func, *args, **kwargs)
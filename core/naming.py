@@ -1,10 +1,17 @@
 # naming.py
-import os
+from __future__ import annotations
 
-import pandas as pd
+import os
+from typing import TYPE_CHECKING
 
 from .config import cptsCBC
 
+# Colonne du nom de compte (feuille consolidée, base SQLite)
+ACCOUNT_COLUMN = "Compte"
+
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 def parse_filename(file_name: str):
     base_name = os.path.basename(file_name)
@@ -29,6 +36,8 @@ def format_export_date(date_yyyymmdd: str) -> str:
 def build_period_string(df):
     if "Date" not in df.columns:
         return "[no date]"
+    import pandas as pd
+
     min_date = df["Date"].min()
     max_date = df["Date"].max()
     if pd.isnull(min_date) or pd.isnull(max_date):
@@ -60,6 +69,17 @@ def build_period_string(df):
         return f"[{dmin_str}-{dmax_str}]"
 
 
+def build_sheet_name(period: str) -> str:
+    """
+    Nettoie la 'period' pour qu’elle soit valide en nom de feuille Excel
+    (pas de [] ni de /, 31 caractères max).
+    """
+    sheet_name = period.replace("[", "").replace("]", "")
+    sheet_name = sheet_name.replace("/", ".").replace("\\", ".")
+    # Excel limite les noms de feuille à 31 caractères max
+    return sheet_name[:31]
+
+
 def build_new_filename(date_export_fr: str, nomCompte: str, period: str):
     # Pour éviter problèmes de / dans le nom de fichier
     safe_period = period.replace("/", "-").replace(":", "-")
@@ -108,10 +128,22 @@ def get_output_filename_and_period(input_file: str, df: pd.DataFrame):
     return out_file_name, period
 
 
+def get_consolidated_filename(input_files: list[str], df: pd.DataFrame) -> str:
+    """
+    Nom du classeur consolidé : période couverte par tous les comptes et
+    date du dernier export.
+    """
+    latest_export = max(parse_filename(input_file)[1] for input_file in input_files)
+    period = build_period_string(df)
+    return build_new_filename(format_export_date(latest_export), "Consolide", period)
+
+
 # -- Optionnel : un bloc de test direct --
 if __name__ == "__main__":
     import sys
 
+    import pandas as pd
+
     if len(sys.argv) < 2:
         print("Usage: python naming.py <fichier.csv>")
         sys.exit(1)
@@ -0,0 +1,99 @@
+# parallel.py
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .categories import init_worker_categories, worker_categories
+from .config import SHARD_MIN_ROWS
+from .pipeline import ENRICH_STEPS, OUTPUT_COLUMNS, Pipeline
+from .rules import CategoryRules
+from .steps import step8_fill_categorie
+
+# Étapes 4b à 7 d'un morceau d'export (l'étape 8 suit si un index est donné)
+SHARD_PIPELINE = Pipeline(ENRICH_STEPS, columns=OUTPUT_COLUMNS)
+
+
+def _enrich(
+    df: pd.DataFrame,
+    category_index: dict[str, str] | None,
+    category_rules: CategoryRules | None,
+) -> pd.DataFrame:
+    df = SHARD_PIPELINE.run(df)
+    if category_index is not None:
+        df = step8_fill_categorie(
+            df, category_index=category_index, category_rules=category_rules
+        )
+    return df
+
+
+def _enrich_shard(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Enrichit un morceau dans un worker, avec l'index et les règles du
+    processus.
+    """
+    return _enrich(df, *worker_categories())
+
+
+def shard_count(rows: int, workers: int) -> int:
+    """
+    Nombre de morceaux : un par worker, chacun d'au moins SHARD_MIN_ROWS
+    lignes.
+    """
+    return max(1, min(workers, rows // SHARD_MIN_ROWS))
+
+
+def split_frame(df: pd.DataFrame, shards: int) -> list[pd.DataFrame]:
+    """
+    Découpe `df` en `shards` morceaux de lignes consécutives et de tailles
+    proches (l'index d'origine est conservé).
+    """
+    bounds = np.linspace(0, len(df), shards + 1).astype(int)
+    return [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def concat_shards(shards: list[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Recolle les morceaux dans l'ordre. Les colonnes `category` n'ont pas les
+    mêmes catégories d'un morceau à l'autre (pd.concat les convertirait en
+    texte) : elles sont réunies avec union_categoricals, triées comme le
+    ferait `astype("category")` sur tout l'export.
+    """
+    df = pd.concat(shards)
+    for column in shards[0].columns:
+        parts = [shard[column] for shard in shards]
+        if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            df[column] = union_categoricals(parts, sort_categories=True)
+    return df
+
+
+def enrich_in_parallel(
+    df: pd.DataFrame,
+    workers: int,
+    category_index: dict[str, str] | None = None,
+    category_rules: CategoryRules | None = None,
+) -> pd.DataFrame:
+    """
+    Étapes 4b à 7 (et 8 avec `category_index`) d'un export déjà préparé
+    (étapes de PREPARE_STEPS), réparties par morceaux de lignes sur
+    `workers` processus. Ces étapes ne dépendent que de la ligne traitée :
+    le résultat, recollé dans l'ordre d'origine, est identique au
+    traitement en un seul processus.
+    Les morceaux et les résultats passent par le pickle du pool, avec le
+    protocole par défaut de Python (non configurable) : des tampons hors
+    bande du protocole 5 y seraient recopiés en bytes, et Arrow IPC
+    demanderait pyarrow, qui reste optionnel.
+    """
+    shards = split_frame(df, shard_count(len(df), workers))
+    if len(shards) == 1:
+        return _enrich(df, category_index, category_rules)
+
+    with ProcessPoolExecutor(
+        max_workers=len(shards),
+        initializer=init_worker_categories,
+        initargs=(category_index, category_rules),
+    ) as executor:
+        results = list(executor.map(_enrich_shard, shards))
+    return concat_shards(results)
@@ -0,0 +1,118 @@
+# pipeline.py
+
+import contextlib
+from collections.abc import Callable
+
+import pandas as pd
+
+from .metrics import PipelineMetrics, run_step
+from .steps import (
+    COLUMNS_ORDER,
+    NORMALIZED_DESCRIPTION,
+    step1_clean_columns,
+    step2_create_new_columns,
+    step3_rename_columns,
+    step4b_normalize_description,
+    step5_find_operation_type,
+    step6_fill_contrepartie_ET_objFact,
+    step8_fill_categorie,
+    validate_schema,
+)
+
+# Colonnes de l'export, dans l'ordre : remplace les étapes 4 (réorganisation)
+# et 7 (suppression de la description) par une seule sélection en fin de
+# pipeline.
+OUTPUT_COLUMNS = [
+    column
+    for column in COLUMNS_ORDER
+    if column not in ("Description", NORMALIZED_DESCRIPTION)
+]
+
+# Registre des étapes {nom: fonction}. Chaque étape modifie en place le
+# DataFrame reçu et le retourne ; aucune ne réordonne de colonnes (c'est le
+# rôle de la projection finale). L'étape 1 reste pour écarter la colonne
+# 'Date' de l'export avant le renommage de 'Valeur'.
+STEPS: dict[str, Callable[..., pd.DataFrame]] = {
+    "schema": validate_schema,
+    "clean": step1_clean_columns,
+    "new_columns": step2_create_new_columns,
+    "rename": step3_rename_columns,
+    "normalize": step4b_normalize_description,
+    "operation_type": step5_find_operation_type,
+    "contrepartie": step6_fill_contrepartie_ET_objFact,
+    "categories": step8_fill_categorie,
+}
+
+PREPARE_STEPS = ["schema", "clean", "new_columns", "rename"]
+ENRICH_STEPS = ["normalize", "operation_type", "contrepartie"]
+
+
+def register_step(name: str, func: Callable[..., pd.DataFrame]) -> None:
+    """
+    Ajoute (ou remplace) une étape du registre. `func(df, **options)` doit
+    modifier `df` en place et le retourner.
+    """
+    STEPS[name] = func
+
+
+def project_columns(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    """
+    Projection finale : colonnes de `columns` présentes dans `df`, dans cet
+    ordre, les autres étant écartées. Seule sélection de colonnes du
+    pipeline ; avec copy-on-write, elle ne copie pas les données.
+    """
+    return df[[column for column in columns if column in df.columns]]
+
+
+def _copy_on_write():
+    # Toujours actif à partir de pandas 3 ; à activer explicitement avant
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return contextlib.nullcontext()
+    return pd.option_context("mode.copy_on_write", True)
+
+
+class Pipeline:
+    """
+    Suite d'étapes nommées (voir STEPS) appliquées en place à un même
+    DataFrame, suivie d'une éventuelle projection unique sur `columns`.
+    Le pipeline s'approprie le DataFrame reçu : l'appelant ne doit plus
+    l'utiliser. Les étapes tournent avec copy-on-write, ce qui supprime les
+    copies défensives et les avertissements SettingWithCopy.
+    """
+
+    def __init__(self, steps: list[str], columns: list[str] | None = None):
+        unknown = [name for name in steps if name not in STEPS]
+        if unknown:
+            raise ValueError(
+                f"Étape(s) inconnue(s): {', '.join(unknown)} "
+                f"(attendu: {', '.join(STEPS)})"
+            )
+        self.steps = list(steps)
+        self.columns = columns
+
+    def run(
+        self,
+        df: pd.DataFrame,
+        metrics: PipelineMetrics | None = None,
+        **step_options: dict,
+    ) -> pd.DataFrame:
+        """
+        Applique les étapes puis la projection. `step_options` donne les
+        arguments nommés d'une étape, ex. `categories={"category_index": index}`.
+        """
+        with _copy_on_write():
+            for name in self.steps:
+                result = run_step(
+                    metrics, STEPS[name], df, **step_options.get(name, {})
+                )
+                if result is not df:
+                    raise TypeError(
+                        f"L'étape '{name}' doit modifier le DataFrame en place."
+                    )
+            if self.columns is not None:
+                df = run_step(metrics, project_columns, df, self.columns)
+        return df
+
+
+# Lecture -> DataFrame enrichi (équivalent des étapes 1 à 7)
+ENRICH_PIPELINE = Pipeline(PREPARE_STEPS + ENRICH_STEPS, columns=OUTPUT_COLUMNS)
@@ -0,0 +1,286 @@
+# rules.py
+
+import csv
+import os
+import re
+from collections import deque
+from typing import NamedTuple
+
+from .text import normalize_text
+
+# Champs sur lesquels une règle peut porter ("*" : les deux)
+RULE_FIELDS = {
+    "Contrepartie": ("Contrepartie",),
+    "Objet de l’opération": ("Objet de l’opération",),
+    "Objet": ("Objet de l’opération",),
+    "*": ("Contrepartie", "Objet de l’opération"),
+    "": ("Contrepartie", "Objet de l’opération"),
+}
+RULE_KINDS = ("mot", "regex")
+# Références numérotées (\1, \g<1>, (?(1)…)) : une fois les règles réunies
+# en une seule expression, les numéros désigneraient d'autres groupes
+_NUMBERED_REFERENCE = re.compile(r"(?<!\\)(?:\\\\)*\\(?:[1-9]|g<\d+>)|\(\?\(\d")
+
+
+class CategoryRule(NamedTuple):
+    priority: int
+    category: str
+    field: str
+    pattern: str
+    kind: str
+    line: int
+
+    def describe(self) -> str:
+        verb = "contient" if self.kind == "mot" else "correspond à"
+        return (
+            f"règle ligne {self.line} (priorité {self.priority}) : "
+            f"{self.field or '*'} {verb} '{self.pattern}' -> {self.category}"
+        )
+
+
+class KeywordAutomaton:
+    """
+    Automate d'Aho-Corasick : trouve en un seul passage sur le texte tous les
+    mots-clés présents, quel que soit leur nombre.
+    Chaque mot-clé porte une valeur (ici l'indice de la règle).
+    """
+
+    def __init__(self):
+        self._transitions: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._outputs: list[list[int]] = [[]]
+
+    def add(self, keyword: str, value: int) -> None:
+        state = 0
+        for character in keyword:
+            next_state = self._transitions[state].get(character)
+            if next_state is None:
+                next_state = len(self._transitions)
+                self._transitions[state][character] = next_state
+                self._transitions.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            state = next_state
+        self._outputs[state].append(value)
+
+    def build(self) -> None:
+        """
+        Calcule les liens d'échec (parcours en largeur) ; à appeler une fois
+        tous les mots-clés ajoutés.
+        """
+        queue = deque(self._transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for character, next_state in self._transitions[state].items():
+                fail = self._fail[state]
+                while fail and character not in self._transitions[fail]:
+                    fail = self._fail[fail]
+                candidate = self._transitions[fail].get(character, 0)
+                self._fail[next_state] = candidate if candidate != next_state else 0
+                self._outputs[next_state] = (
+                    self._outputs[next_state] + self._outputs[self._fail[next_state]]
+                )
+                queue.append(next_state)
+
+    def find_all(self, text: str) -> set[int]:
+        """
+        Valeurs de tous les mots-clés présents dans `text`.
+        """
+        found: set[int] = set()
+        state = 0
+        for character in text:
+            while state and character not in self._transitions[state]:
+                state = self._fail[state]
+            state = self._transitions[state].get(character, 0)
+            found.update(self._outputs[state])
+        return found
+
+
+def _compile_alternatives(patterns) -> re.Pattern:
+    """
+    Réunit les expressions [(indice, motif)] en une seule, chacune dans un
+    groupe nommé r<indice>.
+    """
+    alternatives = [
+        f"(?=.*?(?P<r{position}>{pattern}))" for position, pattern in patterns
+    ]
+    return re.compile("^(?:" + "|".join(alternatives) + ")", re.IGNORECASE | re.DOTALL)
+
+
+class CategoryRules:
+    """
+    Règles de catégorie par mot-clé ou expression régulière sur la
+    contrepartie et l'objet de l'opération.
+    Les textes et les mots-clés sont normalisés (majuscules, sans accents)
+    avant la recherche ; les expressions régulières ignorent la casse.
+    Les règles sont triées par priorité croissante puis par ordre du fichier :
+    la première qui correspond l'emporte.
+    Avec `explain=True`, l'étape 8 ajoute la colonne 'Règle catégorie'.
+    """
+
+    def __init__(self, rules: list[CategoryRule], explain: bool = False):
+        self.rules = sorted(rules, key=lambda rule: (rule.priority, rule.line))
+        self.explain = explain
+        self._automatons: dict[str, KeywordAutomaton] = {}
+        self._regexes: dict[str, tuple[re.Pattern, list[int]]] = {}
+
+        regex_rules: dict[str, list[int]] = {}
+        for position, rule in enumerate(self.rules):
+            for field in RULE_FIELDS[rule.field]:
+                if rule.kind == "mot":
+                    automaton = self._automatons.setdefault(field, KeywordAutomaton())
+                    automaton.add(normalize_text(rule.pattern), position)
+                else:
+                    regex_rules.setdefault(field, []).append(position)
+        for automaton in self._automatons.values():
+            automaton.build()
+        for field, positions in regex_rules.items():
+            # Une seule expression, alternatives essayées dans l'ordre de
+            # priorité. Les groupes nommés r<indice> identifient la règle
+            # retenue.
+            try:
+                pattern = _compile_alternatives(
+                    (position, self.rules[position].pattern) for position in positions
+                )
+            except re.error as exc:
+                raise ValueError(
+                    f"Expressions régulières incompatibles entre elles ({exc})"
+                )
+            self._regexes[field] = (pattern, positions)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _matching_positions(self, texts: dict[str, str], first_only: bool) -> set:
+        positions: set[int] = set()
+        for field, text in texts.items():
+            if not text:
+                continue
+            automaton = self._automatons.get(field)
+            if automaton is not None:
+                positions.update(automaton.find_all(text))
+            if field not in self._regexes:
+                continue
+            pattern, regex_positions = self._regexes[field]
+            if first_only:
+                match = pattern.match(text)
+                if match:
+                    positions.add(int(match.lastgroup[1:]))
+            else:
+                positions.update(
+                    position
+                    for position in regex_positions
+                    if re.search(self.rules[position].pattern, text, re.IGNORECASE)
+                )
+        return positions
+
+    def match(self, contrepartie: str, objet: str) -> CategoryRule | None:
+        """
+        Règle de plus haute priorité qui correspond (None si aucune).
+        Les textes doivent déjà être normalisés (voir text.normalize_text).
+        """
+        positions = self._matching_positions(
+            {"Contrepartie": contrepartie, "Objet de l’opération": objet},
+            first_only=True,
+        )
+        return self.rules[min(positions)] if positions else None
+
+    def explain_match(self, contrepartie: str, objet: str) -> list[CategoryRule]:
+        """
+        Toutes les règles qui correspondent, dans l'ordre où elles
+        s'appliquent (la première est celle retenue).
+        """
+        positions = self._matching_positions(
+            {
+                "Contrepartie": normalize_text(contrepartie),
+                "Objet de l’opération": normalize_text(objet),
+            },
+            first_only=False,
+        )
+        return [self.rules[position] for position in sorted(positions)]
+
+
+def _regex_error(pattern: str) -> str | None:
+    """
+    Erreur d'une expression de règle (None si elle est valide), vérifiée
+    telle qu'elle sera compilée avec les autres : les options globales en
+    cours de motif ((?i) ailleurs qu'au début) et les références numérotées
+    ne sont pas acceptées.
+    """
+    if _NUMBERED_REFERENCE.search(pattern):
+        return (
+            f"expression régulière invalide '{pattern}' (références numérotées "
+            "non acceptées, utiliser (?P<nom>…) et (?P=nom))"
+        )
+    try:
+        _compile_alternatives([(0, pattern)])
+    except re.error as exc:
+        return f"expression régulière invalide '{pattern}' ({exc})"
+    return None
+
+
+def read_category_rules(file_path: str) -> list[CategoryRule]:
+    """
+    Lit le fichier CSV des règles de catégorie. Exemple :
+    Priorité;Catégorie;Champ;Motif;Type
+    10;D-Alimentaire;Contrepartie;DELHAIZE;mot
+    20;D-Energie;*;LUMINUS|ENGIE;regex
+    Lève une ValueError si une ligne est invalide, ou si les expressions
+    régulières ne peuvent pas être réunies (même nom de groupe…).
+    """
+    rules = []
+    with open(file_path, mode="r", encoding="utf-8") as file:
+        reader = csv.DictReader(file, delimiter=";")
+        for line, row in enumerate(reader, start=2):
+            field = (row.get("Champ") or "").strip()
+            kind = (row.get("Type") or "mot").strip().lower() or "mot"
+            pattern = (row.get("Motif") or "").strip()
+            category = (row.get("Catégorie") or "").strip()
+            try:
+                priority = int((row.get("Priorité") or "100").strip() or "100")
+            except ValueError:
+                priority = None
+            if priority is None or not category or not pattern:
+                error = "priorité, catégorie et motif sont obligatoires"
+            elif field not in RULE_FIELDS:
+                error = f"champ inconnu '{field}' (attendu: {', '.join(RULE_FIELDS)})"
+            elif kind not in RULE_KINDS:
+                error = f"type inconnu '{kind}' (attendu: {', '.join(RULE_KINDS)})"
+            else:
+                error = None
+                if kind == "regex":
+                    error = _regex_error(pattern)
+            if error:
+                raise ValueError(
+                    f"Règle de catégorie invalide ({file_path}, ligne {line}) : {error}"
+                )
+            rules.append(CategoryRule(priority, category, field, pattern, kind, line))
+    try:
+        CategoryRules(rules)
+    except ValueError as exc:
+        raise ValueError(f"Règles de catégorie invalides ({file_path}) : {exc}")
+    return rules
+
+
+def load_category_rules(
+    rules_file: str | None,
+    default_file: str | None = None,
+    explain: bool = False,
+    no_categories: bool = False,
+) -> CategoryRules | None:
+    """
+    Charge les règles de catégorie. `rules_file` explicite doit exister ;
+    à défaut, `default_file` est utilisé s'il existe. Retourne None s'il n'y a
+    ni règles ni explication demandée.
+    """
+    if no_categories:
+        return None
+    if rules_file and not os.path.exists(rules_file):
+        raise FileNotFoundError(f"Fichier de règles introuvable: {rules_file}")
+    path = rules_file or (
+        default_file if default_file and os.path.exists(default_file) else None
+    )
+    rules = read_category_rules(path) if path else []
+    if not rules and not explain:
+        return None
+    return CategoryRules(rules, explain=explain)
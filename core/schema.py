@@ -0,0 +1,103 @@
+# schema.py
+
+import csv
+
+# Colonnes minimales attendues et leurs alias acceptés
+MINIMAL_SCHEMA = {
+    "Description": ["Description", "Libellé", "Libelle"],
+    "Montant": ["Montant", "Montant (EUR)"],
+    "Valeur": ["Valeur", "Date"],
+}
+
+# Colonnes de l'export CBC conservées par le pipeline (les autres sont
+# supprimées à l'étape 1 ou écartées à l'étape 4) : elles seules sont lues.
+INPUT_COLUMNS = [
+    "Numéro de l'extrait",
+    "Description",
+    "Valeur",
+    "Montant",
+    "Nom contrepartie",
+    "Communication libre",
+]
+
+# Types déclarés au lecteur CSV (la date et le montant sont convertis à
+# part) : une colonne de texte entièrement vide reste du texte, un N°extrait
+# manquant reste un entier manquant.
+INPUT_DTYPES = {
+    "Numéro de l'extrait": "Int64",
+    "Description": "str",
+    "Libellé": "str",
+    "Libelle": "str",
+    "Nom contrepartie": "str",
+    "Communication libre": "str",
+}
+
+# Format de la date valeur dans les exports CBC (ex. 18/01/2025)
+INPUT_DATE_FORMAT = "%d/%m/%Y"
+
+
+def resolve_schema(columns) -> dict[str, str]:
+    """
+    Retourne le renommage {alias trouvé: nom attendu} à appliquer aux colonnes.
+    Lève une ValueError si une colonne minimale manque.
+    """
+    columns = list(columns)
+    missing = []
+    rename_map = {}
+
+    for expected, aliases in MINIMAL_SCHEMA.items():
+        if expected in columns:
+            continue
+        found = next((alias for alias in aliases if alias in columns), None)
+        if found:
+            rename_map[found] = expected
+        else:
+            missing.append(f"{expected} (attendu: {', '.join(aliases)})")
+
+    if missing:
+        existing = ", ".join(columns)
+        raise ValueError(
+            "Schéma invalide: colonnes manquantes: "
+            + "; ".join(missing)
+            + f". Colonnes trouvées: {existing}"
+        )
+    return rename_map
+
+
+def input_read_plan(header) -> tuple[list[str], str, str]:
+    """
+    Colonnes à lire pour cet en-tête : celles du pipeline, plus les alias du
+    schéma minimal utilisés à la place d'une colonne manquante.
+    Retourne (colonnes, colonne de la date valeur, colonne du montant) ; les
+    types des colonnes lues sont dans INPUT_DTYPES.
+    """
+    header = list(header)
+    rename_map = resolve_schema(header)
+    source = {expected: alias for alias, expected in rename_map.items()}
+    wanted = set(INPUT_COLUMNS) | set(rename_map)
+    usecols = [column for column in header if column in wanted]
+    return usecols, source.get("Valeur", "Valeur"), source.get("Montant", "Montant")
+
+
+def check_csv_header(input_file: str, encoding: str, delimiter: str) -> list[str]:
+    """
+    Lit uniquement l'en-tête du CSV et vérifie le schéma minimal, sans charger
+    pandas : les erreurs de fichier ou de colonnes sont signalées tout de suite.
+    Retourne la liste des colonnes.
+    """
+    try:
+        with open(input_file, mode="r", encoding=encoding, newline="") as file:
+            header = next(csv.reader(file, delimiter=delimiter), [])
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Le fichier '{input_file}' est introuvable.")
+    except UnicodeDecodeError as exc:
+        raise UnicodeDecodeError(
+            exc.encoding,
+            exc.object,
+            exc.start,
+            exc.end,
+            f"Impossible de lire '{input_file}' avec l'encodage '{encoding}'.",
+        ) from exc
+
+    resolve_schema(header)
+    return header
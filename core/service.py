@@ -0,0 +1,471 @@
+# service.py
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+from urllib.parse import parse_qs, quote, urlsplit
+
+from .categories import CategoryCache
+from .config import (
+    DEFAULT_CATEGORY_FILE,
+    DEFAULT_ENCODING,
+    DEFAULT_SERVICE_CATEGORIES_DIR,
+    DELIMITER,
+)
+from .naming import parse_filename
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+_STREAM_BLOCK = 64 * 1024
+DEFAULT_READ_TIMEOUT = 30.0
+# Nom d'un fichier de catégories ou de règles de `categories_dir`
+_CATEGORIES_NAME = re.compile(r"^[\w.-]+\.csv$")
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    411: "Length Required",
+    413: "Payload Too Large",
+    422: "Unprocessable Entity",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class FileBody(NamedTuple):
+    """
+    Réponse envoyée depuis un fichier, par blocs ; `directory` (dossier de
+    travail de la conversion) est supprimé une fois la réponse envoyée.
+    """
+
+    path: str
+    directory: str
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str, headers: dict | None = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _warm_worker() -> None:
+    # Chargé une fois par processus : pandas, xlsxwriter et les motifs compilés
+    from . import convert  # noqa: F401
+
+
+def convert_upload(
+    input_file: str,
+    encoding: str,
+    delimiter: str,
+    category_index: dict[str, str] | None,
+    category_rules=None,
+) -> str:
+    """
+    Convertit un export reçu, déjà écrit sur disque (exécuté dans un
+    processus du pool). Le fichier Excel est écrit dans le même dossier.
+    Retourne son chemin.
+    """
+    from .convert import convert_file
+    from .schema import check_csv_header
+
+    check_csv_header(input_file, encoding, delimiter)
+    return convert_file(
+        input_file,
+        encoding,
+        delimiter,
+        category_index=category_index,
+        output_dir=os.path.dirname(input_file),
+        category_rules=category_rules,
+    )
+
+
+class ConversionService:
+    """
+    Service HTTP local (asyncio) autour du pipeline :
+    - POST /convert?filename=export_<compte>_<date>_<heure>.csv : le corps est
+      le CSV ; options `encoding`, `delimiter`, `no_categories=1`, et
+      `categories=<nom>.csv` / `category_rules=<nom>.csv` pour utiliser un
+      fichier de `categories_dir` (déposé par l'administrateur du service)
+      au lieu des catégories du service.
+      Répond avec le fichier xlsx, envoyé par blocs depuis le disque.
+    - GET /health : état et métriques (conversions en cours, en attente,
+      réussies, en échec, durée moyenne).
+    Les conversions tournent dans un pool de `workers` processus ; au-delà de
+    `max_pending` requêtes en cours ou en attente, le service répond 503.
+    Les en-têtes, puis le corps, doivent arriver chacun en moins de
+    `read_timeout` secondes (sinon 408) : un client muet ne garde pas une
+    connexion ni une place de `max_pending`.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_pending: int,
+        categories: CategoryCache,
+        max_upload_bytes: int = 50 * 1024 * 1024,
+        categories_dir: str = DEFAULT_SERVICE_CATEGORIES_DIR,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.categories = categories
+        self.max_upload_bytes = max_upload_bytes
+        self.categories_dir = categories_dir
+        self.read_timeout = read_timeout
+        # Catégories choisies par requête : {(catégories, règles): cache}
+        self._chosen_categories: dict[tuple, CategoryCache] = {}
+        self.executor: ProcessPoolExecutor | None = None
+        self.started = time.monotonic()
+        self.in_flight = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self._slots: asyncio.Semaphore | None = None
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_warm_worker,
+            # Pas de fork depuis une boucle asyncio en cours (threads actifs)
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        self._slots = asyncio.Semaphore(self.workers)
+        self.categories.get()
+        return await asyncio.start_server(self.handle, host, port)
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    def health(self) -> dict:
+        done = self.completed + self.failed
+        return {
+            "status": "ok",
+            "uptime_seconds": round(time.monotonic() - self.started, 1),
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "active": self.active,
+            "queued": self.in_flight - self.active,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "average_seconds": round(self.total_seconds / done, 3) if done else None,
+        }
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            body = None
+            try:
+                method, target, headers = await self._read_head(reader)
+                status, response_headers, body = await self._route(
+                    method, target, headers, reader
+                )
+            except HttpError as exc:
+                status = exc.status
+                response_headers = {
+                    "Content-Type": "application/json; charset=utf-8",
+                    **exc.headers,
+                }
+                body = json.dumps({"error": str(exc)}, ensure_ascii=False).encode()
+            await self._send(writer, status, response_headers, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if isinstance(body, FileBody):
+                shutil.rmtree(body.directory, ignore_errors=True)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read(self, read):
+        try:
+            return await asyncio.wait_for(read, self.read_timeout)
+        except TimeoutError:
+            raise HttpError(408, "Requête reçue trop lentement.")
+
+    async def _read_head(self, reader: asyncio.StreamReader):
+        try:
+            head = await self._read(reader.readuntil(b"\r\n\r\n"))
+        except asyncio.LimitOverrunError:
+            raise HttpError(400, "En-têtes trop longs.")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Requête invalide.")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        return method.upper(), target, headers
+
+    async def _route(self, method, target, headers, reader):
+        url = urlsplit(target)
+        if url.path == "/health":
+            if method != "GET":
+                raise HttpError(405, "Méthode non autorisée.")
+            body = json.dumps(self.health()).encode()
+            return 200, {"Content-Type": "application/json"}, body
+        if url.path != "/convert":
+            raise HttpError(404, f"Chemin inconnu: {url.path}")
+        if method != "POST":
+            raise HttpError(405, "Méthode non autorisée.")
+
+        options = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        filename = os.path.basename(
+            options.get("filename") or headers.get("x-filename", "")
+        )
+        try:
+            parse_filename(filename)
+        except ValueError:
+            raise HttpError(
+                400,
+                "Paramètre 'filename' attendu au format "
+                "export_<compte>_<AAAAMMJJ>_<HHMM>.csv.",
+            )
+        length = self._content_length(headers)
+        categories = self._chosen_category_cache(options)
+
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise HttpError(
+                503, "Service saturé, réessayez plus tard.", {"Retry-After": "2"}
+            )
+        self.in_flight += 1
+        workdir = tempfile.mkdtemp(prefix="cbc-service-")
+        try:
+            input_file = os.path.join(workdir, filename)
+            with open(input_file, mode="wb") as file:
+                file.write(await self._read(reader.readexactly(length)))
+            output_file = await self._convert(input_file, options, categories)
+        except BaseException:
+            shutil.rmtree(workdir, ignore_errors=True)
+            raise
+        finally:
+            self.in_flight -= 1
+        name = os.path.basename(output_file)
+        return (
+            200,
+            {
+                "Content-Type": XLSX_CONTENT_TYPE,
+                "Content-Disposition": (f"attachment; filename*=UTF-8''{quote(name)}"),
+            },
+            FileBody(output_file, workdir),
+        )
+
+    def _content_length(self, headers: dict) -> int:
+        if "content-length" not in headers:
+            raise HttpError(411, "En-tête Content-Length requis.")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise HttpError(400, "En-tête Content-Length invalide.")
+        if length > self.max_upload_bytes:
+            raise HttpError(413, "Fichier trop volumineux.")
+        return length
+
+    def _categories_path(self, name: str) -> str:
+        """
+        Chemin d'un fichier de `categories_dir` à partir du nom reçu (sans
+        dossier : les autres fichiers du disque ne sont pas accessibles).
+        """
+        if not _CATEGORIES_NAME.match(name):
+            raise HttpError(400, f"Nom de fichier de catégories invalide: {name}")
+        return os.path.join(self.categories_dir, name)
+
+    def _chosen_category_cache(self, options: dict) -> CategoryCache:
+        """
+        Catégories de la requête : celles du service, ou les fichiers de
+        `categories_dir` choisis avec `categories` et `category_rules`
+        (gardés en mémoire, rechargés s'ils changent).
+        """
+        chosen = (options.get("categories"), options.get("category_rules"))
+        if chosen == (None, None):
+            return self.categories
+        paths = tuple(self._categories_path(name) if name else None for name in chosen)
+        for path in paths:
+            if path and not os.path.exists(path):
+                raise HttpError(404, f"Fichier inconnu: {os.path.basename(path)}")
+        cache = self._chosen_categories.get(paths)
+        if cache is None:
+            cache = CategoryCache(
+                paths[0] or self.categories.category_file,
+                paths[1] or self.categories.rules_file,
+            )
+            self._chosen_categories[paths] = cache
+        return cache
+
+    async def _convert(
+        self, input_file: str, options: dict, categories: CategoryCache
+    ) -> str:
+        if options.get("no_categories") in ("1", "true", "oui"):
+            category_index, category_rules = None, None
+        else:
+            try:
+                category_index, category_rules = categories.get()
+            except (ValueError, FileNotFoundError, UnicodeDecodeError) as exc:
+                raise HttpError(422, str(exc))
+        async with self._slots:
+            self.active += 1
+            start = time.perf_counter()
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self.executor,
+                    convert_upload,
+                    input_file,
+                    options.get("encoding", DEFAULT_ENCODING),
+                    options.get("delimiter", DELIMITER),
+                    category_index,
+                    category_rules,
+                )
+            except (ValueError, UnicodeDecodeError) as exc:
+                self.failed += 1
+                raise HttpError(422, str(exc))
+            except Exception as exc:
+                self.failed += 1
+                raise HttpError(500, f"{type(exc).__name__}: {exc}")
+            finally:
+                self.active -= 1
+                self.total_seconds += time.perf_counter() - start
+        self.completed += 1
+        return result
+
+    async def _send(
+        self, writer, status: int, headers: dict, body: bytes | FileBody
+    ) -> None:
+        if isinstance(body, FileBody):
+            length = os.path.getsize(body.path)
+        else:
+            length = len(body)
+        head = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+        headers = {**headers, "Content-Length": str(length), "Connection": "close"}
+        head.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        if not isinstance(body, FileBody):
+            writer.write(body)
+            await writer.drain()
+            return
+        # Envoi par blocs depuis le disque : ni le fichier entier en mémoire,
+        # ni un tampon qui gonfle avec un client lent
+        with open(body.path, mode="rb") as file:
+            while block := file.read(_STREAM_BLOCK):
+                writer.write(block)
+                await writer.drain()
+
+
+def parse_serve_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="cbc-to-excel serve",
+        description="Service HTTP local de conversion des exports CBC.",
+    )
+    parser.add_argument(
+        "--host",
+        default=DEFAULT_HOST,
+        help=f"Adresse d'écoute (défaut: {DEFAULT_HOST}).",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Port d'écoute (défaut: {DEFAULT_PORT}).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Nombre de processus de conversion (défaut: nb CPU).",
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        help="Requêtes en cours ou en attente au-delà desquelles le service "
+        "répond 503 (défaut: 4 x workers).",
+    )
+    parser.add_argument(
+        "--max-upload-mb",
+        type=int,
+        default=50,
+        help="Taille maximale d'un export reçu, en Mo (défaut: 50).",
+    )
+    parser.add_argument(
+        "--read-timeout",
+        type=float,
+        default=DEFAULT_READ_TIMEOUT,
+        help=(
+            "Délai maximal de réception des en-têtes, puis du corps, d'une "
+            f"requête, en secondes (défaut: {DEFAULT_READ_TIMEOUT:g})."
+        ),
+    )
+    parser.add_argument(
+        "--categories",
+        default=DEFAULT_CATEGORY_FILE,
+        help=f"Fichier CSV des catégories (défaut: {DEFAULT_CATEGORY_FILE}).",
+    )
+    parser.add_argument(
+        "--category-rules",
+        help="Règles de catégorie par mot-clé/regex.",
+    )
+    parser.add_argument(
+        "--categories-dir",
+        default=DEFAULT_SERVICE_CATEGORIES_DIR,
+        help=(
+            "Dossier des fichiers de catégories et de règles choisis par "
+            "requête avec categories= et category_rules= (défaut: "
+            f"{DEFAULT_SERVICE_CATEGORIES_DIR})."
+        ),
+    )
+    parser.add_argument(
+        "--no-categories",
+        action="store_true",
+        help="Désactive l'association automatique des catégories.",
+    )
+    return parser.parse_args(argv)
+
+
+async def serve(args: argparse.Namespace) -> None:
+    service = ConversionService(
+        workers=args.workers,
+        max_pending=args.max_pending or 4 * args.workers,
+        categories=CategoryCache(
+            args.categories, args.category_rules, no_categories=args.no_categories
+        ),
+        max_upload_bytes=args.max_upload_mb * 1024 * 1024,
+        categories_dir=args.categories_dir,
+        read_timeout=args.read_timeout,
+    )
+    server = await service.start(args.host, args.port)
+    print(
+        f"Service prêt sur http://{args.host}:{args.port} "
+        f"({args.workers} processus) — Ctrl+C pour arrêter."
+    )
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    try:
+        asyncio.run(serve(parse_serve_args(argv)))
+    except KeyboardInterrupt:
+        print("Service arrêté.")
@@ -0,0 +1,250 @@
+# sinks.py
+
+import os
+import sqlite3
+
+import pandas as pd
+
+from .config import DELIMITER, OUTPUT_FORMATS
+from .excel_writer import StreamingExcelWriter
+from .naming import ACCOUNT_COLUMN
+
+SQLITE_TABLE = "transactions"
+# Colonnes indexées de la base SQLite (filtres des analyses)
+SQLITE_INDEXED_COLUMNS = ("Date", "Catégorie", ACCOUNT_COLUMN)
+
+
+class ExcelChunkSink:
+    """
+    Écrit les blocs au fil de l'eau dans un classeur xlsx en mémoire
+    constante (voir core.excel_writer). La feuille reçoit son nom (la
+    période, connue une fois tous les blocs vus) à la fermeture. Au-delà de
+    la limite de lignes d'une feuille, `write` lève ValueError.
+    """
+
+    _PROVISIONAL_SHEET = "Export"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.writer = StreamingExcelWriter(path)
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.writer.worksheet is None:
+            self.writer.add_sheet(self._PROVISIONAL_SHEET, df.columns)
+        self.writer.write_frame(df)
+
+    def close(self, sheet_name: str) -> None:
+        if self.writer.worksheet is None:
+            self.writer.add_sheet(sheet_name, [])
+        else:
+            self.writer.rename_sheet(sheet_name)
+        self.writer.close()
+
+
+class CsvChunkSink:
+    """
+    Ajoute les blocs à la suite dans un fichier CSV (séparateur `;`,
+    décimale `,`, comme les exports CBC).
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        # En mode ajout, l'en-tête n'est écrit que si le fichier n'existe pas
+        self.header_written = append and os.path.exists(path)
+
+    def write(self, df: pd.DataFrame) -> None:
+        df.to_csv(
+            self.path,
+            mode="a" if self.header_written else "w",
+            header=not self.header_written,
+            index=False,
+            sep=DELIMITER,
+            decimal=",",
+            date_format="%d/%m/%Y",
+            encoding="utf-8",
+        )
+        self.header_written = True
+
+    def close(self, sheet_name: str) -> None:
+        return None
+
+
+class ParquetSink:
+    """
+    Écrit les blocs dans un fichier Parquet (colonnes typées, lisibles
+    directement par pandas, DuckDB, Power BI…). Nécessite pyarrow.
+    Les colonnes `category` sont écrites en texte : le schéma reste le même
+    d'un bloc à l'autre (Parquet encode de toute façon les valeurs répétées
+    par dictionnaire).
+    """
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError(
+                "Le format parquet nécessite pyarrow (pip install pyarrow)."
+            )
+        self.path = path
+        self.schema = None
+        self.writer = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        df = df.astype(
+            {
+                column: object
+                for column in df.columns
+                if isinstance(df[column].dtype, pd.CategoricalDtype)
+            }
+        )
+        if self.writer is None:
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            # Colonne vide dans le premier bloc : texte plutôt que null
+            for position, field in enumerate(schema):
+                if pa.types.is_null(field.type):
+                    schema = schema.set(position, field.with_type(pa.string()))
+            self.schema = schema
+            self.writer = pq.ParquetWriter(self.path, schema)
+        table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self, sheet_name: str) -> None:
+        if self.writer is None:
+            self.write(pd.DataFrame())
+        self.writer.close()
+
+
+def _quote(identifier: str) -> str:
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+
+def sqlite_column(values: pd.Series) -> tuple[str, list]:
+    """
+    Convertit une colonne pour SQLite : (type SQL, valeurs natives).
+    Les dates sont stockées en texte ISO (AAAA-MM-JJ), triable et utilisable
+    avec les fonctions de date de SQLite ; les valeurs manquantes deviennent
+    NULL.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        texts = values.dt.strftime("%Y-%m-%d")
+        return "TEXT", texts.astype(object).where(values.notna(), None).tolist()
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_integer_dtype(values):
+        sql_type = "INTEGER"
+    elif pd.api.types.is_numeric_dtype(values):
+        sql_type = "REAL"
+    else:
+        sql_type = "TEXT"
+    return sql_type, values.astype(object).where(values.notna(), None).tolist()
+
+
+class SqliteSink:
+    """
+    Écrit les blocs dans la table `transactions` d'une base SQLite (fichier
+    recréé), avec une colonne 'Compte' (nom du compte, config.cptsCBC).
+    Les colonnes de la table sont celles du premier bloc : les blocs
+    suivants y sont alignés (colonne absente : NULL, colonne en plus :
+    ignorée). Les index sur la date, la catégorie et le compte sont créés à
+    la fermeture, après les insertions.
+    """
+
+    def __init__(self, path: str, account: str | None = None):
+        if os.path.exists(path):
+            os.remove(path)
+        self.path = path
+        self.account = account
+        self.columns: list[str] | None = None
+        self.connection = sqlite3.connect(path)
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.account is not None and ACCOUNT_COLUMN not in df.columns:
+            df = df.assign(**{ACCOUNT_COLUMN: self.account})
+        create = self.columns is None
+        if create:
+            self.columns = list(df.columns)
+        elif list(df.columns) != self.columns:
+            df = df.reindex(columns=self.columns)
+        columns = [sqlite_column(df[column]) for column in self.columns]
+        if create:
+            definitions = ", ".join(
+                f"{_quote(column)} {sql_type}"
+                for column, (sql_type, _) in zip(self.columns, columns)
+            )
+            self.connection.execute(
+                f"CREATE TABLE {_quote(SQLITE_TABLE)} ({definitions})"
+            )
+        names = ", ".join(_quote(column) for column in self.columns)
+        placeholders = ", ".join("?" for _ in self.columns)
+        self.connection.executemany(
+            f"INSERT INTO {_quote(SQLITE_TABLE)} ({names}) VALUES ({placeholders})",
+            zip(*(values for _, values in columns)),
+        )
+
+    def close(self, sheet_name: str) -> None:
+        for column in SQLITE_INDEXED_COLUMNS:
+            if column in (self.columns or []):
+                self.connection.execute(
+                    f"CREATE INDEX {_quote('idx_' + column)} "
+                    f"ON {_quote(SQLITE_TABLE)} ({_quote(column)})"
+                )
+        self.connection.commit()
+        self.connection.close()
+
+
+def create_sink(output_format: str, path: str, account: str | None = None):
+    """
+    Crée la sortie d'un format de OUTPUT_FORMATS. Chaque sortie reçoit les
+    blocs via `write(df)` puis `close(nom de feuille)`.
+    """
+    if output_format == "xlsx":
+        return ExcelChunkSink(path)
+    if output_format == "csv":
+        return CsvChunkSink(path)
+    if output_format == "parquet":
+        return ParquetSink(path)
+    if output_format == "sqlite":
+        return SqliteSink(path, account)
+    raise ValueError(
+        f"Format de sortie inconnu: {output_format} "
+        f"(attendu: {', '.join(OUTPUT_FORMATS)})"
+    )
+
+
+def infer_output_format(output_file: str | None) -> str:
+    """
+    Format déduit de l'extension de `output_file` (xlsx par défaut).
+    """
+    extension = os.path.splitext(output_file or "")[1].lower().lstrip(".")
+    return extension if extension in OUTPUT_FORMATS else "xlsx"
+
+
+def output_path(path: str, output_format: str) -> str:
+    """
+    Chemin de sortie pour un format : l'extension d'un format connu est
+    remplacée par celle de `output_format` (ajoutée sinon).
+    """
+    root, extension = os.path.splitext(path)
+    extension = extension.lower().lstrip(".")
+    if extension == output_format:
+        return path
+    if extension not in OUTPUT_FORMATS:
+        root = path
+    return f"{root}.{output_format}"
+
+
+def write_output(
+    df: pd.DataFrame,
+    path: str,
+    output_format: str,
+    sheet_name: str,
+    account: str | None = None,
+) -> str:
+    """
+    Écrit tout un DataFrame dans un format de sortie. Retourne le chemin.
+    """
+    sink = create_sink(output_format, path, account)
+    sink.write(df)
+    sink.close(sheet_name)
+    return path
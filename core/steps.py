@@ -2,71 +2,141 @@
 
 import re
 import unicodedata
+from typing import NamedTuple
 
+import numpy as np
 import pandas as pd
 
-from .categories import build_category_tree_from_csv
+from .categories import build_category_index_from_csv
 from .config import operation_types
-from .excel_styles import apply_styles
-from .naming import get_output_filename_and_period
+from .excel_writer import StreamingExcelWriter
+from .naming import (
+    build_sheet_name,
+    get_nom_compte,
+    get_output_filename_and_period,
+    parse_filename,
+)
+from .schema import MINIMAL_SCHEMA, resolve_schema  # noqa: F401
+from .sinks import write_output
+from .text import normalize_text as _normalize_text
+
+
+def _build_op_type_matcher(
+    op_types: list[str],
+) -> tuple[re.Pattern, dict[str, tuple[int, str]]]:
+    """
+    Compile tous les types d'opérations en une seule alternation de
+    littéraux, sans groupe ni lookahead : le moteur saute directement aux
+    positions où un type peut commencer, au lieu de parcourir la description
+    une fois par type.
+    Retourne (motif compilé, dict motif normalisé -> (rang dans la liste,
+    type d'opération)).
+    """
+    lookup: dict[str, tuple[int, str]] = {}
+    for op_type in op_types:
+        normalized = _normalize_text(op_type)
+        if normalized not in lookup:
+            lookup[normalized] = (len(lookup), op_type)
+    pattern = re.compile("|".join(re.escape(normalized) for normalized in lookup))
+    return pattern, lookup
+
+
+_OP_TYPE_MATCHER, _OP_TYPE_LOOKUP = _build_op_type_matcher(operation_types)
 
-MINIMAL_SCHEMA = {
-    "Description": ["Description", "Libellé", "Libelle"],
-    "Montant": ["Montant", "Montant (EUR)"],
-    "Valeur": ["Valeur", "Date"],
-}
+
+def _find_operation_type(description: str) -> str | None:
+    """
+    Premier type de la liste présent dans une description normalisée (même
+    priorité que l'ancienne boucle motif par motif).
+    Chaque recherche reprend juste après le début de la précédente : les
+    occurrences qui se chevauchent sont toutes vues, et à une même position
+    l'alternation retient déjà le type le plus prioritaire.
+    """
+    best = None
+    match = _OP_TYPE_MATCHER.search(description)
+    while match:
+        found = _OP_TYPE_LOOKUP[match.group()]
+        if best is None or found < best:
+            best = found
+            if best[0] == 0:
+                break
+        match = _OP_TYPE_MATCHER.search(description, match.start() + 1)
+    return best[1] if best else None
 
 
-def _normalize_text(value: str) -> str:
+NORMALIZED_DESCRIPTION = "Description normalisée"
+
+# Cache borné {description brute: description normalisée}, partagé entre les
+# appels (blocs d'un même fichier, fichiers d'un même lot). Vidé quand plein.
+_NORMALIZED_CACHE: dict[str, str] = {}
+_NORMALIZED_CACHE_MAX_SIZE = 200_000
+
+# Table str.translate des caractères combinants rencontrés (accents…),
+# complétée au fil de l'eau avec les caractères non ASCII vus.
+_COMBINING_TABLE: dict[int, None] = {}
+_CHECKED_CHARACTERS: set[str] = set()
+
+
+def _normalize_series(values: pd.Series) -> pd.Series:
+    """
+    Version colonne de `_normalize_text` (mêmes étapes, mêmes résultats),
+    avec les méthodes `.str` de pandas.
+    """
+    normalized = values.str.normalize("NFKD")
+    non_ascii = normalized[~normalized.str.isascii()]
+    if not non_ascii.empty:
+        new_characters = set("".join(non_ascii)) - _CHECKED_CHARACTERS
+        for character in new_characters:
+            if unicodedata.combining(character):
+                _COMBINING_TABLE[ord(character)] = None
+        _CHECKED_CHARACTERS.update(new_characters)
+        normalized = normalized.str.translate(_COMBINING_TABLE)
+    normalized = normalized.str.upper()
+    normalized = normalized.str.replace(r"\s+", " ", regex=True)
+    return normalized.str.strip()
+
+
+def normalize_descriptions(descriptions: pd.Series) -> pd.Series:
     """
-    Normalise le texte pour faciliter la recherche de motifs.
-    1. Décompose les caractères Unicode (NFKD)
-    2. Supprime les accents
-    3. Met en majuscules
-    4. Remplace les espaces multiples par un espace simple
-    5. Supprime les espaces en début et fin
+    Normalise une colonne de descriptions.
+    Les descriptions bancaires se répètent beaucoup : seules les valeurs
+    distinctes absentes du cache sont normalisées.
     """
-    normalized = unicodedata.normalize("NFKD", str(value))
-    normalized = "".join(
-        character for character in normalized if not unicodedata.combining(character)
+    codes, uniques = pd.factorize(descriptions.fillna("").astype(str))
+    uniques = pd.Series(uniques, dtype=object)
+    normalized_uniques = uniques.map(_NORMALIZED_CACHE).astype(object)
+
+    missing = normalized_uniques.isna()
+    if missing.any():
+        computed = _normalize_series(uniques[missing])
+        normalized_uniques[missing] = computed
+        if len(_NORMALIZED_CACHE) + len(computed) > _NORMALIZED_CACHE_MAX_SIZE:
+            _NORMALIZED_CACHE.clear()
+        _NORMALIZED_CACHE.update(zip(uniques[missing], computed))
+
+    return pd.Series(
+        normalized_uniques.to_numpy()[codes], index=descriptions.index, dtype=object
     )
-    normalized = normalized.upper()
-    normalized = re.sub(r"\s+", " ", normalized)
-    return normalized.strip()
 
 
-_OP_TYPE_PATTERNS = [
-    (op_type, re.compile(re.escape(_normalize_text(op_type))))
-    for op_type in operation_types
-]
+def _normalized_descriptions(df: pd.DataFrame) -> pd.Series:
+    """
+    Retourne la colonne normalisée si l'étape de normalisation a déjà tourné,
+    sinon la calcule.
+    """
+    if NORMALIZED_DESCRIPTION in df.columns:
+        return df[NORMALIZED_DESCRIPTION]
+    return normalize_descriptions(df["Description"])
 
 
 def validate_schema(df: pd.DataFrame) -> pd.DataFrame:
     """
     Valide le schéma minimal attendu et renomme les colonnes équivalentes si besoin.
+    Modifie `df` en place et le retourne.
     """
-    missing = []
-    rename_map = {}
-
-    for expected, aliases in MINIMAL_SCHEMA.items():
-        if expected in df.columns:
-            continue
-        found = next((alias for alias in aliases if alias in df.columns), None)
-        if found:
-            rename_map[found] = expected
-        else:
-            missing.append(f"{expected} (attendu: {', '.join(aliases)})")
-
-    if missing:
-        existing = ", ".join(df.columns)
-        raise ValueError(
-            "Schéma invalide: colonnes manquantes: "
-            + "; ".join(missing)
-            + f". Colonnes trouvées: {existing}"
-        )
-
+    rename_map = resolve_schema(df.columns)
     if rename_map:
-        df = df.rename(columns=rename_map)
+        df.rename(columns=rename_map, inplace=True)
 
     df["Description"] = df["Description"].fillna("").astype(str)
 
@@ -89,70 +159,112 @@ def step1_clean_columns(df: pd.DataFrame) -> pd.DataFrame:
         "Adresse contrepartie",
         "communication structurée",
     ]
-    df = df.drop(columns=columns_to_remove, errors="ignore")
+    # En place : écarte notamment 'Date' avant que 'Valeur' ne soit renommée
+    df.drop(columns=columns_to_remove, errors="ignore", inplace=True)
     return df
 
 
+# Colonnes créées vides à l'étape 2 (remplies ensuite ou à la main dans Excel)
+NEW_COLUMNS = [
+    "Type d’opération",
+    "Projet",
+    "Catégorie",
+    "Couvert par le subside",
+    "Lien document",
+    "Pièce n°",
+    "Remarque",
+]
+
+
+def _empty_column(length: int) -> pd.Categorical:
+    """
+    Colonne de "" peu coûteuse : une seule catégorie et un code int8 par ligne
+    (au lieu d'une chaîne Python par ligne).
+    """
+    return pd.Categorical.from_codes(np.zeros(length, dtype=np.int8), categories=[""])
+
+
+def _as_category(values: pd.Series) -> pd.Series:
+    """
+    Colonne produite par le pipeline avec peu de valeurs distinctes (types
+    d'opération, contreparties, catégories) : stockée en `category`, chaque
+    valeur distincte n'est gardée qu'une fois.
+    """
+    return values.astype("category")
+
+
+def _as_text(values: pd.Series) -> pd.Series:
+    """
+    Valeurs d'une colonne `category` sous forme d'objets (les méthodes `.str`
+    et l'affectation de nouvelles valeurs ne passent pas par les catégories).
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.astype(object)
+    return values
+
+
 def step2_create_new_columns(df: pd.DataFrame) -> pd.DataFrame:
     # Étape 2 : Création des nouvelles colonnes
-    df["Type d’opération"] = ""
-    df["Projet"] = ""
-    df["Catégorie"] = ""
-    df["Couvert par le subside"] = ""
-    df["Lien document"] = ""
-    df["Pièce n°"] = ""
-    df["Remarque"] = ""
+    for column in NEW_COLUMNS:
+        df[column] = _empty_column(len(df))
     return df
 
 
 def step3_rename_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Étape 3 : Renommage des colonnes existantes et conversion des types.
+    Étape 3 : Renommage des colonnes existantes (la date et le montant sont
+    déjà typés à la lecture, voir core.ingest). Modifie `df` en place.
     """
-    df = df.rename(
+    df.rename(
         columns={
             "Numéro de l'extrait": "N°extrait",
             "Valeur": "Date",
             "Nom contrepartie": "Contrepartie",
             "Communication libre": "Objet de l’opération",
-        }
+        },
+        inplace=True,
     )
-    df["Date"] = pd.to_datetime(df["Date"], dayfirst=True, errors="coerce")
-    df["Montant"] = (
-        df["Montant"]
-        .astype(str)  # au cas où ce serait déjà un float
-        .str.replace(",", ".", regex=False)  # remplacer virgule par un point
-        .str.replace("\u00a0", "", regex=True)  # enlever espaces insécables
-    )
-    df["Montant"] = pd.to_numeric(df["Montant"], errors="coerce")
     return df
 
 
+# Ordre des colonnes après l'étape 4 ('Description' est retirée à l'étape 7)
+COLUMNS_ORDER = [
+    "N°extrait",
+    "Date",
+    "Type d’opération",
+    "Contrepartie",
+    "Objet de l’opération",
+    "Catégorie",
+    "Projet",
+    "Montant",
+    "Couvert par le subside",
+    "Pièce n°",
+    "Lien document",
+    "Remarque",
+    "Description",
+]
+
+
 def step4_reorder_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
     Étape 4 : Réorganisation de l'ordre des colonnes selon un ordre prédéfini.
     """
-    columns_order = [
-        "N°extrait",
-        "Date",
-        "Type d’opération",
-        "Contrepartie",
-        "Objet de l’opération",
-        "Catégorie",
-        "Projet",
-        "Montant",
-        "Couvert par le subside",
-        "Pièce n°",
-        "Lien document",
-        "Remarque",
-        "Description",
-    ]
     # Éviter les KeyError si certaines colonnes n’existent pas
-    columns_order = [col for col in columns_order if col in df.columns]
+    columns_order = [col for col in COLUMNS_ORDER if col in df.columns]
     df = df[columns_order]
     return df
 
 
+def step4b_normalize_description(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Étape 4b : Calcule une fois la colonne 'Description normalisée', réutilisée
+    par les étapes 5 et 6 puis supprimée à l'étape 7.
+    """
+    if "Description" in df.columns:
+        df[NORMALIZED_DESCRIPTION] = normalize_descriptions(df["Description"])
+    return df
+
+
 # --------------------------------------------------------------------------------------------------
 # --------------------------------------------------------------------------------------------------
 # --------------------------------------------------------------------------------------------------
@@ -167,169 +279,266 @@ def step5_find_operation_type(df: pd.DataFrame) -> pd.DataFrame:
     if "Description" not in df.columns:
         return df
 
-    normalized_descriptions = df["Description"].apply(_normalize_text)
-
-    def match_op_type(normalized_description: str) -> str | None:
-        for op_type, pattern in _OP_TYPE_PATTERNS:
-            if pattern.search(normalized_description):
-                return op_type
-        return None
+    # La regex ne tourne que sur les descriptions distinctes
+    codes, uniques = pd.factorize(_normalized_descriptions(df))
 
-    df.loc[:, "Type d’opération"] = normalized_descriptions.apply(match_op_type)
+    op_types = np.array(
+        [_find_operation_type(description) for description in uniques], dtype=object
+    )[codes]
+    df["Type d’opération"] = _as_category(
+        pd.Series(op_types, index=df.index, dtype=object)
+    )
     return df
 
 
+class _ExtractionRule(NamedTuple):
+    """
+    Règle de remplissage de 'Contrepartie' / 'Objet de l’opération'.
+    - prefixes : débuts possibles de la description normalisée.
+    - contrepartie / objet : valeur fixe, ou motif dont le groupe 1 est extrait
+      de la description brute (objet=None : on garde l'objet existant).
+    - *_fallback : valeur si le motif ne trouve rien (ou un texte vide).
+    - objet_if_blank : n'écrit l'objet que s'il est vide.
+    - requires : motif que la description brute doit contenir.
+    """
+
+    prefixes: tuple[str, ...]
+    contrepartie: str | re.Pattern
+    objet: str | re.Pattern | None
+    contrepartie_fallback: str | None = None
+    objet_fallback: str | None = None
+    objet_if_blank: bool = False
+    requires: re.Pattern | None = None
+
+
+# Zone entre "HEURES " (1re occurrence) et le " AVEC" qui suit
+_PAIEMENT_COUNTERPART = re.compile(r"^(?:(?!HEURES ).)*HEURES (.*?) AVEC", re.DOTALL)
+_PAIEMENT_HAS_COUNTERPART = re.compile(r"^(?:(?!HEURES ).)*HEURES .*? AVEC", re.DOTALL)
+
+# Règles évaluées dans l'ordre, la première qui s'applique l'emporte.
+_EXTRACTION_RULES = [
+    # CONSOMMATION ou FORFAIT : frais du compte
+    _ExtractionRule(
+        prefixes=("CONSOMMATION", "FORFAIT"),
+        contrepartie="COMPTE D'ENTREPRISE CBC",
+        objet="Frais bancaires",
+    ),
+    # DECOMPTE : frais de la carte
+    _ExtractionRule(
+        prefixes=("DECOMPTE",),
+        contrepartie="MASTERCARD BUSINESS BLUE CBC",
+        objet="Frais bancaires",
+    ),
+    # DOMICILIATION : créancier entre "CREANCIER       : " et "REF.",
+    # objet = ce qui vient après "COMMUNICATION   :"
+    _ExtractionRule(
+        prefixes=("DOMICILIATION",),
+        contrepartie=re.compile(r"CREANCIER       : (.*?)REF\.", re.DOTALL),
+        objet=re.compile(r"COMMUNICATION   :(.*)", re.DOTALL),
+        contrepartie_fallback="(Contrepartie DOM introuvable)",
+        objet_fallback="(Communication DOM introuvable)",
+    ),
+    # PAIEMENT* avec "HEURES ... AVEC" : le commerçant, objet "Achats" par défaut
+    _ExtractionRule(
+        prefixes=("PAIEMENT",),
+        contrepartie=_PAIEMENT_COUNTERPART,
+        objet="Achats",
+        objet_if_blank=True,
+        requires=_PAIEMENT_HAS_COUNTERPART,
+    ),
+    _ExtractionRule(
+        prefixes=("PAIEMENT",),
+        contrepartie="(Paiement non géré)",
+        objet=None,
+    ),
+    # Cas par défaut
+    _ExtractionRule(
+        prefixes=("",),
+        contrepartie="(Non géré)",
+        objet="(Non géré)",
+        objet_if_blank=True,
+    ),
+]
+
+
+def _text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """
+    Retourne la colonne sous forme de texte, les valeurs non textuelles
+    (NaN, nombres…) étant remplacées par "".
+    """
+    if column not in df.columns:
+        return pd.Series("", index=df.index, dtype=object)
+    values = _as_text(df[column])
+    if not (
+        pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)
+    ):
+        return pd.Series("", index=df.index, dtype=object)
+    return values.where(values.str.len().notna(), "").astype(object)
+
+
+def _rule_values(
+    spec: str | re.Pattern, descriptions: pd.Series, fallback: str | None
+) -> pd.Series:
+    """
+    Calcule la valeur d'une règle pour les descriptions ciblées.
+    """
+    if isinstance(spec, str):
+        return pd.Series(spec, index=descriptions.index, dtype=object)
+    extracted = descriptions.str.extract(spec, expand=False).str.strip()
+    if fallback is not None:
+        extracted = extracted.where(extracted.fillna("") != "", fallback)
+    return extracted.astype(object)
+
+
 def step6_fill_contrepartie_ET_objFact(df: pd.DataFrame) -> pd.DataFrame:
     """
     Étape 6 :
     1) Si 'Contrepartie' est vide (ou juste des espaces),
-    alors on regarde la 'Description' (et éventuellement 'Type d’opération')
-    pour remplir 'Contrepartie' et 'Objet de l’opération'.
+    alors on regarde la 'Description' pour remplir 'Contrepartie' et
+    'Objet de l’opération' selon la première règle de `_EXTRACTION_RULES`
+    qui s'applique.
     2) Sinon, on laisse tout inchangé.
+    Chaque règle est appliquée en une passe sur les lignes qu'elle concerne.
     """
+    contrepartie = _text_column(df, "Contrepartie")
+    objet = _text_column(df, "Objet de l’opération")
+    descriptions = _text_column(df, "Description")
+    normalized_descriptions = _normalized_descriptions(df)
+
+    pending = contrepartie.str.strip() == ""
+    blank_objet = objet.str.strip() == ""
+
+    for rule in _EXTRACTION_RULES:
+        mask = pending & normalized_descriptions.str.startswith(rule.prefixes)
+        if rule.requires is not None:
+            mask &= descriptions.str.contains(rule.requires)
+        if not mask.any():
+            continue
+        pending &= ~mask
+        targeted = descriptions[mask]
 
-    def fill_contrepartie_et_objet(row):
-        """
-        Remplit 'Contrepartie' et 'Objet de l’opération' selon la 'Description'.
-        1) Si 'Contrepartie' est vide (ou juste des espaces),
-        alors on regarde la 'Description' (et éventuellement 'Type d’opération')
-        pour remplir 'Contrepartie' et 'Objet de l’opération'.
-        2) Sinon, on laisse tout inchangé.
-        Retourne un tuple (Contrepartie, Objet de l’opération).
-        """
-        # On part des valeurs existantes
-        current_contrepartie = row.get("Contrepartie", "")
-        current_objet = row.get("Objet de l’opération", "")
-
-        # Sécurité : si ce ne sont pas des chaînes de caractères
-        if not isinstance(current_contrepartie, str):
-            current_contrepartie = ""
-        if not isinstance(current_objet, str):
-            current_objet = ""
-
-        # Vérifie si Contrepartie est vide ou juste espaces
-        if current_contrepartie.strip() == "":
-            desc = row.get("Description", "")
-            normalized_desc = _normalize_text(desc)
-            # éventuellement, si tu as besoin du type
-            # op_type = row.get("Type d'opération", "")
-
-            # -- CAS 1 : CONSOMMATION ou FORFAIT
-            #    => Contrepartie = "COMPTE D'ENTREPRISE CBC"
-            #    => Objet de l’opération = "Frais bancaires"
-            if normalized_desc.startswith("CONSOMMATION") or normalized_desc.startswith(
-                "FORFAIT"
-            ):
-                current_contrepartie = "COMPTE D'ENTREPRISE CBC"
-                current_objet = "Frais bancaires"
-
-            # -- CAS 2 : DECOMPTE
-            #    => Contrepartie = "MASTERCARD BUSINESS BLUE CBC"
-            #    => Objet = "Frais bancaires"
-            elif normalized_desc.startswith("DECOMPTE"):
-                current_contrepartie = "MASTERCARD BUSINESS BLUE CBC"
-                current_objet = "Frais bancaires"
-
-            # -- CAS 3 : DOMICILIATION
-            #    => Contrepartie = ce qui est entre "CREANCIER       : " et "REF."
-            #    => Objet de l’opération = ce qui vient après "COMMUNICATION   :"
-            elif normalized_desc.startswith("DOMICILIATION"):
-                part_creancier = ""
-                part_comm = ""
-
-                # Chercher la zone CREANCIER
-                marker_creancier = "CREANCIER       : "
-                marker_ref = "REF."
-                start_pos = desc.find(marker_creancier)
-                if start_pos != -1:
-                    start_creancier = start_pos + len(marker_creancier)
-                    end_creancier = desc.find(marker_ref, start_creancier)
-                    if end_creancier != -1:
-                        part_creancier = desc[start_creancier:end_creancier].strip()
-
-                # Chercher la zone COMMUNICATION
-                marker_comm = "COMMUNICATION   :"
-                pos_comm = desc.find(marker_comm)
-                if pos_comm != -1:
-                    # Tout ce qui vient après "COMMUNICATION   :"
-                    part_comm = desc[pos_comm + len(marker_comm) :].strip()
-
-                if part_creancier:
-                    current_contrepartie = part_creancier
-                else:
-                    current_contrepartie = "(Contrepartie DOM introuvable)"
-
-                if part_comm:
-                    current_objet = part_comm
-                else:
-                    current_objet = "(Communication DOM introuvable)"
-
-            # -- CAS 4 : PAIEMENT*
-            #    => On récupère la partie entre "HEURES " et " AVEC"
-            elif normalized_desc.startswith("PAIEMENT"):
-                if "HEURES " in desc and " AVEC" in desc:
-                    start = desc.index("HEURES ") + len("HEURES ")
-                    end = desc.index(" AVEC", start)
-                    current_contrepartie = desc[start:end].strip()
-
-                    # Exemple : on peut décider de mettre un objet par défaut
-                    if current_objet.strip() == "":
-                        current_objet = "Achats"
-
-                else:
-                    current_contrepartie = "(Paiement non géré)"
-
-            else:
-                # Cas par défaut
-                current_contrepartie = "(Non géré)"
-                # On peut décider de laisser l'Objet tel quel ou le modifier
-                if current_objet.strip() == "":
-                    current_objet = "(Non géré)"
-
-        # On retourne le tuple (Contrepartie, Objet)
-        return (current_contrepartie, current_objet)
-
-    # On applique la fonction à chaque ligne, et on répartit dans 2 colonnes
-    df["Contrepartie"], df["Objet de l’opération"] = zip(
-        *df.apply(fill_contrepartie_et_objet, axis=1)
-    )
+        contrepartie[mask] = _rule_values(
+            rule.contrepartie, targeted, rule.contrepartie_fallback
+        )
+        if rule.objet is not None:
+            objet_mask = mask & blank_objet if rule.objet_if_blank else mask
+            objet[objet_mask] = _rule_values(
+                rule.objet, descriptions[objet_mask], rule.objet_fallback
+            )
+
+    df["Contrepartie"] = _as_category(contrepartie)
+    df["Objet de l’opération"] = objet
 
     return df
 
 
 def step7_drop_description(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Étape 7 : Supprime la colonne 'Description' si elle existe encore.
+    Étape 7 : Supprime les colonnes 'Description' et 'Description normalisée'
+    si elles existent encore.
     """
-    df = df.drop(columns=["Description"], errors="ignore")
+    df = df.drop(columns=["Description", NORMALIZED_DESCRIPTION], errors="ignore")
     return df
 
 
-def step8_fill_categorie(df, category_tree_file):
+CATEGORY_RULE_COLUMN = "Règle catégorie"
+
+
+def _apply_category_rules(df: pd.DataFrame, category_rules) -> tuple:
+    """
+    Catégorie et règle retenues pour chaque ligne (None si aucune règle ne
+    correspond). Les couples (contrepartie, objet) se répètent beaucoup :
+    chaque couple distinct n'est évalué qu'une fois.
+    """
+    contrepartie = normalize_descriptions(_text_column(df, "Contrepartie"))
+    objet = normalize_descriptions(_text_column(df, "Objet de l’opération"))
+    codes, uniques = pd.factorize(contrepartie + "\x1f" + objet)
+    matches = [
+        category_rules.match(*pair.split("\x1f", 1)) for pair in uniques.tolist()
+    ]
+    rules = pd.Series(matches, dtype=object).to_numpy()[codes]
+    categories = [rule.category if rule else None for rule in rules]
+    return (
+        pd.Series(categories, index=df.index, dtype=object),
+        pd.Series(rules, index=df.index, dtype=object),
+    )
+
+
+def step8_fill_categorie(
+    df, category_tree_file=None, category_index=None, category_rules=None
+):
     """
-    Étape 8 : Associer des catégories à chaque ligne selon le type d'opération.
-    La contrepartie ou l'objet de l'opération.
+    Étape 8 : Associer des catégories à chaque ligne.
+    1) Règles par mot-clé / expression régulière sur la contrepartie et
+       l'objet (`category_rules`, voir core.rules), par ordre de priorité.
+    2) Sinon, catégorie du type d'opération (fichier des catégories).
+    3) Sinon, 'D-Autres' (montant négatif) ou 'R-Autres' ; les lignes sans
+       type d'opération ni règle restent vides.
+    `category_index` permet de réutiliser un index déjà chargé (traitement par
+    blocs) au lieu de relire `category_tree_file`.
+    Si `category_rules.explain` est vrai, la colonne 'Règle catégorie' indique
+    l'origine de chaque catégorie.
     """
-    # Charger l'arbre de catégories
-    tree = build_category_tree_from_csv(category_tree_file)
+    # Charger l'index {opération: catégorie}
+    if category_index is None:
+        category_index = build_category_index_from_csv(category_tree_file)
+    index = category_index
 
-    # Associer les catégories
-    def assign_category(row):
-        operation = row.get("Type d’opération", "") or row.get("Type d'opération", "")
-        if not operation:
-            return None
-        category = tree.search(operation)
-        if not category:
-            # Déterminer si c'est une dépense (montant négatif) ou une recette
-            montant = row.get("Montant", 0)
-            if montant < 0:
-                return "D-Autres"
-            else:
-                return "R-Autres"
-        return category
+    if "Type d’opération" in df.columns:
+        operations = df["Type d’opération"]
+    elif "Type d'opération" in df.columns:
+        operations = df["Type d'opération"]
+    else:
+        operations = pd.Series(None, index=df.index, dtype=object)
+    has_operation = operations.notna() & (operations.astype(object) != "")
 
-    # Appliquer la fonction sur chaque ligne
-    df["Catégorie"] = df.apply(assign_category, axis=1)
+    if "Montant" in df.columns:
+        is_expense = pd.to_numeric(df["Montant"], errors="coerce").lt(0)
+    else:
+        is_expense = pd.Series(False, index=df.index)
+    fallback = pd.Series("R-Autres", index=df.index, dtype=object).mask(
+        is_expense, "D-Autres"
+    )
+
+    by_operation = operations.astype(object).map(index).astype(object)
+    categories = by_operation.where(by_operation.notna(), fallback)
+    categories = categories.where(has_operation, None)
+
+    if category_rules is None:
+        df["Catégorie"] = _as_category(categories)
+        return df
+
+    rule_categories, rules = _apply_category_rules(df, category_rules)
+    df["Catégorie"] = _as_category(
+        rule_categories.where(rule_categories.notna(), categories)
+    )
+    if category_rules.explain:
+        origins = pd.Series(None, index=df.index, dtype=object)
+        origins = origins.mask(has_operation, "défaut (D-Autres / R-Autres)")
+        origins = origins.mask(
+            has_operation & by_operation.notna(),
+            "type d’opération : " + operations.astype(object).astype(str),
+        )
+        origins = origins.mask(
+            rules.notna(), rules.map(lambda rule: rule and rule.describe())
+        )
+        df[CATEGORY_RULE_COLUMN] = origins
+    return df
+
+
+def prepare_export(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Derniers ajustements avant écriture : les types d'opération non trouvés
+    sont marqués 'Non trouvé'.
+    """
+    if "Type d’opération" in df.columns:
+        op_types = df["Type d’opération"]
+        if (
+            isinstance(op_types.dtype, pd.CategoricalDtype)
+            and "Non trouvé" not in op_types.cat.categories
+        ):
+            op_types = op_types.cat.add_categories("Non trouvé")
+        df["Type d’opération"] = op_types.fillna("Non trouvé")
     return df
 
 
@@ -343,7 +552,8 @@ def step9_export_excel(
     1) Génère le nom du fichier Excel à partir du CSV d’entrée (via naming.py)
        et de la période calculée dans le df.
     2) Détermine aussi le nom de feuille (sheet_name) en se basant sur la période.
-    3) Exporte le df en Excel.
+    3) Exporte le df en Excel (core.excel_writer), formats de colonnes
+       appliqués à l’écriture.
     """
     if output_file:
         out_file_name = output_file
@@ -351,22 +561,34 @@ def step9_export_excel(
     else:
         out_file_name, period = get_output_filename_and_period(input_file, df)
 
-    # Nettoyons la 'period' pour qu’elle soit valide en nom de sheet (éviter [] ou /)
-    sheet_name = period.replace("[", "").replace("]", "")
-    sheet_name = sheet_name.replace("/", ".").replace("\\", ".")
-    sheet_name = sheet_name[
-        :31
-    ]  # Excel limite souvent les noms de feuille à 31 caractères max
-
-    if "Type d’opération" in df.columns:
-        df["Type d’opération"] = df["Type d’opération"].fillna("Non trouvé")
+    sheet_name = build_sheet_name(period)
+    df = prepare_export(df)
 
-    df.to_excel(
-        out_file_name, index=False, sheet_name=sheet_name, engine="xlsxwriter"
-    )  # utiliser openpyxl ou xlsxwriter
-    # Appliquer les styles Excel
-    apply_styles(out_file_name, date_column=2, montant_column=8)
+    # Écriture en mémoire constante, valeurs natives converties par colonne ;
+    # les formats sont posés sur les colonnes : pas de relecture openpyxl.
+    with StreamingExcelWriter(out_file_name) as writer:
+        writer.add_sheet(sheet_name, df.columns)
+        writer.write_frame(df)
 
     print(f"Fichier Excel généré : {out_file_name} (feuille : {sheet_name})")
 
     return df
+
+
+def step9_export_output(
+    df: pd.DataFrame,
+    input_file: str,
+    output_file: str,
+    output_format: str,
+) -> pd.DataFrame:
+    """
+    Étape 9 pour les autres formats de sortie (parquet, csv, sqlite ; voir
+    core.sinks) : mêmes données que l'export Excel, la période servant de
+    nom de feuille et le compte de colonne 'Compte' (SQLite).
+    """
+    _, period = get_output_filename_and_period(input_file, df)
+    df = prepare_export(df)
+    account = get_nom_compte(parse_filename(input_file)[0])
+    write_output(df, output_file, output_format, build_sheet_name(period), account)
+    print(f"Fichier {output_format} généré : {output_file}")
+    return df
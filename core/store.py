@@ -0,0 +1,311 @@
+# store.py
+
+import argparse
+import os
+import sqlite3
+import time
+
+import pandas as pd
+
+from .config import DEFAULT_STORE_FILE
+from .naming import ACCOUNT_COLUMN, get_nom_compte, parse_filename
+from .sinks import _quote, sqlite_column
+from .steps import normalize_descriptions
+from .text import normalize_text
+
+STORE_TABLE = "transactions"
+FINGERPRINT_COLUMN = "Empreinte"
+NORMALIZED_COUNTERPARTY = "Contrepartie normalisée"
+
+# Colonnes de l'historique et leur type SQLite. Les colonnes filtrées par
+# égalité ou préfixe ignorent la casse (NOCASE), ce qui permet aussi à
+# SQLite d'utiliser leurs index pour `LIKE 'préfixe%'`.
+STORE_COLUMNS = {
+    FINGERPRINT_COLUMN: "TEXT PRIMARY KEY",
+    ACCOUNT_COLUMN: "TEXT NOT NULL COLLATE NOCASE",
+    "Numéro de compte": "TEXT",
+    "N°extrait": "INTEGER",
+    "Date": "TEXT",
+    "Type d’opération": "TEXT COLLATE NOCASE",
+    "Contrepartie": "TEXT",
+    "Objet de l’opération": "TEXT",
+    "Catégorie": "TEXT COLLATE NOCASE",
+    "Montant": "REAL",
+    NORMALIZED_COUNTERPARTY: "TEXT",
+    "Fichier": "TEXT",
+}
+# Colonnes mises à jour quand une transaction déjà connue est reconvertie
+# (nouvelles catégories, nouvelle version du pipeline)
+_UPDATED_COLUMNS = [
+    "Type d’opération",
+    "Contrepartie",
+    "Objet de l’opération",
+    "Catégorie",
+    NORMALIZED_COUNTERPARTY,
+]
+STORE_INDEXES = {
+    "idx_date": ["Date"],
+    "idx_compte_date": [ACCOUNT_COLUMN, "Date"],
+    "idx_type": ["Type d’opération"],
+    "idx_categorie": ["Catégorie"],
+    "idx_contrepartie": [NORMALIZED_COUNTERPARTY],
+}
+# Colonnes affichées par `cbc-to-excel query`
+QUERY_COLUMNS = [
+    ACCOUNT_COLUMN,
+    "Date",
+    "Type d’opération",
+    "Contrepartie",
+    "Objet de l’opération",
+    "Catégorie",
+    "Montant",
+]
+
+
+class TransactionStore:
+    """
+    Historique local (SQLite) de toutes les transactions converties, tous
+    comptes confondus, dédoublonné sur l'empreinte de la transaction
+    (voir ledger.compute_fingerprints) et indexé sur la date, le compte, le
+    type d'opération, la catégorie et la contrepartie.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_FILE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Attente du verrou : plusieurs conversions d'un lot écrivent ici
+        self.connection = sqlite3.connect(path, timeout=30)
+        columns = ", ".join(
+            f"{_quote(column)} {definition}"
+            for column, definition in STORE_COLUMNS.items()
+        )
+        with self.connection:
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {STORE_TABLE} ({columns})"
+            )
+            for name, indexed in STORE_INDEXES.items():
+                self.connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON {STORE_TABLE} "
+                    f"({', '.join(_quote(column) for column in indexed)})"
+                )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def count(self) -> int:
+        return self.connection.execute(
+            f"SELECT COUNT(*) FROM {STORE_TABLE}"
+        ).fetchone()[0]
+
+    def add(
+        self,
+        df: pd.DataFrame,
+        fingerprints: pd.Series,
+        account_number: str,
+        source_file: str = "",
+    ) -> int:
+        """
+        Ajoute les transactions enrichies (après l'étape 8). Une transaction
+        déjà présente (même empreinte) n'est pas dupliquée : ses colonnes
+        enrichies sont mises à jour. Retourne le nombre de nouvelles lignes.
+        """
+        rows = pd.DataFrame(index=df.index)
+        rows[FINGERPRINT_COLUMN] = fingerprints.loc[df.index]
+        rows[ACCOUNT_COLUMN] = get_nom_compte(account_number)
+        rows["Numéro de compte"] = account_number
+        for column in STORE_COLUMNS:
+            if column in df.columns:
+                rows[column] = df[column]
+        if "Contrepartie" in df.columns:
+            counterparties = df["Contrepartie"].astype(object)
+            rows[NORMALIZED_COUNTERPARTY] = normalize_descriptions(
+                counterparties
+            ).where(counterparties.notna(), None)
+        rows["Fichier"] = os.path.basename(source_file)
+
+        values = {column: sqlite_column(rows[column])[1] for column in rows.columns}
+        names = ", ".join(_quote(column) for column in values)
+        placeholders = ", ".join("?" for _ in values)
+        updated = [column for column in _UPDATED_COLUMNS if column in values]
+        with self.connection:
+            # Lignes déjà connues ignorées : rowcount = nouvelles lignes
+            added = self.connection.executemany(
+                f"INSERT INTO {STORE_TABLE} ({names}) VALUES ({placeholders}) "
+                f"ON CONFLICT({_quote(FINGERPRINT_COLUMN)}) DO NOTHING",
+                zip(*values.values()),
+            ).rowcount
+            if updated:
+                # Puis colonnes enrichies des lignes connues, réécrites
+                # seulement si elles ont changé
+                assignments = ", ".join(f"{_quote(column)} = ?" for column in updated)
+                changed = " OR ".join(
+                    f"{_quote(column)} IS NOT ?" for column in updated
+                )
+                updated_values = [values[column] for column in updated]
+                self.connection.executemany(
+                    f"UPDATE {STORE_TABLE} SET {assignments} "
+                    f"WHERE {_quote(FINGERPRINT_COLUMN)} = ? AND ({changed})",
+                    zip(*updated_values, values[FINGERPRINT_COLUMN], *updated_values),
+                )
+        return added
+
+    def query(
+        self,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        account: str | None = None,
+        category: str | None = None,
+        counterparty: str | None = None,
+        operation_type: str | None = None,
+        limit: int | None = None,
+    ) -> pd.DataFrame:
+        """
+        Transactions filtrées, triées par date :
+        - `date_from` / `date_to` : bornes incluses, AAAA-MM-JJ ;
+        - `account` : nom du compte (config.cptsCBC), sans tenir compte de la
+          casse ;
+        - `category` : catégorie exacte, ou préfixe terminé par '*' (D-*) ;
+        - `operation_type` : début du type d'opération (DOMICILIATION) ;
+        - `counterparty` : début de la contrepartie (sans tenir compte de la
+          casse ni des accents).
+        """
+        conditions, params = [], []
+        if date_from:
+            conditions.append('"Date" >= ?')
+            params.append(date_from)
+        if date_to:
+            conditions.append('"Date" <= ?')
+            params.append(date_to)
+        if account:
+            conditions.append(f"{_quote(ACCOUNT_COLUMN)} = ?")
+            params.append(account)
+        if category:
+            if category.endswith("*"):
+                conditions.append('"Catégorie" LIKE ?')
+                params.append(category[:-1] + "%")
+            else:
+                conditions.append('"Catégorie" = ?')
+                params.append(category)
+        if operation_type:
+            conditions.append('"Type d’opération" LIKE ?')
+            params.append(operation_type + "%")
+        prefix = normalize_text(counterparty or "")
+        if prefix:
+            # Intervalle [préfixe, préfixe suivant[ : utilise idx_contrepartie
+            column = _quote(NORMALIZED_COUNTERPARTY)
+            conditions.append(f"{column} >= ? AND {column} < ?")
+            params.extend([prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)])
+
+        sql = (
+            f"SELECT {', '.join(_quote(column) for column in QUERY_COLUMNS)} "
+            f"FROM {STORE_TABLE}"
+        )
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += ' ORDER BY "Date", rowid'
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        df = pd.read_sql_query(sql, self.connection, params=params)
+        df["Date"] = pd.to_datetime(df["Date"], format="%Y-%m-%d")
+        return df
+
+
+def store_transactions(
+    df: pd.DataFrame,
+    fingerprints: pd.Series,
+    input_file: str,
+    store_path: str,
+) -> int:
+    """
+    Ajoute un export converti à l'historique `store_path`.
+    Retourne le nombre de nouvelles transactions.
+    """
+    account_number = parse_filename(input_file)[0]
+    with TransactionStore(store_path) as store:
+        added = store.add(df, fingerprints, account_number, input_file)
+    print(
+        f"{added} nouvelle(s) transaction(s) dans l'historique {store_path} "
+        f"({len(df) - added} déjà connue(s))."
+    )
+    return added
+
+
+def parse_query_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="cbc-to-excel query",
+        description=(
+            "Interroge l'historique des transactions (alimenté par --store), "
+            "tous exports et comptes confondus."
+        ),
+    )
+    parser.add_argument(
+        "--store",
+        default=DEFAULT_STORE_FILE,
+        help=f"Base de l'historique (défaut: {DEFAULT_STORE_FILE}).",
+    )
+    parser.add_argument("--from", dest="date_from", help="Date de début (AAAA-MM-JJ).")
+    parser.add_argument("--to", dest="date_to", help="Date de fin (AAAA-MM-JJ).")
+    parser.add_argument("--account", help="Nom du compte (ex. FDD).")
+    parser.add_argument(
+        "--category", help="Catégorie exacte, ou préfixe suivi de * (ex. D-*)."
+    )
+    parser.add_argument(
+        "--counterparty",
+        help="Début de la contrepartie (casse et accents ignorés).",
+    )
+    parser.add_argument(
+        "--operation-type",
+        help="Début du type d'opération (ex. DOMICILIATION).",
+    )
+    parser.add_argument("--limit", type=int, help="Nombre maximal de lignes.")
+    parser.add_argument(
+        "--csv",
+        help="Écrit le résultat dans ce fichier CSV au lieu de l'afficher.",
+    )
+    args = parser.parse_args(argv)
+    for name in ("date_from", "date_to"):
+        value = getattr(args, name)
+        if value:
+            try:
+                time.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                parser.error(f"Date invalide '{value}' (attendu: AAAA-MM-JJ).")
+    if not os.path.exists(args.store):
+        parser.error(
+            f"Historique introuvable: {args.store} "
+            "(à alimenter avec cbc-to-excel --input ... --store)."
+        )
+    return args
+
+
+def main(argv: list[str] | None = None) -> None:
+    from .sinks import CsvChunkSink
+
+    args = parse_query_args(argv)
+    with TransactionStore(args.store) as store:
+        df = store.query(
+            date_from=args.date_from,
+            date_to=args.date_to,
+            account=args.account,
+            category=args.category,
+            counterparty=args.counterparty,
+            operation_type=args.operation_type,
+            limit=args.limit,
+        )
+    if args.csv:
+        sink = CsvChunkSink(args.csv)
+        sink.write(df)
+        print(f"{len(df)} transaction(s) écrite(s) dans {args.csv}")
+        return
+    if not df.empty:
+        print(df.to_string(index=False, max_colwidth=40))
+    print(f"{len(df)} transaction(s), total : {df['Montant'].sum():.2f} €")
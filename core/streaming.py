@@ -0,0 +1,174 @@
+# streaming.py
+
+import os
+from collections.abc import Iterable, Iterator
+
+import pandas as pd
+
+from .counterparties import CounterpartyIndex, canonicalize_counterparties
+from .ingest import iter_input_chunks
+from .metrics import PipelineMetrics, run_step
+from .naming import (
+    build_sheet_name,
+    get_nom_compte,
+    get_output_filename_and_period,
+    parse_filename,
+)
+from .pipeline import ENRICH_PIPELINE
+from .rules import CategoryRules
+from .sinks import (  # noqa: F401
+    CsvChunkSink,
+    ExcelChunkSink,
+    create_sink,
+    infer_output_format,
+    output_path,
+)
+from .steps import prepare_export, step8_fill_categorie
+
+
+def transform_chunks(
+    chunks: Iterable[pd.DataFrame],
+    category_index: dict[str, str] | None = None,
+    metrics: PipelineMetrics | None = None,
+    category_rules: CategoryRules | None = None,
+    counterparties: CounterpartyIndex | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Applique validate_schema et les étapes 1 à 8 à chaque bloc.
+    Sans `category_index`, l'étape 8 est ignorée ; `category_rules` y ajoute
+    les règles par mot-clé. Avec `counterparties`, les contreparties sont
+    canonicalisées (étape 6b) avec une table partagée par tous les blocs.
+    Avec `metrics`, les mesures de chaque étape sont cumulées sur tous les
+    blocs.
+    """
+    for df in chunks:
+        df = ENRICH_PIPELINE.run(df, metrics)
+        if counterparties is not None:
+            df = run_step(metrics, canonicalize_counterparties, df, counterparties)
+        if category_index is not None:
+            df = run_step(
+                metrics,
+                step8_fill_categorie,
+                df,
+                category_index=category_index,
+                category_rules=category_rules,
+            )
+        yield df
+
+
+class RunningPeriod:
+    """
+    Suit la date min/max vue sur l'ensemble des blocs, pour construire la
+    période (nom de fichier et de feuille) sans garder les données en mémoire.
+    """
+
+    def __init__(self):
+        self.min_date = pd.NaT
+        self.max_date = pd.NaT
+        self.has_dates = False
+
+    def update(self, df: pd.DataFrame) -> None:
+        if "Date" not in df.columns:
+            return
+        self.has_dates = True
+        chunk_min = df["Date"].min()
+        chunk_max = df["Date"].max()
+        if pd.notna(chunk_min) and (
+            pd.isna(self.min_date) or chunk_min < self.min_date
+        ):
+            self.min_date = chunk_min
+        if pd.notna(chunk_max) and (
+            pd.isna(self.max_date) or chunk_max > self.max_date
+        ):
+            self.max_date = chunk_max
+
+    def as_frame(self) -> pd.DataFrame:
+        """
+        DataFrame minimal (deux dates) compatible avec naming.build_period_string.
+        """
+        if not self.has_dates:
+            return pd.DataFrame()
+        return pd.DataFrame({"Date": pd.Series([self.min_date, self.max_date])})
+
+
+def convert_in_chunks(
+    input_file: str,
+    encoding: str,
+    delimiter: str,
+    chunksize: int,
+    category_index: dict[str, str] | None = None,
+    output_file: str | None = None,
+    output_dir: str | None = None,
+    metrics: PipelineMetrics | None = None,
+    category_rules: CategoryRules | None = None,
+    output_formats: list[str] | None = None,
+    counterparty_file: str | None = None,
+) -> str:
+    """
+    Conversion en flux : lecture, transformation et écriture bloc par bloc.
+    La mémoire utilisée dépend de `chunksize`, pas de la taille du fichier.
+    Chaque bloc est écrit dans tous les formats de `output_formats` (voir
+    core.sinks ; par défaut, celui de l'extension de `output_file`, sinon
+    xlsx). La période (dates min/max) est suivie au fil des blocs : les
+    fichiers sont écrits sous un nom temporaire, la feuille xlsx est nommée
+    à la fermeture, puis les fichiers sont renommés. Sans `output_file`, le
+    nom généré est placé dans `output_dir`.
+    Retourne le chemin du fichier généré (celui du premier format).
+    """
+    period = RunningPeriod()
+    if not output_formats:
+        output_formats = [infer_output_format(output_file)]
+    if output_file:
+        target_dir = os.path.dirname(output_file)
+    else:
+        target_dir = output_dir or ""
+    account = get_nom_compte(parse_filename(input_file)[0])
+    temp_paths = [
+        os.path.join(
+            target_dir,
+            f".{os.path.basename(input_file)}.partial.{os.getpid()}.{output_format}",
+        )
+        for output_format in output_formats
+    ]
+
+    try:
+        sinks = [
+            create_sink(output_format, temp_path, account)
+            for output_format, temp_path in zip(output_formats, temp_paths)
+        ]
+        chunks = iter_input_chunks(input_file, encoding, delimiter, chunksize)
+        counterparties = (
+            CounterpartyIndex(counterparty_file) if counterparty_file else None
+        )
+        for df in transform_chunks(
+            chunks, category_index, metrics, category_rules, counterparties
+        ):
+            period.update(df)
+            df = prepare_export(df)
+            for sink in sinks:
+                if metrics is None:
+                    sink.write(df)
+                else:
+                    metrics.run("write_output", sink.write, df)
+
+        out_file_name, period_string = get_output_filename_and_period(
+            input_file, period.as_frame()
+        )
+        sheet_name = build_sheet_name(period_string)
+        for sink in sinks:
+            sink.close(sheet_name)
+    except BaseException:
+        for temp_path in temp_paths:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        raise
+
+    if not output_file:
+        output_file = os.path.join(target_dir, out_file_name)
+    out_file_names = []
+    for output_format, temp_path in zip(output_formats, temp_paths):
+        out_file_name = output_path(output_file, output_format)
+        os.replace(temp_path, out_file_name)
+        out_file_names.append(out_file_name)
+        print(f"Fichier généré : {out_file_name} (feuille : {sheet_name})")
+    return out_file_names[0]
@@ -0,0 +1,22 @@
+# text.py
+
+import re
+import unicodedata
+
+
+def normalize_text(value: str) -> str:
+    """
+    Normalise le texte pour faciliter la recherche de motifs.
+    1. Décompose les caractères Unicode (NFKD)
+    2. Supprime les accents
+    3. Met en majuscules
+    4. Remplace les espaces multiples par un espace simple
+    5. Supprime les espaces en début et fin
+    """
+    normalized = unicodedata.normalize("NFKD", str(value))
+    normalized = "".join(
+        character for character in normalized if not unicodedata.combining(character)
+    )
+    normalized = normalized.upper()
+    normalized = re.sub(r"\s+", " ", normalized)
+    return normalized.strip()
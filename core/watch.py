@@ -0,0 +1,238 @@
+# watch.py
+
+import argparse
+import fnmatch
+import os
+import time
+import traceback
+
+from .categories import CategoryCache
+from .config import (
+    DEFAULT_CATEGORY_FILE,
+    DEFAULT_ENCODING,
+    DEFAULT_RULES_FILE,
+    DELIMITER,
+)
+from .schema import check_csv_header
+
+DEFAULT_INPUT_DIR = "data/in_csv"
+DEFAULT_OUTPUT_DIR = "data/out_xlsx"
+
+
+class FolderWatcher:
+    """
+    Surveille un dossier par scrutation (mtime et taille des fichiers).
+    Un fichier n'est signalé qu'une fois stable depuis `settle_seconds`, pour
+    ne pas lire un export en cours de copie ; il est signalé à nouveau s'il
+    est remplacé par un contenu différent.
+    """
+
+    def __init__(
+        self,
+        input_dir: str,
+        pattern: str = "*.csv",
+        settle_seconds: float = 2.0,
+        include_existing: bool = False,
+        clock=time.monotonic,
+    ):
+        self.input_dir = input_dir
+        self.pattern = pattern
+        self.settle_seconds = settle_seconds
+        self.clock = clock
+        # {chemin: (signature (taille, mtime), instant où elle a été vue)}
+        self._pending: dict[str, tuple[tuple, float]] = {}
+        self._done: dict[str, tuple] = {}
+        if not include_existing:
+            self._done = self._scan()
+
+    def _scan(self) -> dict[str, tuple]:
+        signatures = {}
+        with os.scandir(self.input_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and fnmatch.fnmatch(entry.name, self.pattern):
+                    stat = entry.stat()
+                    signatures[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        return signatures
+
+    def poll(self) -> list[str]:
+        """
+        Retourne (triés) les fichiers nouveaux ou modifiés devenus stables.
+        """
+        now = self.clock()
+        ready = []
+        signatures = self._scan()
+        for path, signature in signatures.items():
+            if self._done.get(path) == signature:
+                continue
+            seen = self._pending.get(path)
+            if seen is None or seen[0] != signature:
+                self._pending[path] = (signature, now)
+            elif now - seen[1] >= self.settle_seconds:
+                ready.append(path)
+                self._done[path] = signature
+                del self._pending[path]
+        for path in set(self._pending) - set(signatures):
+            del self._pending[path]
+        return sorted(ready)
+
+
+def parse_watch_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="cbc-to-excel watch",
+        description=(
+            "Surveille un dossier et convertit chaque nouvel export CBC "
+            "(processus unique, catégories et motifs gardés en mémoire)."
+        ),
+    )
+    parser.add_argument(
+        "--input-dir",
+        default=DEFAULT_INPUT_DIR,
+        help=f"Dossier surveillé (défaut: {DEFAULT_INPUT_DIR}).",
+    )
+    parser.add_argument(
+        "--glob",
+        default="*.csv",
+        help="Motif des fichiers à convertir (défaut: *.csv).",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=DEFAULT_OUTPUT_DIR,
+        help=f"Dossier de sortie (défaut: {DEFAULT_OUTPUT_DIR}).",
+    )
+    parser.add_argument(
+        "--encoding",
+        default=DEFAULT_ENCODING,
+        help=f"Encodage du CSV (défaut: {DEFAULT_ENCODING}).",
+    )
+    parser.add_argument(
+        "--delimiter",
+        default=DELIMITER,
+        help=f"Délimiteur du CSV (défaut: {DELIMITER}).",
+    )
+    parser.add_argument(
+        "--csv-engine",
+        choices=("c", "pyarrow"),
+        default="c",
+        help="Lecteur CSV de pandas (défaut: c).",
+    )
+    parser.add_argument(
+        "--categories",
+        default=DEFAULT_CATEGORY_FILE,
+        help=f"Fichier CSV des catégories (défaut: {DEFAULT_CATEGORY_FILE}).",
+    )
+    parser.add_argument(
+        "--category-rules",
+        help=f"Règles de catégorie (défaut: {DEFAULT_RULES_FILE} s'il existe).",
+    )
+    parser.add_argument(
+        "--explain-categories",
+        action="store_true",
+        help="Ajoute la colonne 'Règle catégorie'.",
+    )
+    parser.add_argument(
+        "--no-categories",
+        action="store_true",
+        help="Désactive l'association automatique des catégories.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=2.0,
+        help="Intervalle de scrutation du dossier en secondes (défaut: 2).",
+    )
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=2.0,
+        help=(
+            "Délai sans modification avant de lire un fichier, en secondes (défaut: 2)."
+        ),
+    )
+    parser.add_argument(
+        "--include-existing",
+        action="store_true",
+        help="Convertit aussi les fichiers déjà présents au démarrage.",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Convertit les fichiers présents puis s'arrête (sans surveiller).",
+    )
+    return parser.parse_args(argv)
+
+
+def convert_ready_file(input_file: str, args: argparse.Namespace, categories) -> bool:
+    """
+    Convertit un fichier détecté ; une erreur est signalée (rapport
+    `<nom>.error.log`) sans arrêter la surveillance. Retourne True si réussi.
+    """
+    from .batch import BatchResult, write_error_report
+    from .convert import convert_file
+
+    start = time.perf_counter()
+    try:
+        check_csv_header(input_file, args.encoding, args.delimiter)
+        category_index, category_rules = categories.get()
+        convert_file(
+            input_file,
+            args.encoding,
+            args.delimiter,
+            category_index=category_index,
+            output_dir=args.output_dir,
+            engine=args.csv_engine,
+            category_rules=category_rules,
+        )
+    except Exception as exc:
+        result = BatchResult(
+            input_file,
+            None,
+            f"{type(exc).__name__}: {exc}",
+            traceback.format_exc(),
+            time.perf_counter() - start,
+        )
+        report = write_error_report(result, args.output_dir)
+        print(f"Échec de {input_file} : {result.error} (rapport : {report})")
+        return False
+    print(f"{input_file} converti en {time.perf_counter() - start:.2f}s")
+    return True
+
+
+def watch(args: argparse.Namespace) -> None:
+    # Imports lourds faits une fois au démarrage : chaque nouveau fichier ne
+    # paie plus que le temps de transformation.
+    from . import convert  # noqa: F401
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    if not os.path.isdir(args.input_dir):
+        raise FileNotFoundError(f"Dossier d'entrée introuvable: {args.input_dir}")
+    categories = CategoryCache(
+        args.categories,
+        args.category_rules,
+        no_categories=args.no_categories,
+        explain=args.explain_categories,
+    )
+    categories.get()
+    watcher = FolderWatcher(
+        args.input_dir,
+        args.glob,
+        settle_seconds=0 if args.once else args.settle,
+        include_existing=args.include_existing or args.once,
+    )
+    print(f"Surveillance de {args.input_dir} ({args.glob}) — Ctrl+C pour arrêter.")
+    try:
+        while True:
+            ready = watcher.poll()
+            if args.once:
+                # Premier passage : enregistre les signatures ; second : convertit
+                ready = watcher.poll()
+            for input_file in ready:
+                convert_ready_file(input_file, args, categories)
+            if args.once:
+                return
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("Surveillance arrêtée.")
+
+
+def main(argv: list[str] | None = None) -> None:
+    watch(parse_watch_args(argv))
@@ -0,0 +1,77 @@
+import pytest
+
+pytest.importorskip("pandas")
+
+from core.batch import (  # noqa: E402
+    collect_input_files,
+    format_summary,
+    run_batch,
+    write_error_report,
+)
+
+CSV_CONTENT = (
+    "Numéro de l'extrait;Description;Valeur;Montant;Nom contrepartie\n"
+    "1;FORFAIT MENSUEL;02/03/2024;-2,50;\n"
+    "1;VIREMENT DE PAUL;27/03/2024;100,00;PAUL\n"
+)
+
+
+def test_collect_input_files_filters_and_sorts(tmp_path) -> None:
+    (tmp_path / "b.csv").write_text("", encoding="utf-8")
+    (tmp_path / "a.csv").write_text("", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("", encoding="utf-8")
+
+    files = collect_input_files(str(tmp_path))
+
+    assert files == [str(tmp_path / "a.csv"), str(tmp_path / "b.csv")]
+
+
+def test_run_batch_reports_each_file_without_stopping(tmp_path) -> None:
+    pytest.importorskip("xlsxwriter")
+    good = tmp_path / "export_BE50732047041718_20250118_1200.csv"
+    good.write_text(CSV_CONTENT, encoding="latin-1")
+    bad = tmp_path / "export_BE41732062192310_20250118_1200.csv"
+    bad.write_text("a;b\n1;2\n", encoding="latin-1")
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    results = run_batch(
+        [str(bad), str(good)],
+        1,
+        {"FORFAIT": "D-Frais"},
+        encoding="latin-1",
+        delimiter=";",
+        output_dir=str(output_dir),
+    )
+
+    assert [result.input_file for result in results] == [str(bad), str(good)]
+    assert results[0].error.startswith("ValueError: Schéma invalide")
+    assert results[1].error is None
+    assert (output_dir / "[2-27(03.24)]_FDD_2025.01.18.xlsx").exists()
+
+    report = write_error_report(results[0], str(output_dir))
+    assert "Traceback" in (output_dir / report).read_text(encoding="utf-8")
+
+    summary = format_summary(results)
+    assert "1 converti(s), 1 en erreur." in summary
+
+
+def test_run_batch_refuses_counterparties_in_parallel(tmp_path) -> None:
+    with pytest.raises(ValueError, match="jobs=1"):
+        run_batch(
+            [str(tmp_path / "a.csv"), str(tmp_path / "b.csv")],
+            2,
+            None,
+            counterparty_file=str(tmp_path / "contreparties.sqlite"),
+        )
+
+
+def test_main_refuses_counterparties_with_several_jobs(tmp_path, capsys) -> None:
+    from core.main import parse_args
+
+    with pytest.raises(SystemExit):
+        parse_args(["--input-dir", str(tmp_path), "--counterparties", "--jobs", "2"])
+
+    assert "--jobs 1" in capsys.readouterr().err
+    args = parse_args(["--input-dir", str(tmp_path), "--counterparties", "--jobs", "1"])
+    assert args.counterparties == "data/contreparties.sqlite"
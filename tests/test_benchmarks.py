@@ -0,0 +1,43 @@
+import json
+import os
+
+import pytest
+
+pandas = pytest.importorskip("pandas")
+
+from benchmarks.generate import CBC_COLUMNS, generate_export  # noqa: E402
+from benchmarks.run import bench_size, compare_results  # noqa: E402
+from core.steps import validate_schema  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "baseline.json")
+
+
+def test_generate_export_is_deterministic_and_valid() -> None:
+    first = generate_export(200, seed=3)
+    second = generate_export(200, seed=3)
+
+    pandas.testing.assert_frame_equal(first, second)
+    assert list(first.columns) == CBC_COLUMNS
+    validate_schema(first)
+    assert first["Description"].str.contains("CREANCIER       : ").any()
+    assert first["Description"].str.contains(" HEURES .* AVEC ").any()
+
+
+def test_compare_results_flags_regressions_above_threshold() -> None:
+    baseline = {"results": {"1000": {"step5": 0.100, "step6": 0.001}}}
+    current = {"results": {"1000": {"step5": 0.200, "step6": 0.004}}}
+
+    _, regressions = compare_results(current, baseline, threshold=0.25)
+
+    # step6 est 4x plus lent mais sous le seuil de bruit
+    assert regressions == ["1000 lignes / step5 : x2.00"]
+
+
+def test_bench_size_times_the_command_and_matches_the_baseline(tmp_path) -> None:
+    timings = bench_size(50, 1, str(tmp_path))
+
+    assert (tmp_path / "bench.xlsx").exists()
+    with open(BASELINE, mode="r", encoding="utf-8") as file:
+        baseline = json.load(file)
+    for results in baseline["results"].values():
+        assert list(results) == list(timings)
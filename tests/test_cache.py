@@ -0,0 +1,70 @@
+import pytest
+
+pandas = pytest.importorskip("pandas")
+pytest.importorskip("openpyxl")
+
+from core.cache import load_enriched  # noqa: E402
+from core.convert import convert_file, recategorize_file  # noqa: E402
+from core.metrics import PipelineMetrics  # noqa: E402
+
+CSV_HEADER = "Numéro de l'extrait;Description;Valeur;Montant;Nom contrepartie\n"
+
+
+def _write_export(tmp_path):
+    input_file = tmp_path / "export_BE50732047041718_20250118_1200.csv"
+    input_file.write_text(
+        CSV_HEADER
+        + "1;FORFAIT MENSUEL;02/03/2024;-2,50;\n"
+        + "2;VIREMENT DE PAUL;27/03/2024;100,00;PAUL\n",
+        encoding="latin-1",
+    )
+    return str(input_file)
+
+
+def test_cache_depends_on_file_content(tmp_path) -> None:
+    input_file = _write_export(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    convert_file(
+        input_file, "latin-1", ";", output_dir=str(tmp_path), cache_dir=cache_dir
+    )
+
+    assert load_enriched(cache_dir, input_file, "latin-1", ";") is not None
+    # Mêmes octets, autres options de lecture : autre entrée du cache
+    assert load_enriched(cache_dir, input_file, "utf-8", ";") is None
+    assert load_enriched(cache_dir, input_file, "latin-1", ",") is None
+    with open(input_file, mode="a", encoding="latin-1") as file:
+        file.write("3;FORFAIT MENSUEL;28/03/2024;-2,50;\n")
+    assert load_enriched(cache_dir, input_file, "latin-1", ";") is None
+
+
+def test_recategorize_reuses_cache_and_only_runs_step8(tmp_path) -> None:
+    input_file = _write_export(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    convert_file(
+        input_file,
+        "latin-1",
+        ";",
+        category_index={"FORFAIT": "D-Banque"},
+        output_dir=str(tmp_path),
+        cache_dir=cache_dir,
+    )
+
+    metrics = PipelineMetrics()
+    output = recategorize_file(
+        input_file,
+        "latin-1",
+        ";",
+        cache_dir,
+        category_index={"FORFAIT": "D-Frais"},
+        output_dir=str(tmp_path),
+        metrics=metrics,
+    )
+    metrics.close()
+
+    assert list(metrics.steps) == [
+        "load_enriched",
+        "step8_fill_categorie",
+        "step9_export_excel",
+    ]
+    written = pandas.read_excel(output)
+    assert written["Catégorie"].tolist() == ["D-Frais", "R-Autres"]
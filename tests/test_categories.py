@@ -1,7 +1,15 @@
 import csv
+import os
 from pathlib import Path
 
-from core.categories import build_category_tree_from_csv
+import pytest
+
+from core.categories import (
+    CategoryCache,
+    CategoryTree,
+    build_category_index,
+    build_category_tree_from_csv,
+)
 
 
 def test_build_category_tree_from_csv(tmp_path: Path) -> None:
@@ -17,3 +25,57 @@ def test_build_category_tree_from_csv(tmp_path: Path) -> None:
     assert tree.search("ACHAT") == "D-Alimentaire"
     assert tree.search("DON") == "R-Cotisation"
     assert tree.search("INCONNU") is None
+
+
+def test_build_category_index_strips_and_skips_empty_operations() -> None:
+    rows = [
+        ("D-Frais", ["CONSOMMATION", " FORFAIT", ""]),
+        ("D-Frais", ["CONSOMMATION"]),
+        ("R-Virements", ["VIREMENT DE"]),
+    ]
+
+    index = build_category_index(rows)
+
+    assert index == {
+        "CONSOMMATION": "D-Frais",
+        "FORFAIT": "D-Frais",
+        "VIREMENT DE": "R-Virements",
+    }
+
+
+def test_build_category_index_rejects_conflicts() -> None:
+    rows = [("D-Frais", ["FORFAIT"]), ("D-Autres", ["FORFAIT"])]
+
+    with pytest.raises(ValueError, match="FORFAIT -> D-Autres, D-Frais"):
+        build_category_index(rows)
+
+
+def test_category_tree_search_finds_operations_in_any_subtree() -> None:
+    tree = CategoryTree()
+    tree.insert("M-Milieu", ["ZZZ"])
+    tree.insert("A-Debut", ["ZZZ-GAUCHE"])
+
+    assert tree.search("ZZZ-GAUCHE") == "A-Debut"
+
+
+def test_category_cache_reloads_only_when_file_changes(tmp_path) -> None:
+    category_file = tmp_path / "categories.csv"
+    category_file.write_text(
+        "Catégorie;Opérations\nD-Frais;FORFAIT\n", encoding="utf-8"
+    )
+    cache = CategoryCache(str(category_file))
+
+    first, _ = cache.get()
+    assert cache.get()[0] is first
+
+    category_file.write_text(
+        "Catégorie;Opérations\nD-Banque;FORFAIT\n", encoding="utf-8"
+    )
+    os.utime(category_file, ns=(0, os.stat(category_file).st_mtime_ns + 10**9))
+    assert cache.get()[0] == {"FORFAIT": "D-Banque"}
+
+    category_file.write_text(
+        "Catégorie;Opérations\nA;FORFAIT\nB;FORFAIT\n", encoding="utf-8"
+    )
+    os.utime(category_file, ns=(0, os.stat(category_file).st_mtime_ns + 2 * 10**9))
+    assert cache.get()[0] == {"FORFAIT": "D-Banque"}
@@ -0,0 +1,84 @@
+import pytest
+
+pandas = pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+
+from core.consolidate import convert_consolidated  # noqa: E402
+from core.excel_styles import DATE_FORMAT, MONTANT_FORMAT  # noqa: E402
+
+CSV_HEADER = "Numéro de l'extrait;Description;Valeur;Montant;Nom contrepartie\n"
+
+
+def test_convert_consolidated_writes_one_sheet_per_account(tmp_path) -> None:
+    fdd = tmp_path / "export_BE50732047041718_20250118_1200.csv"
+    fdd.write_text(
+        CSV_HEADER
+        + "1;FORFAIT MENSUEL;02/03/2024;-2,50;\n"
+        + "2;VIREMENT DE PAUL;27/03/2024;100,00;PAUL\n",
+        encoding="latin-1",
+    )
+    commun = tmp_path / "export_BE41732062192310_20250201_0900.csv"
+    commun.write_text(
+        CSV_HEADER + "7;VIREMENT VERS MARIE;10/03/2024;-40,00;MARIE\n",
+        encoding="latin-1",
+    )
+
+    output = convert_consolidated(
+        [str(fdd), str(commun)],
+        "latin-1",
+        ";",
+        category_index={"FORFAIT": "D-Frais"},
+        output_dir=str(tmp_path),
+    )
+
+    assert output == str(tmp_path / "[2-27(03.24)]_Consolide_2025.02.01.xlsx")
+    sheets = pandas.read_excel(output, sheet_name=None)
+    assert list(sheets) == ["FDD", "CBC_Commun", "Tous les comptes"]
+    combined = sheets["Tous les comptes"]
+    assert combined["Compte"].tolist() == ["FDD", "CBC_Commun", "FDD"]
+    assert combined["Catégorie"].tolist() == ["D-Frais", "D-Autres", "R-Autres"]
+
+    worksheet = openpyxl.load_workbook(output)["Tous les comptes"]
+    header = [cell.value for cell in worksheet[1]]
+    assert worksheet.cell(2, header.index("Date") + 1).number_format == DATE_FORMAT
+    montant = worksheet.cell(2, header.index("Montant") + 1)
+    assert montant.number_format == MONTANT_FORMAT
+
+
+@pytest.mark.parametrize(
+    ("policy", "expected_remarks"),
+    [
+        ("drop", ["", "", ""]),
+        ("flag", ["", "Doublon", "", "", "Doublon"]),
+        ("report", ["", "", "", "", ""]),
+    ],
+)
+def test_enrich_accounts_handles_duplicates_between_exports(
+    tmp_path, capsys, policy, expected_remarks
+) -> None:
+    from core.consolidate import enrich_accounts
+
+    rows = (
+        "1;FORFAIT MENSUEL;02/03/2024;-2,50;\n"
+        # Deux transactions identiques d'un même export : pas un doublon
+        "1;PAIEMENT PAR MAESTRO CAFE;03/03/2024;-3,00;\n"
+        "1;PAIEMENT PAR MAESTRO CAFE;03/03/2024;-3,00;\n"
+    )
+    first = tmp_path / "export_BE50732047041718_20240331_1200.csv"
+    first.write_text(CSV_HEADER + rows, encoding="latin-1")
+    # Le second export recouvre le premier (à la casse près) et le complète
+    second = tmp_path / "export_BE50732047041718_20240430_1200.csv"
+    second.write_text(
+        CSV_HEADER
+        + "1;paiement par maestro  cafe;03/03/2024;-3,00;\n"
+        + "1;FORFAIT MENSUEL;02/03/2024;-2,50;\n",
+        encoding="latin-1",
+    )
+
+    accounts = enrich_accounts(
+        [str(first), str(second)], "latin-1", ";", duplicates=policy
+    )
+
+    remarks = accounts["FDD"]["Remarque"].astype(str).tolist()
+    assert remarks == expected_remarks
+    assert "2 doublon(s)" in capsys.readouterr().out
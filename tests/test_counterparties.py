@@ -0,0 +1,65 @@
+import pytest
+
+pandas = pytest.importorskip("pandas")
+
+from core.counterparties import (  # noqa: E402
+    CounterpartyIndex,
+    canonicalize_counterparties,
+    counterparty_key,
+)
+
+TERMINALS = [
+    "DELHAIZE BRUXELLES 3279",
+    "DELHAIZE MONS 0412",
+    "DELHAIZE NAMUR 88",
+    "COLRUYT MONS 5678",
+    "COLRUYT NAMUR 12",
+    "LIDL MONS 9",
+    "LIDL NAMUR 33",
+    "ALDI BRUXELLES 4",
+]
+
+
+def test_counterparty_key_drops_ids_and_legal_forms() -> None:
+    assert counterparty_key("Delhaize S.A. 3279") == (("DELHAIZE",), True)
+    assert counterparty_key("ENGIE ELECTRABEL SA") == (("ENGIE", "ELECTRABEL"), False)
+
+
+def test_terminals_of_a_merchant_share_one_canonical_name() -> None:
+    counterparties = CounterpartyIndex(None)
+    resolved = counterparties.resolve(
+        TERMINALS + ["DELHAIZE SA", "CARREFOUR MARKE 1234", "CARREFOUR MARKET 99"]
+    )
+
+    assert {resolved[name] for name in TERMINALS[:3]} == {"DELHAIZE SA"}
+    assert resolved["COLRUYT MONS 5678"] == resolved["COLRUYT NAMUR 12"] == "COLRUYT"
+    # Nom tronqué : rapproché par l'index des trigrammes
+    assert resolved["CARREFOUR MARKET 99"] == resolved["CARREFOUR MARKE 1234"]
+
+
+def test_transfer_names_are_only_grouped_on_identical_words() -> None:
+    counterparties = CounterpartyIndex(None)
+    resolved = counterparties.resolve(
+        ["DUPONT JEAN", "DUPONT JEANNE", "S.A. ENGIE ELECTRABEL", "ENGIE ELECTRABEL SA"]
+    )
+
+    assert resolved["DUPONT JEAN"] != resolved["DUPONT JEANNE"]
+    assert resolved["S.A. ENGIE ELECTRABEL"] == resolved["ENGIE ELECTRABEL SA"]
+
+
+def test_mapping_is_persisted_and_only_new_names_are_resolved(tmp_path) -> None:
+    path = str(tmp_path / "contreparties.sqlite")
+    df = pandas.DataFrame({"Contrepartie": TERMINALS + ["(Non géré)", None]})
+
+    df = canonicalize_counterparties(df, CounterpartyIndex(path))
+    assert df["Contrepartie"].tolist()[:3] == ["DELHAIZE"] * 3
+    assert df["Contrepartie"].tolist()[-2] == "(Non géré)"
+    assert pandas.isna(df["Contrepartie"].iloc[-1])
+
+    counterparties = CounterpartyIndex(path)
+    assert len(counterparties) == len(TERMINALS)
+    assert counterparties.resolve(TERMINALS) == {}
+    assert counterparties.resolve(["DELHAIZE LIEGE 7"]) == {
+        "DELHAIZE LIEGE 7": "DELHAIZE"
+    }
+    assert counterparties.save() == 1
@@ -0,0 +1,72 @@
+import datetime
+
+import pytest
+
+pandas = pytest.importorskip("pandas")
+openpyxl = pytest.importorskip("openpyxl")
+
+from core.excel_styles import DATE_FORMAT, MONTANT_FORMAT  # noqa: E402
+from core.excel_writer import (  # noqa: E402
+    EXCEL_MAX_ROWS,
+    StreamingExcelWriter,
+    excel_column,
+)
+
+
+def test_excel_column_converts_to_native_values() -> None:
+    dates = pandas.Series(pandas.to_datetime(["1900-03-01", None]))
+    texts = pandas.Series(pandas.Categorical(["a", "", None]))
+
+    assert excel_column(dates) == ("number", [61.0, None])
+    assert excel_column(pandas.Series([1.5, float("nan")])) == ("number", [1.5, None])
+    assert excel_column(texts) == ("text", ["a", None, None])
+
+
+def test_streaming_writer_writes_chunks_with_column_formats(tmp_path) -> None:
+    path = tmp_path / "out.xlsx"
+    chunks = [
+        pandas.DataFrame(
+            {
+                "Date": pandas.to_datetime(["2025-01-02", "2025-01-03"]),
+                "Contrepartie": ["=1+1", ""],
+                "Montant": [-12.5, 40.0],
+            }
+        ),
+        pandas.DataFrame(
+            {
+                "Date": pandas.to_datetime(["2025-01-04"]),
+                "Contrepartie": ["MARIE"],
+                "Montant": [float("nan")],
+            }
+        ),
+    ]
+
+    with StreamingExcelWriter(str(path)) as writer:
+        writer.add_sheet("01.2025", chunks[0].columns)
+        for chunk in chunks:
+            writer.write_frame(chunk)
+
+    sheet = openpyxl.load_workbook(path)["01.2025"]
+    rows = list(sheet.iter_rows(values_only=True))
+    assert rows == [
+        ("Date", "Contrepartie", "Montant"),
+        (datetime.datetime(2025, 1, 2), "=1+1", -12.5),
+        (datetime.datetime(2025, 1, 3), None, 40),
+        (datetime.datetime(2025, 1, 4), "MARIE", None),
+    ]
+    assert sheet["A2"].number_format == DATE_FORMAT
+    assert sheet["C2"].number_format == MONTANT_FORMAT
+    assert sheet["B2"].data_type == "s"
+
+
+def test_streaming_writer_refuses_rows_past_the_sheet_limit(tmp_path) -> None:
+    frame = pandas.DataFrame({"Montant": [1.0, 2.0]})
+
+    with StreamingExcelWriter(str(tmp_path / "out.xlsx")) as writer:
+        writer.add_sheet("Export", frame.columns)
+        writer.next_row = EXCEL_MAX_ROWS - 1
+        with pytest.raises(ValueError, match="Trop de lignes"):
+            writer.write_frame(frame)
+        writer.write_frame(frame.iloc[:1])
+
+        assert writer.next_row == EXCEL_MAX_ROWS
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+HEAVY_MODULES = ("pandas", "numpy", "openpyxl", "xlsxwriter")
+# Budget (µs) d'import cumulé de core.main, large pour absorber les CI lentes
+IMPORT_BUDGET_US = 300_000
+
+
+def _importtime(*args: str) -> dict[str, int]:
+    """
+    Lance `python -X importtime` et retourne {module: temps cumulé (µs)}.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        cwd=ROOT_DIR,
+    )
+    timings = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, module = line.split("|")
+        if cumulative.strip().isdigit():
+            timings[module.strip()] = int(cumulative)
+    return timings
+
+
+def test_cli_help_does_not_import_heavy_dependencies() -> None:
+    timings = _importtime("-m", "core.main", "--help")
+
+    assert not [module for module in timings if module.startswith(HEAVY_MODULES)]
+
+
+def test_category_editor_does_not_import_heavy_dependencies() -> None:
+    timings = _importtime("-c", "import core.trie")
+
+    assert "core.trie" in timings
+    assert not [module for module in timings if module.startswith(HEAVY_MODULES)]
+
+
+def test_core_main_import_time_budget() -> None:
+    timings = _importtime("-c", "import core.main")
+
+    assert timings["core.main"] < IMPORT_BUDGET_US
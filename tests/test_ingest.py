@@ -0,0 +1,101 @@
+import pytest
+
+pandas = pytest.importorskip("pandas")
+
+from core.ingest import iter_input_chunks, read_input_csv  # noqa: E402
+
+
+def _write(tmp_path, content: str) -> str:
+    input_file = tmp_path / "export_BE50732047041718_20250118_1200.csv"
+    input_file.write_text(content, encoding="latin-1")
+    return str(input_file)
+
+
+def test_read_input_csv_prunes_columns_and_types_values(tmp_path) -> None:
+    input_file = _write(
+        tmp_path,
+        "Numéro de compte;Numéro de l'extrait;Date;Description;Valeur;Montant;Solde\n"
+        "BE50;1;01/03/2024;FORFAIT;02/03/2024;-2,50;100,00\n"
+        "BE50;2;26/03/2024;VIREMENT DE PAUL;27/03/2024;1000,25;1097,75\n",
+    )
+
+    df = read_input_csv(input_file, "latin-1", ";")
+
+    assert list(df.columns) == [
+        "Numéro de l'extrait",
+        "Description",
+        "Valeur",
+        "Montant",
+    ]
+    assert df["Valeur"].tolist() == [
+        pandas.Timestamp("2024-03-02"),
+        pandas.Timestamp("2024-03-27"),
+    ]
+    assert df["Montant"].tolist() == [-2.5, 1000.25]
+
+
+def test_read_input_csv_falls_back_for_unexpected_layouts(tmp_path) -> None:
+    input_file = _write(
+        tmp_path,
+        "Libellé;Date;Montant (EUR)\n"
+        "FORFAIT;2024-03-02;1\u00a0234,50\n"
+        "CAFE;pas une date;-3.5\n",
+    )
+
+    df = read_input_csv(input_file, "latin-1", ";", engine="pyarrow")
+
+    assert list(df.columns) == ["Libellé", "Date", "Montant (EUR)"]
+    assert df["Date"].iloc[1] is pandas.NaT
+    assert df["Montant (EUR)"].tolist() == [1234.5, -3.5]
+
+
+def test_read_input_csv_declares_text_and_statement_types(tmp_path) -> None:
+    input_file = _write(
+        tmp_path,
+        "Numéro de l'extrait;Description;Valeur;Montant;Communication libre\n"
+        "1;FORFAIT;02/03/2024;-2,50;\n"
+        ";CAFE;03/03/2024;-3,00;\n",
+    )
+
+    df = read_input_csv(input_file, "latin-1", ";")
+
+    assert str(df["Numéro de l'extrait"].dtype) == "Int64"
+    assert df["Numéro de l'extrait"].isna().tolist() == [False, True]
+    # Colonne de texte entièrement vide : du texte, pas des float64
+    assert pandas.api.types.is_string_dtype(df["Communication libre"])
+
+
+def test_read_input_csv_falls_back_when_pyarrow_fails(tmp_path, monkeypatch) -> None:
+    input_file = _write(
+        tmp_path, "Description;Valeur;Montant\nFORFAIT;02/03/2024;-2,50\n"
+    )
+    read_csv = pandas.read_csv
+
+    def failing_pyarrow(*args, **kwargs):
+        if kwargs.get("engine") == "pyarrow":
+            raise RuntimeError("erreur d'analyse pyarrow")
+        return read_csv(*args, **kwargs)
+
+    monkeypatch.setattr(pandas, "read_csv", failing_pyarrow)
+
+    df = read_input_csv(input_file, "latin-1", ";", engine="pyarrow")
+
+    assert df["Montant"].tolist() == [-2.5]
+
+
+def test_iter_input_chunks_types_each_chunk(tmp_path) -> None:
+    input_file = _write(
+        tmp_path,
+        "Description;Valeur;Montant\n"
+        "FORFAIT;02/03/2024;-2,50\n"
+        "CAFE;03/03/2024;-3,00\n"
+        "PAUL;27/03/2024;100,00\n",
+    )
+
+    chunks = list(iter_input_chunks(input_file, "latin-1", ";", 2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert all(
+        pandas.api.types.is_datetime64_any_dtype(chunk["Valeur"]) for chunk in chunks
+    )
+    assert pandas.concat(chunks)["Montant"].tolist() == [-2.5, -3.0, 100.0]
@@ -0,0 +1,139 @@
+import pytest
+
+pandas = pytest.importorskip("pandas")
+
+from core.convert import convert_file_incremental  # noqa: E402
+from core.ledger import TransactionLedger, compute_fingerprints  # noqa: E402
+from core.main import main  # noqa: E402
+
+CSV_HEADER = "Numéro de l'extrait;Description;Valeur;Montant;Nom contrepartie\n"
+ROWS = [
+    "1;FORFAIT MENSUEL;02/03/2024;-2,50;\n",
+    "1;PAIEMENT PAR MAESTRO CAFE;03/03/2024;-3,00;\n",
+    "1;PAIEMENT PAR MAESTRO CAFE;03/03/2024;-3,00;\n",
+    "2;VIREMENT DE PAUL;27/03/2024;100,00;PAUL\n",
+]
+
+
+def _frame(rows):
+    return pandas.DataFrame(
+        {
+            "N°extrait": [1, 1, 1],
+            "Date": pandas.to_datetime(["2024-03-02", "2024-03-03", "2024-03-03"]),
+            "Montant": [-2.5, -3.0, -3.0],
+            "Description": ["FORFAIT", "CAFE", "CAFE"],
+        }
+    ).iloc[rows]
+
+
+def test_compute_fingerprints_is_stable_and_keeps_repeated_rows() -> None:
+    fingerprints = compute_fingerprints(_frame([0, 1, 2]), "BE01")
+
+    assert fingerprints.is_unique
+    assert (
+        fingerprints.tolist()
+        == compute_fingerprints(_frame([0, 1, 2]), "BE01").tolist()
+    )
+    assert fingerprints.iloc[0] != compute_fingerprints(_frame([0]), "BE02").iloc[0]
+
+
+def test_compute_fingerprints_accepts_blank_statement_numbers() -> None:
+    blank = _frame([0, 1]).assign(**{"N°extrait": [12, None]})
+    as_float = blank.astype({"N°extrait": "float64"})
+    as_text = blank.assign(**{"N°extrait": ["12", ""]})
+
+    fingerprints = compute_fingerprints(blank, "BE01")
+
+    assert fingerprints.str.len().tolist() == [32, 32]
+    assert fingerprints.tolist() == compute_fingerprints(as_float, "BE01").tolist()
+    assert fingerprints.tolist() == compute_fingerprints(as_text, "BE01").tolist()
+
+
+def test_compute_fingerprints_uses_the_normalized_description() -> None:
+    # Même règle que --duplicates : casse, accents et espaces ignorés
+    respelled = _frame([0]).assign(Description=["  forfait "])
+
+    assert (
+        compute_fingerprints(respelled, "BE01").tolist()
+        == compute_fingerprints(_frame([0]), "BE01").tolist()
+    )
+
+
+def test_ledger_records_and_filters_seen_transactions(tmp_path) -> None:
+    fingerprints = compute_fingerprints(_frame([0, 1, 2]), "BE01")
+
+    with TransactionLedger(str(tmp_path / "ledger.sqlite")) as ledger:
+        ledger.record(fingerprints[:2], "BE01")
+        unseen = ledger.unseen_mask(fingerprints)
+        count = ledger.count("BE01")
+
+    assert unseen.tolist() == [False, False, True]
+    assert count == 2
+
+
+def test_convert_file_incremental_appends_only_new_rows(tmp_path) -> None:
+    ledger = str(tmp_path / "ledger.sqlite")
+    first = tmp_path / "export_BE50732047041718_20250301_1200.csv"
+    first.write_text(CSV_HEADER + "".join(ROWS[:2]), encoding="latin-1")
+    second = tmp_path / "export_BE50732047041718_20250401_1200.csv"
+    second.write_text(CSV_HEADER + "".join(ROWS[1:]), encoding="latin-1")
+
+    output, added_first = convert_file_incremental(
+        str(first), "latin-1", ";", ledger, output_dir=str(tmp_path)
+    )
+    _, added_second = convert_file_incremental(
+        str(second), "latin-1", ";", ledger, output_dir=str(tmp_path)
+    )
+    _, added_again = convert_file_incremental(
+        str(second), "latin-1", ";", ledger, output_dir=str(tmp_path)
+    )
+
+    assert (added_first, added_second, added_again) == (2, 2, 0)
+    assert output == str(tmp_path / "FDD_historique.csv")
+    history = pandas.read_csv(output, sep=";")
+    assert history["N°extrait"].tolist() == [1, 1, 1, 2]
+
+
+def test_main_incremental_appends_to_the_account_history(tmp_path) -> None:
+    export = tmp_path / "export_BE50732047041718_20250301_1200.csv"
+    export.write_text(CSV_HEADER + "".join(ROWS), encoding="latin-1")
+    args = [
+        "--input",
+        str(export),
+        "--incremental",
+        "--ledger",
+        str(tmp_path / "ledger.sqlite"),
+        "--output-dir",
+        str(tmp_path),
+        "--no-categories",
+    ]
+
+    main(args)
+    main(args)
+
+    history = pandas.read_csv(tmp_path / "FDD_historique.csv", sep=";")
+    assert len(history) == len(ROWS)
+
+
+def test_main_incremental_accepts_a_blank_statement_number(tmp_path) -> None:
+    export = tmp_path / "export_BE50732047041718_20250301_1200.csv"
+    export.write_text(
+        CSV_HEADER + "".join(ROWS[:2]) + ";VIREMENT DE PAUL;27/03/2024;100,00;\n",
+        encoding="latin-1",
+    )
+
+    main(
+        [
+            "--input",
+            str(export),
+            "--incremental",
+            "--ledger",
+            str(tmp_path / "ledger.sqlite"),
+            "--output-dir",
+            str(tmp_path),
+            "--no-categories",
+        ]
+    )
+
+    history = pandas.read_csv(tmp_path / "FDD_historique.csv", sep=";")
+    assert history["N°extrait"].isna().tolist() == [False, False, True]
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+pandas = pytest.importorskip("pandas")
+
+from core.metrics import (  # noqa: E402
+    PipelineMetrics,
+    format_memory_usage,
+    frame_memory_usage,
+    run_step,
+)
+
+
+def _drop_first_row(df):
+    return df.iloc[1:]
+
+
+def test_pipeline_metrics_records_each_step(tmp_path) -> None:
+    metrics = PipelineMetrics(profile=True)
+    df = pandas.DataFrame({"a": range(10)})
+
+    df = run_step(metrics, _drop_first_row, df)
+    df = run_step(metrics, _drop_first_row, df)
+    metrics.close()
+
+    step = metrics.to_dict()["steps"][0]
+    assert step["name"] == "_drop_first_row"
+    assert step["calls"] == 2
+    assert (step["rows_in"], step["rows_out"]) == (19, 17)
+    assert step["dataframe_memory"] > 0
+    assert metrics.slowest_step() == "_drop_first_row"
+
+    report = tmp_path / "metrics.json"
+    metrics.write_json(str(report), input_file="x.csv")
+    assert json.loads(report.read_text(encoding="utf-8"))["input_file"] == "x.csv"
+    assert metrics.dump_slowest_profile(str(tmp_path / "slow.prof"))
+    assert (tmp_path / "slow.prof").exists()
+
+
+def test_run_step_without_metrics_just_calls_the_step() -> None:
+    df = pandas.DataFrame({"a": [1, 2]})
+
+    assert len(run_step(None, _drop_first_row, df)) == 1
+
+
+def test_frame_memory_usage_reports_each_column() -> None:
+    df = pandas.DataFrame({"a": [1, 2], "b": pandas.Categorical(["x", "x"])})
+
+    usage = frame_memory_usage(df)
+
+    assert usage["a"] == {"dtype": "int64", "bytes": 16}
+    assert usage["b"]["dtype"] == "category"
+    assert format_memory_usage(usage).splitlines()[-1].startswith("total")
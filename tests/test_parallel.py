@@ -0,0 +1,70 @@
+import pytest
+
+pandas = pytest.importorskip("pandas")
+
+from core import parallel  # noqa: E402
+from core.convert import NEW_ROWS_PIPELINE, PREPARE_PIPELINE  # noqa: E402
+from core.steps import step8_fill_categorie  # noqa: E402
+
+CATEGORY_INDEX = {"FORFAIT": "D-Frais", "VIREMENT EUROPEEN DE": "R-Virements"}
+DESCRIPTIONS = [
+    "PAIEMENT PAR MAESTRO 01-02 A 10.00 HEURES DELHAIZE AVEC LA CARTE",
+    "FORFAIT MENSUEL",
+    "VIREMENT EUROPEEN DE MARIE",
+    "RETRAIT D'ESPECES",
+    "DIVERS",
+]
+
+
+def _prepared_export(rows: int) -> pandas.DataFrame:
+    df = pandas.DataFrame(
+        {
+            "Numéro de compte": ["BE50732047041718"] * rows,
+            "Numéro de l'extrait": list(range(rows)),
+            "Date": ["18/01/2025"] * rows,
+            "Description": [DESCRIPTIONS[i % len(DESCRIPTIONS)] for i in range(rows)],
+            "Valeur": pandas.date_range("2025-01-01", periods=rows, freq="h"),
+            "Montant": [(-1) ** i * (i + 0.5) for i in range(rows)],
+            "Nom contrepartie": [["", "MARIE", "PAUL"][i % 3] for i in range(rows)],
+            "Communication libre": [""] * rows,
+        }
+    )
+    return PREPARE_PIPELINE.run(df)
+
+
+def test_shard_count_keeps_a_minimum_shard_size(monkeypatch) -> None:
+    monkeypatch.setattr(parallel, "SHARD_MIN_ROWS", 10)
+
+    assert parallel.shard_count(5, 4) == 1
+    assert parallel.shard_count(25, 4) == 2
+    assert parallel.shard_count(1000, 4) == 4
+
+
+def test_split_and_concat_keep_order_and_categories() -> None:
+    df = pandas.DataFrame(
+        {
+            "n": range(7),
+            "c": pandas.Categorical(list("abcabca")),
+        }
+    )
+    shards = parallel.split_frame(df, 3)
+    # Chaque morceau n'a que ses propres catégories
+    shards = [shard.astype({"c": str}).astype({"c": "category"}) for shard in shards]
+
+    result = parallel.concat_shards(shards)
+
+    assert [len(shard) for shard in shards] == [2, 2, 3]
+    pandas.testing.assert_frame_equal(result, df)
+
+
+def test_enrich_in_parallel_matches_the_serial_pipeline(monkeypatch) -> None:
+    monkeypatch.setattr(parallel, "SHARD_MIN_ROWS", 10)
+    expected = step8_fill_categorie(
+        NEW_ROWS_PIPELINE.run(_prepared_export(45)), category_index=CATEGORY_INDEX
+    )
+
+    result = parallel.enrich_in_parallel(
+        _prepared_export(45), workers=3, category_index=CATEGORY_INDEX
+    )
+
+    pandas.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,68 @@
+import pytest
+
+pandas = pytest.importorskip("pandas")
+
+from core import steps  # noqa: E402
+from core.pipeline import (  # noqa: E402
+    ENRICH_PIPELINE,
+    OUTPUT_COLUMNS,
+    STEPS,
+    Pipeline,
+    register_step,
+)
+
+
+def _export() -> pandas.DataFrame:
+    return pandas.DataFrame(
+        {
+            "Numéro de compte": ["BE50732047041718"] * 3,
+            "Numéro de l'extrait": [1, 1, 2],
+            "Date": ["18/01/2025"] * 3,
+            "Description": [
+                "PAIEMENT PAR MAESTRO 01-02 A 10.00 HEURES DELHAIZE AVEC LA CARTE",
+                "FORFAIT MENSUEL",
+                "VIREMENT EUROPEEN DE MARIE",
+            ],
+            "Valeur": pandas.to_datetime(["2025-01-02", "2025-01-03", "2025-01-04"]),
+            "Montant": [-12.5, -3.0, 40.0],
+            "Nom contrepartie": ["", "", "MARIE"],
+            "Communication libre": ["", "", "loyer"],
+        }
+    )
+
+
+def _step_by_step(df: pandas.DataFrame) -> pandas.DataFrame:
+    df = steps.validate_schema(df)
+    for step in (
+        steps.step1_clean_columns,
+        steps.step2_create_new_columns,
+        steps.step3_rename_columns,
+        steps.step4_reorder_columns,
+        steps.step4b_normalize_description,
+        steps.step5_find_operation_type,
+        steps.step6_fill_contrepartie_ET_objFact,
+        steps.step7_drop_description,
+    ):
+        df = step(df)
+    return df
+
+
+def test_enrich_pipeline_matches_the_step_by_step_conversion() -> None:
+    expected = _step_by_step(_export())
+
+    result = ENRICH_PIPELINE.run(_export())
+
+    assert list(result.columns) == OUTPUT_COLUMNS
+    pandas.testing.assert_frame_equal(result, expected)
+
+
+def test_pipeline_rejects_unknown_and_copying_steps() -> None:
+    with pytest.raises(ValueError, match="inconnue"):
+        Pipeline(["schema", "nope"])
+
+    register_step("copy", lambda df: df.copy())
+    try:
+        with pytest.raises(TypeError, match="en place"):
+            Pipeline(["copy"]).run(_export())
+    finally:
+        del STEPS["copy"]
@@ -0,0 +1,112 @@
+import pytest
+
+from core.rules import (
+    CategoryRule,
+    CategoryRules,
+    KeywordAutomaton,
+    read_category_rules,
+)
+
+
+def test_keyword_automaton_finds_overlapping_keywords() -> None:
+    automaton = KeywordAutomaton()
+    for value, keyword in enumerate(["HE", "SHE", "HIS", "HERS"]):
+        automaton.add(keyword, value)
+    automaton.build()
+
+    assert automaton.find_all("USHERS") == {0, 1, 3}
+    assert automaton.find_all("AHISB") == {2}
+    assert automaton.find_all("") == set()
+
+
+def test_category_rules_apply_priority_then_file_order() -> None:
+    rules = CategoryRules(
+        [
+            CategoryRule(20, "D-Energie", "*", r"LUMINUS|ENGIE", "regex", 2),
+            CategoryRule(10, "D-Alimentaire", "Contrepartie", "Delhaizé", "mot", 3),
+            CategoryRule(20, "D-Facture", "Objet", "FACTURE", "mot", 4),
+        ]
+    )
+
+    assert rules.match("DELHAIZE LE LION", "FACTURE LUMINUS").category == (
+        "D-Alimentaire"
+    )
+    assert rules.match("", "FACTURE LUMINUS").category == "D-Energie"
+    assert rules.match("", "FACTURE").category == "D-Facture"
+    assert rules.match("LUMINUS", "").category == "D-Energie"
+    assert rules.match("BOULANGERIE", "PAIN") is None
+    assert [rule.line for rule in rules.explain_match("Delhaize", "facture")] == [
+        3,
+        4,
+    ]
+
+
+def test_read_category_rules_reports_invalid_lines(tmp_path) -> None:
+    rules_file = tmp_path / "rules.csv"
+    rules_file.write_text(
+        "Priorité;Catégorie;Champ;Motif;Type\n"
+        "10;D-Alimentaire;Contrepartie;DELHAIZE;mot\n"
+        "20;D-Energie;Montant;LUMINUS;mot\n",
+        encoding="utf-8",
+    )
+
+    with pytest.raises(ValueError, match="ligne 3.*champ inconnu 'Montant'"):
+        read_category_rules(str(rules_file))
+
+
+@pytest.mark.parametrize(
+    ("patterns", "message"),
+    [
+        (["LUMINUS(?i)"], "ligne 2.*LUMINUS"),
+        ([r"(ENGIE) \1"], "ligne 2.*références numérotées"),
+        (["(?P<nom>ENGIE)", "(?P<nom>LUMINUS)"], "incompatibles"),
+    ],
+)
+def test_read_category_rules_checks_regexes_as_combined(
+    tmp_path, patterns, message
+) -> None:
+    rules_file = tmp_path / "rules.csv"
+    rules_file.write_text(
+        "Priorité;Catégorie;Champ;Motif;Type\n"
+        + "".join(f"10;D-Energie;*;{pattern};regex\n" for pattern in patterns),
+        encoding="utf-8",
+    )
+
+    with pytest.raises(ValueError, match=message):
+        read_category_rules(str(rules_file))
+
+
+def test_step8_uses_rules_before_operation_types() -> None:
+    pandas = pytest.importorskip("pandas")
+    from core.steps import CATEGORY_RULE_COLUMN, step8_fill_categorie
+
+    df = pandas.DataFrame(
+        {
+            "Type d’opération": ["PAIEMENT PAR MAESTRO", "FORFAIT", None, "FORFAIT"],
+            "Contrepartie": ["Delhaize Namur", "", "", ""],
+            "Objet de l’opération": ["", "", "Facture Luminus", ""],
+            "Montant": [-12.0, -2.5, -80.0, 4.0],
+        }
+    )
+    rules = CategoryRules(
+        [
+            CategoryRule(10, "D-Alimentaire", "Contrepartie", "DELHAIZE", "mot", 2),
+            CategoryRule(20, "D-Energie", "*", "LUMINUS", "regex", 3),
+        ],
+        explain=True,
+    )
+
+    result = step8_fill_categorie(
+        df, category_index={"FORFAIT": "D-Frais"}, category_rules=rules
+    )
+
+    assert result["Catégorie"].tolist() == [
+        "D-Alimentaire",
+        "D-Frais",
+        "D-Energie",
+        "D-Frais",
+    ]
+    assert result[CATEGORY_RULE_COLUMN].tolist()[1:3] == [
+        "type d’opération : FORFAIT",
+        "règle ligne 3 (priorité 20) : * correspond à 'LUMINUS' -> D-Energie",
+    ]
@@ -0,0 +1,151 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+pandas = pytest.importorskip("pandas")
+pytest.importorskip("openpyxl")
+
+from core.categories import CategoryCache  # noqa: E402
+from core.service import ConversionService  # noqa: E402
+
+CSV_CONTENT = (
+    "Numéro de l'extrait;Description;Valeur;Montant;Nom contrepartie\n"
+    "1;FORFAIT MENSUEL;02/03/2024;-2,50;\n"
+    "2;VIREMENT DE PAUL;27/03/2024;100,00;PAUL\n"
+).encode("latin-1")
+
+
+async def _request(port: int, head: str, body: bytes = b"") -> tuple[int, bytes]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(head.encode("latin-1") + b"\r\n\r\n" + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status_line, _, rest = response.partition(b"\r\n")
+    _, _, payload = rest.partition(b"\r\n\r\n")
+    return int(status_line.split()[1]), payload
+
+
+def _run_with_service(tmp_path, max_pending: int, scenario, **options):
+    category_file = tmp_path / "categories.csv"
+    category_file.write_text("Catégorie;Opérations\nD-Frais;FORFAIT\n", "utf-8")
+
+    async def main():
+        service = ConversionService(
+            1,
+            max_pending,
+            CategoryCache(str(category_file)),
+            categories_dir=str(tmp_path / "service_categories"),
+            **options,
+        )
+        server = await service.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(port)
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.close()
+
+    return asyncio.run(main())
+
+
+def test_service_converts_upload_and_reports_health(tmp_path) -> None:
+    async def scenario(port):
+        converted = await _request(
+            port,
+            "POST /convert?filename=export_BE50732047041718_20250118_1200.csv "
+            f"HTTP/1.1\r\nContent-Length: {len(CSV_CONTENT)}",
+            CSV_CONTENT,
+        )
+        invalid = await _request(
+            port, "POST /convert?filename=releve.csv HTTP/1.1\r\nContent-Length: 0"
+        )
+        health = await _request(port, "GET /health HTTP/1.1")
+        return converted, invalid, health
+
+    converted, invalid, health = _run_with_service(tmp_path, 4, scenario)
+
+    assert converted[0] == 200
+    sheet = pandas.read_excel(io.BytesIO(converted[1]))
+    assert sheet["Catégorie"].tolist() == ["D-Frais", "R-Autres"]
+    assert invalid[0] == 400
+    assert health[0] == 200
+    assert json.loads(health[1])["completed"] == 1
+
+
+def test_service_converts_with_a_chosen_categories_file(tmp_path) -> None:
+    categories_dir = tmp_path / "service_categories"
+    categories_dir.mkdir()
+    (categories_dir / "banque.csv").write_text(
+        "Catégorie;Opérations\nD-Banque;FORFAIT\n", "utf-8"
+    )
+
+    async def scenario(port):
+        converted = await _request(
+            port,
+            "POST /convert?filename=export_BE50732047041718_20250118_1200.csv"
+            f"&categories=banque.csv HTTP/1.1\r\nContent-Length: {len(CSV_CONTENT)}",
+            CSV_CONTENT,
+        )
+        outside = await _request(
+            port,
+            "POST /convert?filename=export_BE50732047041718_20250118_1200.csv"
+            "&categories=../categories.csv HTTP/1.1\r\nContent-Length: 0",
+        )
+        unknown = await _request(
+            port,
+            "POST /convert?filename=export_BE50732047041718_20250118_1200.csv"
+            "&categories=autre.csv HTTP/1.1\r\nContent-Length: 0",
+        )
+        upload = await _request(
+            port, "POST /categories?name=autre.csv HTTP/1.1\r\nContent-Length: 0"
+        )
+        return converted, outside, unknown, upload
+
+    converted, outside, unknown, upload = _run_with_service(tmp_path, 4, scenario)
+
+    assert converted[0] == 200
+    sheet = pandas.read_excel(io.BytesIO(converted[1]))
+    assert sheet["Catégorie"].tolist() == ["D-Banque", "R-Autres"]
+    assert outside[0] == 400
+    assert unknown[0] == 404
+    assert upload[0] == 404
+
+
+def test_service_rejects_requests_beyond_max_pending(tmp_path) -> None:
+    async def scenario(port):
+        return await _request(
+            port,
+            "POST /convert?filename=export_BE50732047041718_20250118_1200.csv "
+            f"HTTP/1.1\r\nContent-Length: {len(CSV_CONTENT)}",
+            CSV_CONTENT,
+        )
+
+    status, payload = _run_with_service(tmp_path, 0, scenario)
+
+    assert status == 503
+    assert "saturé" in json.loads(payload)["error"]
+
+
+def test_service_times_out_slow_heads_and_bodies(tmp_path) -> None:
+    async def silent(port, data: bytes):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(data)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return int(response.split()[1])
+
+    async def scenario(port):
+        head = await silent(port, b"POST /convert?filename=x")
+        body = await silent(
+            port,
+            b"POST /convert?filename=export_BE50732047041718_20250118_1200.csv "
+            b"HTTP/1.1\r\nContent-Length: 100\r\n\r\n1;",
+        )
+        return head, body
+
+    assert _run_with_service(tmp_path, 4, scenario, read_timeout=0.2) == (408, 408)
@@ -0,0 +1,142 @@
+import sqlite3
+
+import pytest
+
+pandas = pytest.importorskip("pandas")
+
+from core.convert import convert_file  # noqa: E402
+from core.sinks import (  # noqa: E402
+    SqliteSink,
+    create_sink,
+    output_path,
+    write_output,
+)
+
+CSV_HEADER = "Numéro de l'extrait;Description;Valeur;Montant;Nom contrepartie\n"
+CSV_ROWS = (
+    "1;FORFAIT MENSUEL;02/03/2024;-2,50;\n"
+    "1;VIREMENT VERS MARIE;10/03/2024;-40,00;MARIE\n"
+    "2;VIREMENT DE PAUL;27/03/2024;100,00;PAUL\n"
+)
+
+
+def test_output_path_uses_the_format_extension() -> None:
+    assert output_path("out/[x]_FDD_2025.01.18.xlsx", "sqlite") == (
+        "out/[x]_FDD_2025.01.18.sqlite"
+    )
+    assert output_path("out.csv", "csv") == "out.csv"
+    assert output_path("out", "parquet") == "out.parquet"
+
+
+def test_sqlite_sink_writes_typed_rows_and_indexes(tmp_path) -> None:
+    path = tmp_path / "out.sqlite"
+    sink = SqliteSink(str(path), account="FDD")
+    for chunk in (
+        pandas.DataFrame(
+            {
+                "Date": pandas.to_datetime(["2024-03-02", None]),
+                "Catégorie": pandas.Categorical(["D-Frais", None]),
+                "Montant": [-2.5, 40.0],
+            }
+        ),
+        pandas.DataFrame(
+            {
+                "Date": pandas.to_datetime(["2024-03-27"]),
+                "Catégorie": pandas.Categorical(["R-Autres"]),
+                "Montant": [100.0],
+            }
+        ),
+    ):
+        sink.write(chunk)
+    sink.close("02-27(03.24)")
+
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute(
+            'SELECT "Date", "Catégorie", "Montant", "Compte" FROM transactions'
+        ).fetchall()
+        indexes = {
+            row[0]
+            for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+    assert rows == [
+        ("2024-03-02", "D-Frais", -2.5, "FDD"),
+        (None, None, 40.0, "FDD"),
+        ("2024-03-27", "R-Autres", 100.0, "FDD"),
+    ]
+    assert indexes == {"idx_Date", "idx_Catégorie", "idx_Compte"}
+
+
+def test_sqlite_sink_aligns_later_chunks_on_the_table_columns(tmp_path) -> None:
+    path = tmp_path / "out.sqlite"
+    sink = SqliteSink(str(path))
+    sink.write(pandas.DataFrame({"Montant": [-2.5], "Remarque": ["a"]}))
+    sink.write(pandas.DataFrame({"Autre": ["x"], "Montant": [40.0]}))
+    sink.close("Export")
+
+    with sqlite3.connect(path) as connection:
+        columns = [
+            row[1] for row in connection.execute("PRAGMA table_info(transactions)")
+        ]
+        rows = connection.execute("SELECT * FROM transactions").fetchall()
+    assert columns == ["Montant", "Remarque"]
+    assert rows == [(-2.5, "a"), (40.0, None)]
+
+
+@pytest.mark.parametrize("chunksize", [None, 2])
+def test_convert_file_writes_several_formats(tmp_path, chunksize) -> None:
+    input_file = tmp_path / "export_BE50732047041718_20250118_1200.csv"
+    input_file.write_text(CSV_HEADER + CSV_ROWS, encoding="latin-1")
+
+    result = convert_file(
+        str(input_file),
+        "latin-1",
+        ";",
+        category_index={"FORFAIT": "D-Frais"},
+        output_dir=str(tmp_path),
+        chunksize=chunksize,
+        output_formats=["xlsx", "csv", "sqlite"],
+    )
+
+    stem = "[2-27(03.24)]_FDD_2025.01.18"
+    assert result == str(tmp_path / f"{stem}.xlsx")
+    written = pandas.read_csv(tmp_path / f"{stem}.csv", sep=";", dtype=str)
+    assert written["Catégorie"].tolist() == ["D-Frais", "D-Autres", "R-Autres"]
+    with sqlite3.connect(tmp_path / f"{stem}.sqlite") as connection:
+        total = connection.execute(
+            'SELECT SUM("Montant") FROM transactions WHERE "Compte" = \'FDD\''
+        ).fetchone()[0]
+    assert total == pytest.approx(57.5)
+
+
+def test_xlsx_sink_names_the_sheet_at_close(tmp_path) -> None:
+    openpyxl = pytest.importorskip("openpyxl")
+    path = tmp_path / "out.xlsx"
+    df = pandas.DataFrame({"Montant": [-2.5, 40.0]})
+
+    write_output(df, str(path), "xlsx", "2-27(03.24)")
+
+    workbook = openpyxl.load_workbook(path)
+    assert workbook.sheetnames == ["2-27(03.24)"]
+    assert workbook.active.max_row == 3
+
+
+def test_parquet_sink_round_trips_types(tmp_path) -> None:
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "out.parquet"
+    df = pandas.DataFrame(
+        {
+            "Date": pandas.to_datetime(["2024-03-02"]),
+            "Catégorie": pandas.Categorical(["D-Frais"]),
+            "Montant": [-2.5],
+        }
+    )
+
+    sink = create_sink("parquet", str(path))
+    sink.write(df)
+    sink.close("feuille")
+
+    result = pandas.read_parquet(path)
+    assert result["Date"].iloc[0] == pandas.Timestamp("2024-03-02")
+    assert result["Montant"].tolist() == [-2.5]
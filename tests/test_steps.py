@@ -0,0 +1,177 @@
+import pytest
+
+pandas = pytest.importorskip("pandas")
+
+from core.steps import (  # noqa: E402
+    _normalize_text,
+    normalize_descriptions,
+    prepare_export,
+    step2_create_new_columns,
+    step5_find_operation_type,
+    step6_fill_contrepartie_ET_objFact,
+    step8_fill_categorie,
+    step9_export_excel,
+)
+
+
+def test_step5_find_operation_type_keeps_list_priority() -> None:
+    df = pandas.DataFrame(
+        {
+            "Description": [
+                "Forfait lié à la domiciliation européenne",
+                "paiement  par   maestro 01-02 A 10.00 HEURES DELHAIZE",
+                "Virement instantané de Pierre",
+                "RIEN DU TOUT",
+            ],
+            "Type d’opération": ["", "", "", ""],
+        }
+    )
+
+    result = step5_find_operation_type(df)
+
+    assert result["Type d’opération"].tolist()[:3] == [
+        "DOMICILIATION EUROPEENNE",
+        "PAIEMENT PAR MAESTRO",
+        "VIREMENT INSTANTANE DE",
+    ]
+    assert pandas.isna(result["Type d’opération"].iloc[3])
+
+
+def test_step5_sees_overlapping_operation_types(monkeypatch) -> None:
+    from core import steps
+
+    # "DECOMPTE" (prioritaire) commence dans l'occurrence de "VIREMENT DE"
+    matcher, lookup = steps._build_op_type_matcher(["DECOMPTE", "VIREMENT DE"])
+    monkeypatch.setattr(steps, "_OP_TYPE_MATCHER", matcher)
+    monkeypatch.setattr(steps, "_OP_TYPE_LOOKUP", lookup)
+    df = pandas.DataFrame({"Description": ["VIREMENT DECOMPTE 2024", "VIREMENT DE"]})
+
+    result = step5_find_operation_type(df)
+
+    assert result["Type d’opération"].tolist() == ["DECOMPTE", "VIREMENT DE"]
+
+
+def test_step6_fill_contrepartie_et_objet_from_description() -> None:
+    df = pandas.DataFrame(
+        {
+            "Description": [
+                "DOMICILIATION EUROPEENNE CREANCIER       : PROXIMUS SA  REF. X"
+                " COMMUNICATION   : facture 12",
+                "Domiciliation européenne sans marqueurs",
+                "PAIEMENT PAR BANCONTACT 12-03 A 14.22 HEURES COLRUYT  AVEC LA CARTE",
+                "PAIEMENT PAR MAESTRO sans heures",
+                "FORFAIT MENSUEL",
+                "DECOMPTE VISA",
+                "VIREMENT VERS MARIE",
+                "VIREMENT VERS JEAN",
+            ],
+            "Contrepartie": ["", None, " ", "", "", "", "", "SOCIETE X"],
+            "Objet de l’opération": ["", "", "", "", "", "", "libre", "com"],
+        }
+    )
+
+    result = step6_fill_contrepartie_ET_objFact(df)
+
+    assert result["Contrepartie"].tolist() == [
+        "PROXIMUS SA",
+        "(Contrepartie DOM introuvable)",
+        "COLRUYT",
+        "(Paiement non géré)",
+        "COMPTE D'ENTREPRISE CBC",
+        "MASTERCARD BUSINESS BLUE CBC",
+        "(Non géré)",
+        "SOCIETE X",
+    ]
+    assert result["Objet de l’opération"].tolist() == [
+        "facture 12",
+        "(Communication DOM introuvable)",
+        "Achats",
+        "",
+        "Frais bancaires",
+        "Frais bancaires",
+        "libre",
+        "com",
+    ]
+
+
+def test_step8_fill_categorie_uses_index_and_amount_fallback(tmp_path) -> None:
+    csv_path = tmp_path / "categories.csv"
+    csv_path.write_text(
+        "Catégorie;Opérations\nD-Frais;FORFAIT,CONSOMMATION\n", encoding="utf-8"
+    )
+    df = pandas.DataFrame(
+        {
+            "Type d’opération": ["FORFAIT", "VIREMENT DE", "VIREMENT VERS", None],
+            "Montant": [-2.5, 100.0, -40.0, -1.0],
+        }
+    )
+
+    result = step8_fill_categorie(df, str(csv_path))
+
+    assert result["Catégorie"].tolist()[:3] == ["D-Frais", "R-Autres", "D-Autres"]
+    assert pandas.isna(result["Catégorie"].iloc[3])
+
+
+def test_step9_export_excel_formats_columns_at_write_time(tmp_path) -> None:
+    openpyxl = pytest.importorskip("openpyxl")
+    pytest.importorskip("xlsxwriter")
+    df = pandas.DataFrame(
+        {
+            "N°extrait": [1, 1],
+            "Date": pandas.to_datetime(["2024-03-02", "2024-03-27"]),
+            "Type d’opération": ["FORFAIT", None],
+            "Montant": [-2.5, 10.0],
+        }
+    )
+    output = tmp_path / "out.xlsx"
+
+    step9_export_excel(df, "export_BE50732047041718_20250118_1200.csv", str(output))
+
+    sheet = openpyxl.load_workbook(output).active
+    assert sheet.title == "2-27(03.24)"
+    assert sheet["B2"].number_format == "DD-MM-YY"
+    assert sheet["D2"].number_format == "#,##0.00 €;[RED]- #,##0.00 €"
+    assert sheet["C3"].value == "Non trouvé"
+
+
+def test_normalize_descriptions_matches_scalar_normalization() -> None:
+    values = [
+        "  Virement instantané\tde  Zoë ",
+        "Straße ǰ café",
+        "INDEMNISATION SUITE AUX OPÉRATIONS\u00a0x",
+        "Virement instantané\tde  Zoë",
+        "",
+        None,
+    ]
+
+    result = normalize_descriptions(pandas.Series(values))
+
+    assert result.tolist() == [_normalize_text(value or "") for value in values]
+
+
+def test_pipeline_columns_use_compact_category_dtype() -> None:
+    df = pandas.DataFrame(
+        {
+            "Description": ["PAIEMENT PAR MAESTRO 01-02 A 10.00 HEURES DELHAIZE AVEC"]
+            * 3
+            + ["RIEN DU TOUT"],
+            "Contrepartie": ["", "", "", ""],
+            "Objet de l’opération": ["", "", "", ""],
+            "Montant": [-5.0, -6.0, -7.0, 8.0],
+        }
+    )
+
+    df = step2_create_new_columns(df)
+    assert isinstance(df["Projet"].dtype, pandas.CategoricalDtype)
+    assert df["Remarque"].tolist() == ["", "", "", ""]
+
+    df = step5_find_operation_type(df)
+    df = step6_fill_contrepartie_ET_objFact(df)
+    df = step8_fill_categorie(df, category_index={"PAIEMENT PAR MAESTRO": "D-Achats"})
+    for column in ("Type d’opération", "Contrepartie", "Catégorie"):
+        assert isinstance(df[column].dtype, pandas.CategoricalDtype)
+    assert df["Contrepartie"].tolist()[:3] == ["DELHAIZE"] * 3
+    assert df["Catégorie"].tolist()[:3] == ["D-Achats"] * 3
+
+    result = prepare_export(df)
+    assert result["Type d’opération"].iloc[3] == "Non trouvé"
@@ -0,0 +1,111 @@
+import pytest
+
+pandas = pytest.importorskip("pandas")
+
+from core.convert import convert_file  # noqa: E402
+from core.main import main  # noqa: E402
+from core.store import TransactionStore  # noqa: E402
+
+CSV_HEADER = "Numéro de l'extrait;Description;Valeur;Montant;Nom contrepartie\n"
+FIRST_EXPORT = (
+    "1;FORFAIT MENSUEL;02/03/2024;-2,50;\n"
+    "1;VIREMENT VERS MARIE;10/03/2024;-40,00;Marie Énergie\n"
+)
+SECOND_EXPORT = FIRST_EXPORT + "2;VIREMENT DE PAUL;02/04/2024;100,00;PAUL\n"
+
+
+def _convert(tmp_path, name: str, rows: str, store_path: str) -> None:
+    input_file = tmp_path / name
+    input_file.write_text(CSV_HEADER + rows, encoding="latin-1")
+    convert_file(
+        str(input_file),
+        "latin-1",
+        ";",
+        category_index={"FORFAIT": "D-Frais"},
+        output_dir=str(tmp_path),
+        store_path=store_path,
+    )
+
+
+def test_convert_file_feeds_the_store_without_duplicates(tmp_path) -> None:
+    store_path = str(tmp_path / "historique.sqlite")
+    _convert(
+        tmp_path, "export_BE50732047041718_20240331_1200.csv", FIRST_EXPORT, store_path
+    )
+    # Le second export recouvre le premier
+    _convert(
+        tmp_path, "export_BE50732047041718_20240430_1200.csv", SECOND_EXPORT, store_path
+    )
+
+    with TransactionStore(store_path) as store:
+        assert store.count() == 3
+        everything = store.query()
+        april = store.query(date_from="2024-04-01", date_to="2024-04-30")
+        fees = store.query(category="d-frais", account="fdd")
+        expenses = store.query(category="D-*")
+        marie = store.query(counterparty="marie ener")
+        inside = store.query(counterparty="energie")
+        transfers = store.query(operation_type="VIREMENT")
+
+    assert everything["Montant"].tolist() == [-2.5, -40.0, 100.0]
+    assert everything["Compte"].unique().tolist() == ["FDD"]
+    assert april["Montant"].tolist() == [100.0]
+    assert fees["Montant"].tolist() == [-2.5]
+    assert len(expenses) == 2
+    assert marie["Contrepartie"].tolist() == ["Marie Énergie"]
+    assert inside.empty
+    assert len(transfers) == 2
+
+
+def test_store_accepts_blank_statement_numbers(tmp_path) -> None:
+    store_path = str(tmp_path / "historique.sqlite")
+    rows = FIRST_EXPORT + ";VIREMENT DE PAUL;02/04/2024;100,00;PAUL\n"
+    for _ in range(2):
+        _convert(
+            tmp_path, "export_BE50732047041718_20240430_1200.csv", rows, store_path
+        )
+
+    # Converti deux fois : aucune transaction ajoutée en double
+    with TransactionStore(store_path) as store:
+        assert store.count() == 3
+        everything = store.query()
+
+    assert everything["Montant"].tolist() == [-2.5, -40.0, 100.0]
+
+
+def test_query_uses_the_indexes(tmp_path) -> None:
+    with TransactionStore(str(tmp_path / "historique.sqlite")) as store:
+        plan = store.connection.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM transactions "
+            "WHERE \"Date\" >= '2024-01-01' AND \"Catégorie\" = 'D-Frais'"
+        ).fetchall()
+    assert "USING INDEX" in " ".join(str(row) for row in plan)
+
+
+def test_counterparty_query_uses_its_index(tmp_path, monkeypatch) -> None:
+    plans = []
+    with TransactionStore(str(tmp_path / "historique.sqlite")) as store:
+        read_sql_query = pandas.read_sql_query
+
+        def explain(sql, connection, params):
+            plans.extend(connection.execute("EXPLAIN QUERY PLAN " + sql, params))
+            return read_sql_query(sql, connection, params=params)
+
+        monkeypatch.setattr(pandas, "read_sql_query", explain)
+        store.query(counterparty="Marie")
+
+    assert "idx_contrepartie" in " ".join(str(row) for row in plans)
+
+
+def test_query_subcommand_prints_matching_transactions(tmp_path, capsys) -> None:
+    store_path = str(tmp_path / "historique.sqlite")
+    _convert(
+        tmp_path, "export_BE50732047041718_20240331_1200.csv", FIRST_EXPORT, store_path
+    )
+    capsys.readouterr()
+
+    main(["query", "--store", store_path, "--counterparty", "MARIE"])
+
+    output = capsys.readouterr().out
+    assert "Marie Énergie" in output
+    assert "1 transaction(s), total : -40.00 €" in output
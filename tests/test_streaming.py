@@ -0,0 +1,67 @@
+import pytest
+
+pandas = pytest.importorskip("pandas")
+
+from core.streaming import RunningPeriod, convert_in_chunks  # noqa: E402
+
+CSV_HEADER = "Numéro de l'extrait;Description;Valeur;Montant;Nom contrepartie\n"
+
+
+def test_running_period_tracks_min_and_max_across_chunks() -> None:
+    period = RunningPeriod()
+    period.update(pandas.DataFrame({"Date": pandas.to_datetime(["2024-03-10"])}))
+    period.update(pandas.DataFrame({"Date": pandas.to_datetime([None, "2024-03-02"])}))
+    period.update(pandas.DataFrame({"Date": pandas.to_datetime(["2024-03-27"])}))
+
+    assert period.as_frame()["Date"].tolist() == [
+        pandas.Timestamp("2024-03-02"),
+        pandas.Timestamp("2024-03-27"),
+    ]
+
+
+def test_convert_in_chunks_writes_csv_incrementally(tmp_path) -> None:
+    input_file = tmp_path / "export_BE50732047041718_20250118_1200.csv"
+    input_file.write_text(
+        CSV_HEADER
+        + "1;FORFAIT MENSUEL;02/03/2024;-2,50;\n"
+        + "1;VIREMENT VERS MARIE;10/03/2024;-40,00;MARIE\n"
+        + "2;VIREMENT DE PAUL;27/03/2024;100,00;PAUL\n",
+        encoding="latin-1",
+    )
+    output = tmp_path / "out.csv"
+
+    result = convert_in_chunks(
+        str(input_file), "latin-1", ";", 2, {"FORFAIT": "D-Frais"}, str(output)
+    )
+
+    written = pandas.read_csv(result, sep=";", decimal=",", dtype=str)
+    assert written["Catégorie"].tolist() == ["D-Frais", "D-Autres", "R-Autres"]
+    assert written["Date"].tolist() == ["02/03/2024", "10/03/2024", "27/03/2024"]
+    assert written["Montant"].tolist() == ["-2,5", "-40,0", "100,0"]
+    assert sorted(tmp_path.iterdir()) == sorted([input_file, output])
+
+
+def test_convert_in_chunks_names_the_xlsx_sheet_and_checks_the_row_limit(
+    tmp_path, monkeypatch
+) -> None:
+    openpyxl = pytest.importorskip("openpyxl")
+    input_file = tmp_path / "export_BE50732047041718_20250118_1200.csv"
+    input_file.write_text(
+        CSV_HEADER
+        + "1;FORFAIT MENSUEL;02/03/2024;-2,50;\n"
+        + "2;VIREMENT DE PAUL;27/03/2024;100,00;PAUL\n"
+        + "2;VIREMENT DE PAUL;28/03/2024;100,00;PAUL\n",
+        encoding="latin-1",
+    )
+    output = tmp_path / "out.xlsx"
+
+    convert_in_chunks(str(input_file), "latin-1", ";", 2, None, str(output))
+    workbook = openpyxl.load_workbook(output)
+    assert workbook.sheetnames == ["2-28(03.24)"]
+    assert workbook.active.max_row == 4
+
+    # Feuille limitée à l'en-tête et deux lignes : erreur, pas de troncature
+    monkeypatch.setattr("core.excel_writer.EXCEL_MAX_ROWS", 3)
+    with pytest.raises(ValueError, match="Trop de lignes"):
+        convert_in_chunks(str(input_file), "latin-1", ";", 2, None, str(output))
+    assert sorted(tmp_path.iterdir()) == sorted([input_file, output])
@@ -0,0 +1,34 @@
+from core.watch import FolderWatcher
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_folder_watcher_waits_until_files_are_stable(tmp_path) -> None:
+    (tmp_path / "old.csv").write_text("a", encoding="utf-8")
+    clock = FakeClock()
+    watcher = FolderWatcher(str(tmp_path), settle_seconds=2, clock=clock)
+
+    new_file = tmp_path / "new.csv"
+    new_file.write_text("a", encoding="utf-8")
+    assert watcher.poll() == []
+    clock.now = 1
+    new_file.write_text("ab", encoding="utf-8")  # copie encore en cours
+    assert watcher.poll() == []
+    clock.now = 2.5
+    assert watcher.poll() == []
+    clock.now = 3
+    assert watcher.poll() == [str(new_file)]
+    clock.now = 10
+    assert watcher.poll() == []
+
+    (tmp_path / "notes.txt").write_text("ignoré", encoding="utf-8")
+    new_file.write_text("abc", encoding="utf-8")
+    watcher.poll()
+    clock.now = 20
+    assert watcher.poll() == [str(new_file)]